@@ -0,0 +1,147 @@
+"""Scaling benchmarks for handler construction, placement and serialization.
+
+Run with `pytest benchmarks -s`. Sizes go from 10^3 up to
+10^STRUCTGEN_BENCH_MAX_EXP atoms (default 5, use 7 for the full sweep).
+Phases too fast to fit at those sizes are run at larger ones as well.
+Set STRUCTGEN_BENCH_OUTPUT to a path to also dump the measurements as JSON.
+"""
+import os
+import json
+import time
+import resource
+import tracemalloc
+
+import numpy as np
+import pytest
+from types import SimpleNamespace
+
+import structgen
+from structgen import api
+
+MAX_EXP = int(os.environ.get("STRUCTGEN_BENCH_MAX_EXP", 5))
+SIZES = [10**exp for exp in range(3, MAX_EXP + 1)]
+
+#Anything at or above this log-log slope is treated as an accidental quadratic path
+MAX_SCALING_EXPONENT = 1.35
+#Timings below this are dominated by fixed overheads and left out of the fit
+MIN_FIT_SECONDS = 0.02
+#Largest size added when fewer than two timings of a phase reach MIN_FIT_SECONDS
+MAX_EXTRA_EXP = 7
+
+PHASES = ["place", "write"]
+
+STYLES = {
+    "atomic": dict(masses=[28.085, 16.00], ratios=[1, 2]),
+    "charge": dict(masses=[28.085, 16.00], ratios=[1, 2], charges=[2.4, -1.2]),
+}
+
+RESULTS = list()
+
+
+def measure(func):
+    """Run func once and return (result, wall seconds)."""
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def traced_peak(func):
+    """Peak bytes allocated while running func.
+
+    Tracing slows Python-level allocations a lot, so this is a separate pass
+    from the timed one.
+    """
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return peak
+
+
+def peak_rss_bytes():
+    #ru_maxrss is reported in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*1024
+
+
+def make_args(style, placement, natoms, outfile):
+    spec = STYLES[style]
+    factor = max(natoms//sum(spec["ratios"]), 1)
+
+    atoms = [[repr(mass), str(ratio)] for mass, ratio in zip(spec["masses"], spec["ratios"])]
+    for atom, charge in zip(atoms, spec.get("charges", [])):
+        atom.append(repr(charge))
+
+    return SimpleNamespace(
+        atom=atoms, density=2.2, buffer=5.0, factor=factor, seed=0,
+        placement=placement, min_dist=["1.2"], output=str(outfile),
+    )
+
+
+def run_pipeline(style, placement, natoms, outfile):
+    handler_class = api.HANDLERS[style]
+    args = make_args(style, placement, natoms, outfile)
+    timings = dict()
+
+    handler, timings["construct"] = measure(lambda: handler_class(args))
+    _, timings["place"] = measure(handler.get_atom_data)
+    _, timings["write"] = measure(lambda: structgen.save(handler, str(outfile)))
+
+    place_peak = traced_peak(lambda: handler_class(args).get_atom_data())
+
+    return dict(
+        style=style,
+        placement=placement,
+        natoms=handler.get_natoms(),
+        seconds=timings,
+        peak_place_bytes=place_peak,
+        peak_rss_bytes=peak_rss_bytes(),
+    )
+
+
+def scaling_exponent(natoms, seconds):
+    natoms = np.asarray(natoms, dtype=float)
+    seconds = np.asarray(seconds, dtype=float)
+    keep = seconds >= MIN_FIT_SECONDS
+    if keep.sum() < 2:
+        return None
+
+    slope, _ = np.polyfit(np.log(natoms[keep]), np.log(seconds[keep]), 1)
+    return slope
+
+
+def count_fitted(runs, phase):
+    return sum(run["seconds"][phase] >= MIN_FIT_SECONDS for run in runs)
+
+
+@pytest.mark.parametrize("placement", ["lattice", "random"])
+@pytest.mark.parametrize("style", list(STYLES))
+def test_scaling(style, placement, tmp_path):
+    runs = [run_pipeline(style, placement, natoms, tmp_path / "bench.structure") for natoms in SIZES]
+
+    #Lattice placement is fast enough to stay below MIN_FIT_SECONDS at the default sizes
+    exp = MAX_EXP
+    while exp < MAX_EXTRA_EXP and any(count_fitted(runs, phase) < 2 for phase in PHASES):
+        exp += 1
+        runs.append(run_pipeline(style, placement, 10**exp, tmp_path / "bench.structure"))
+    RESULTS.extend(runs)
+
+    print(f"\n{style}/{placement}")
+    print(f"{'natoms':>10} {'construct':>10} {'place':>10} {'write':>10} {'place MB':>10}")
+    for run in runs:
+        sec = run["seconds"]
+        peak = run["peak_place_bytes"]/2**20
+        print(f"{run['natoms']:>10} {sec['construct']:>10.4f} {sec['place']:>10.4f} {sec['write']:>10.4f} {peak:>10.1f}")
+
+    for phase in PHASES:
+        exponent = scaling_exponent([run["natoms"] for run in runs], [run["seconds"][phase] for run in runs])
+        assert exponent is not None, f"Fewer than two {phase} timings reach {MIN_FIT_SECONDS} s for {style}/{placement}, nothing to fit"
+        print(f"{phase} scaling exponent: {exponent:.2f}")
+        assert exponent < MAX_SCALING_EXPONENT, f"{phase} scales as N^{exponent:.2f} for {style}/{placement}"
+
+
+def teardown_module(module):
+    output = os.environ.get("STRUCTGEN_BENCH_OUTPUT")
+    if output:
+        with open(output, "w") as file:
+            json.dump(RESULTS, file, indent=2)
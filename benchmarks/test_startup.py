@@ -0,0 +1,39 @@
+"""Startup benchmark for the command line interface.
+
+Run with `pytest benchmarks -s`. Shell loops that generate many small
+structures pay the interpreter and import cost on every call, so `--help`
+and argument parsing must not pull in NumPy or the handlers.
+Set STRUCTGEN_STARTUP_BUDGET to change the allowed overhead in seconds.
+"""
+import os
+import sys
+import time
+import subprocess
+
+import pytest
+
+REPEATS = 7
+
+#Seconds the CLI may add on top of a bare interpreter start
+STARTUP_BUDGET = float(os.environ.get("STRUCTGEN_STARTUP_BUDGET", 0.1))
+
+
+def best_wall_time(command):
+    """Fastest of several runs, which filters out scheduling noise."""
+    timings = list()
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        subprocess.run(command, capture_output=True, check=False)
+        timings.append(time.perf_counter() - start)
+
+    return min(timings)
+
+
+@pytest.mark.parametrize("argv", [["--help"], ["charge", "--help"], ["sweep", "--help"]])
+def test_cli_startup(argv):
+    baseline = best_wall_time([sys.executable, "-c", "pass"])
+    startup = best_wall_time([sys.executable, "-m", "structgen.cli", *argv])
+
+    print(f"\n{' '.join(argv)}: {startup*1000:.1f} ms ({(startup - baseline)*1000:.1f} ms over a bare interpreter)")
+    assert startup - baseline < STARTUP_BUDGET
+
@@ -1,8 +1,27 @@
-from importlib.metadata import version, PackageNotFoundError
-
-try:
-    # Distribution name on PyPI / in the wheel
-    __version__ = version("lammps-structgen")
-except PackageNotFoundError:
-    # Editable or source tree – version unknown
-    __version__ = "0.0.dev0"
+from .errors import StructgenError
+
+__all__ = ["generate", "save", "report", "read", "replicate", "merge", "insert", "StructgenError", "__version__"]
+
+
+def get_version():
+    from importlib.metadata import version, PackageNotFoundError
+
+    try:
+        # Distribution name on PyPI / in the wheel
+        return version("lammps-structgen")
+    except PackageNotFoundError:
+        # Editable or source tree – version unknown
+        return "0.0.dev0"
+
+
+def __getattr__(name):
+    #The API imports NumPy and the handlers, which the CLI only needs once it builds a structure
+    if name in ("generate", "save", "report", "read", "replicate", "merge", "insert"):
+        from . import api
+        return getattr(api, name)
+
+    #Reading package metadata takes longer than the rest of the CLI startup
+    if name == "__version__":
+        return get_version()
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
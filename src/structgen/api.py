@@ -0,0 +1,199 @@
+import os
+from types import SimpleNamespace
+from typing import Mapping, Optional, Sequence, Tuple, Union
+
+from structgen import constants
+from structgen import operations
+from structgen import quality
+from structgen import readers
+from structgen import writers
+from structgen.errors import StructgenError
+from structgen.handlers import ATOMIC, CHARGE, FULL, MOLECULAR
+
+HANDLERS = {
+    "atomic": ATOMIC,
+    "charge": CHARGE,
+    "full": FULL,
+    "molecular": MOLECULAR,
+}
+
+MinDist = Union[float, Mapping[Tuple[int, int], float], Sequence[str], None]
+
+
+def format_min_dist(min_dist: MinDist):
+    #Translate the Python forms into the "<type>-<type>:<distance>" specs handlers parse
+    if min_dist is None:
+        return list()
+    if isinstance(min_dist, (int, float)):
+        return [repr(float(min_dist))]
+    if isinstance(min_dist, Mapping):
+        return [f"{a}-{b}:{float(dist)!r}" for (a, b), dist in min_dist.items()]
+
+    return list(min_dist)
+
+
+def build(handler_class, args):
+    """Construct a handler from a parsed namespace and run its placement."""
+    handler = handler_class(args)
+    handler.get_atom_data()
+
+    return handler
+
+
+def generate(
+    masses: Optional[Sequence[float]] = None,
+    counts: Optional[Sequence[int]] = None,
+    charges: Optional[Sequence[float]] = None,
+    *,
+    density: float,
+    style: Optional[str] = None,
+    buffer: float = constants.DEFAULT_BUFFER_PERCENT,
+    factor: int = constants.DEFAULT_ATOM_FACTOR,
+    seed: Optional[int] = None,
+    placement: str = constants.DEFAULT_PLACEMENT,
+    min_dist: MinDist = None,
+    sort: str = constants.DEFAULT_SORT,
+    lx: Optional[float] = None,
+    ly: Optional[float] = None,
+    lz: Optional[float] = None,
+    aspect: Optional[Sequence[float]] = None,
+    tilt: Optional[Sequence[float]] = None,
+    boundary: Optional[Sequence[str]] = None,
+    molecules: Optional[Sequence[Tuple[str, int]]] = None,
+    molecule_file: Optional[str] = None,
+    composition: Optional[str] = None,
+    natoms: Optional[int] = None,
+    auto_neutralize: Optional[str] = None,
+    templates: Optional[Sequence[Tuple[str, int]]] = None,
+    bonds: Optional[Sequence[Tuple[str, int]]] = None,
+    intermol: Optional[Sequence[int]] = None,
+    output: str = constants.DEFAULT_FILENAME,
+):
+    """Generate a structure in memory and return the populated handler.
+
+    Atom types come either from `masses` (with `counts` and `charges`) or from
+    a mol% `composition` such as "70SiO2-20Na2O-10CaO" sized to `natoms`.
+    `style` defaults to "charge" when charges or a composition are given and
+    "atomic" otherwise.
+    The atom array is available through `get_atom_data()` and the box through
+    `get_sim_region_sides()`. Invalid input raises StructgenError.
+    """
+    if (masses is None) == (composition is None):
+        raise StructgenError("Give either masses or a composition.")
+    masses = list() if masses is None else masses
+
+    if style is None:
+        style = "atomic" if charges is None and composition is None else "charge"
+    if style not in HANDLERS:
+        raise StructgenError(f"Unknown atom style: '{style}'. Choices: {', '.join(HANDLERS)}.")
+
+    counts = [constants.DEFAULT_ATOM_COUNT]*len(masses) if counts is None else counts
+    if len(counts) != len(masses):
+        raise StructgenError("Number of counts has to match the number of masses.")
+
+    atoms = [[repr(float(mass)), str(count)] for mass, count in zip(masses, counts)]
+
+    if charges is not None:
+        if style in ("atomic", "molecular"):
+            raise StructgenError("Charges can only be used with the charge and full atom styles.")
+        if len(charges) != len(masses):
+            raise StructgenError("Number of charges has to match the number of masses.")
+        for atom, charge in zip(atoms, charges):
+            atom.append(repr(float(charge)))
+
+    args = SimpleNamespace(
+        atom = atoms,
+        density = density,
+        buffer = buffer,
+        factor = factor,
+        seed = seed,
+        placement = placement,
+        min_dist = format_min_dist(min_dist),
+        sort = sort,
+        lx = lx,
+        ly = ly,
+        lz = lz,
+        aspect = aspect,
+        tilt = tilt,
+        boundary = boundary,
+        molecule = [[composition, str(count)] for composition, count in molecules or list()],
+        molecule_file = molecule_file,
+        composition = composition,
+        natoms = natoms,
+        auto_neutralize = auto_neutralize,
+        template = [[path, str(count)] for path, count in templates or list()],
+        bond = [[pair, str(count)] for pair, count in bonds or list()],
+        intermol = list(intermol or list()),
+        output = output,
+    )
+
+    return build(HANDLERS[style], args)
+
+
+def save(handler, filename: Optional[str] = None, format: str = constants.DEFAULT_FORMAT):
+    """Write a generated structure, by default to the handler's output name."""
+    if format not in writers.FORMATS:
+        raise StructgenError(f"Unknown output format: '{format}'. Choices: {', '.join(writers.FORMATS)}.")
+
+    filename = handler.get_outfile_name() if filename is None else filename
+
+    #Replace the target instead of rewriting it, so hardlinked copies such as cache entries stay intact
+    temporary = f"{filename}.{os.getpid()}.tmp"
+    try:
+        writers.FORMATS[format](handler, temporary)
+        os.replace(temporary, filename)
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+    return filename
+
+
+def report(
+    handler,
+    filename: Optional[str] = None,
+    cutoff: float = constants.REPORT_CUTOFF,
+    coordination_cutoff: Optional[float] = None,
+):
+    """Quality statistics of a generated structure, also written as JSON when a filename is given.
+
+    See quality.get_report for the contents.
+    """
+    if cutoff <= 0 or (coordination_cutoff is not None and coordination_cutoff <= 0):
+        raise StructgenError("Report cutoffs have to be positive.")
+
+    if filename is None:
+        return quality.get_report(handler, cutoff, coordination_cutoff)
+
+    return quality.save_report(handler, filename, cutoff, coordination_cutoff)
+
+
+def read(filename: str, style: Optional[str] = None):
+    """Read a LAMMPS data file into a structure that save, report and the operations below accept.
+
+    `style` is only needed when the Atoms section does not name it.
+    """
+    return readers.read_lammps(filename, style)
+
+
+def replicate(structure, counts: Sequence[int]):
+    """Tile a structure counts[0] x counts[1] x counts[2] times."""
+    return operations.replicate(structure, counts)
+
+
+def merge(structure, other, offset: Optional[Sequence[float]] = None, min_dist: MinDist = None):
+    """Add the atoms of other, removing atoms of structure that come closer than min_dist."""
+    return operations.merge(structure, other, offset, format_min_dist(min_dist))
+
+
+def insert(
+    structure,
+    masses: Sequence[float],
+    counts: Sequence[int],
+    charges: Optional[Sequence[float]] = None,
+    *,
+    min_dist: MinDist = None,
+    seed: Optional[int] = None,
+):
+    """Add new atom types at random positions that keep min_dist from the atoms already present."""
+    return operations.insert(structure, masses, counts, charges, format_min_dist(min_dist), seed)
@@ -0,0 +1,191 @@
+import os
+import json
+import shutil
+import hashlib
+import tempfile
+import warnings
+
+import numpy as np
+
+from structgen import constants
+
+#Options that decide where results go and how a run is reported, not what is generated
+IGNORED_ARGS = ["output", "scratch_dir", "replicas", "jobs", "timings", "profile", "cache", "cache_dir", "cache_size"]
+REPORT_ARGS = ["report", "report_cutoff", "coordination_cutoff"]
+
+STRUCTURE_FILE = "structure"
+REPORT_FILE = "report.json"
+METADATA_FILE = "metadata.json"
+
+
+def get_cache_dir():
+    return os.path.join(os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "structgen")
+
+
+def hash_file(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(2**20), b""):
+            digest.update(block)
+
+    return digest.hexdigest()
+
+
+def normalize(value):
+    """A JSON-ready form of an input that is equal for inputs generating the same structure.
+
+    Numeric strings become numbers, so -a 28.0850 and -a 28.085 agree, and
+    spawned seeds are described by their entropy and spawn key.
+    """
+    if isinstance(value, np.random.SeedSequence):
+        return {"entropy": value.entropy, "spawn_key": list(value.spawn_key)}
+    if isinstance(value, dict):
+        return {str(key): normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if isinstance(value, str):
+        for convert in (int, float):
+            try:
+                return convert(value)
+            except ValueError:
+                pass
+    if isinstance(value, np.generic):
+        return value.item()
+
+    return value
+
+
+def get_cache_key(inputs):
+    """Hash of the normalized inputs, or None when no seed makes the output reproducible.
+
+    Input files are keyed by their content rather than their path, and the
+    structgen version is part of the key so an update never serves a
+    structure the new code would not generate.
+    """
+    if inputs.get("seed") is None:
+        warnings.warn("The cache needs a seed to tell structures apart, generating without it.")
+        return None
+
+    from structgen import get_version
+
+    inputs = dict(inputs)
+    if inputs.get("molecule_file"):
+        inputs["molecule_file"] = hash_file(inputs["molecule_file"])
+    if inputs.get("template"):
+        inputs["template"] = [[hash_file(row[0])] + list(row[1:]) for row in inputs["template"]]
+    if not inputs.get("report"):
+        for attr in REPORT_ARGS:
+            inputs.pop(attr, None)
+
+    text = json.dumps({"version": get_version(), "inputs": normalize(inputs)}, sort_keys = True)
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+def get_cli_inputs(args):
+    return {attr: value for attr, value in vars(args).items() if attr not in IGNORED_ARGS}
+
+
+def link_or_copy(source, target):
+    #Hardlinks to read-only entries cost no space or time, copies cover other file systems
+    if os.path.lexists(target):
+        os.remove(target)
+    try:
+        os.link(source, target)
+    except OSError:
+        shutil.copyfile(source, target)
+
+
+def fetch(cache_dir, key, filename, report_filename = None):
+    """Put the cached structure (and report) of key at filename.
+
+    Returns the metadata stored with the entry, or None when the cache does
+    not have it or its files no longer match their stored hashes.
+    """
+    entry = os.path.join(cache_dir, key)
+    files = [(STRUCTURE_FILE, filename)] + ([(REPORT_FILE, report_filename)] if report_filename else list())
+
+    try:
+        with open(os.path.join(entry, METADATA_FILE)) as file:
+            stored = json.load(file)
+
+        #Read-only entries still change under a root user writing through a hardlinked output
+        if any(hash_file(os.path.join(entry, name)) != stored["hashes"].get(name) for name, _ in files):
+            shutil.rmtree(entry, ignore_errors = True)
+            return None
+
+        for name, target in files:
+            link_or_copy(os.path.join(entry, name), target)
+    except (OSError, ValueError, KeyError):
+        #Not cached, or evicted by another run in the meantime
+        return None
+
+    #The modification time of an entry marks its last use for the LRU eviction
+    os.utime(entry)
+    return stored["metadata"]
+
+
+def get_entry_size(entry):
+    try:
+        return sum(os.path.getsize(os.path.join(entry, name)) for name in os.listdir(entry))
+    except OSError:
+        return 0
+
+
+def evict(cache_dir, max_bytes, keep = None):
+    """Remove the least recently used entries until the cache holds at most max_bytes."""
+    entries = list()
+    total = 0
+    for key in os.listdir(cache_dir):
+        entry = os.path.join(cache_dir, key)
+        if key.startswith(".") or not os.path.isdir(entry):
+            continue
+
+        size = get_entry_size(entry)
+        total += size
+        if key != keep:
+            try:
+                entries.append((os.path.getmtime(entry), size, entry))
+            except OSError:
+                total -= size
+
+    for _, size, entry in sorted(entries):
+        if total <= max_bytes:
+            break
+        shutil.rmtree(entry, ignore_errors = True)
+        total -= size
+
+
+def store(cache_dir, key, filename, report_filename = None, metadata = None, max_bytes = constants.DEFAULT_CACHE_SIZE_MB*2**20):
+    """Add a generated structure (and report) with its metadata under key, then evict down to max_bytes.
+
+    Files are copied and made read-only, so the entry shares no inode with
+    the output it came from and hardlinks to it cannot be edited in place.
+    The entry is assembled in a temporary directory and renamed into place,
+    so concurrent runs never see half-written entries. Files larger than the
+    whole cache are not stored.
+    """
+    files = [(STRUCTURE_FILE, filename)] + ([(REPORT_FILE, report_filename)] if report_filename else list())
+    if sum(os.path.getsize(source) for _, source in files) > max_bytes:
+        return False
+
+    os.makedirs(cache_dir, exist_ok = True)
+    entry = os.path.join(cache_dir, key)
+    staging = tempfile.mkdtemp(prefix = f".{key}.", dir = cache_dir)
+    try:
+        hashes = dict()
+        for name, source in files:
+            target = os.path.join(staging, name)
+            shutil.copyfile(source, target)
+            os.chmod(target, 0o444)
+            hashes[name] = hash_file(target)
+        with open(os.path.join(staging, METADATA_FILE), "w") as file:
+            json.dump({"hashes": hashes, "metadata": metadata or dict()}, file)
+        if os.path.isdir(entry):
+            shutil.rmtree(entry, ignore_errors = True)
+        os.rename(staging, entry)
+    except OSError:
+        #Another run stored the same key first
+        shutil.rmtree(staging, ignore_errors = True)
+
+    evict(cache_dir, max_bytes, keep = key)
+    return True
@@ -1,13 +1,332 @@
 import sys
-import numpy as np
-import random
+import os
+import copy
 import argparse
+import warnings
 
-#from .handlers import CHARGE, ATOMIC, FULL, MOLECULAR
-from .handlers import CHARGE, ATOMIC
 from . import constants
+from .errors import StructgenError
 from . import utils
 
+def add_output_arguments(parser):
+    parser.add_argument(
+        "--format",
+        choices = constants.OUTPUT_FORMATS,
+        default = constants.DEFAULT_FORMAT,
+        metavar = "",
+        help = (
+            "Output file format (default: lammps).\n"
+            f"Choices: {', '.join(constants.OUTPUT_FORMATS)}"
+        ),
+    )
+
+
+def add_placement_arguments(parser):
+    parser.add_argument(
+        "--placement",
+        choices = constants.PLACEMENT_STRATEGIES,
+        default = constants.DEFAULT_PLACEMENT,
+        metavar = "",
+        help = (
+            "Atom placement strategy (default: lattice).\n"
+            "lattice: random occupation of a regular grid.\n"
+            "random: continuous random positions honoring --min-dist."
+        ),
+    )
+
+    parser.add_argument(
+        "--min-dist",
+        action = "append",
+        metavar = "",
+        help = (
+            "Minimum separation in Angstrom used by random placement.\n"
+            "Provide <type>-<type>:<distance> for a pair or <distance> for all pairs.\n"
+            "Repeat for multiple pairs: --min-dist 1.2 --min-dist 1-2:1.6"
+        ),
+    )
+
+
+def add_molecule_arguments(parser):
+    parser.add_argument(
+        "-m", "--molecule",
+        metavar = "",
+        nargs = "+",
+        action = "append",
+        help = (
+            "Provide <composition> [<count>] for a molecule, composition as type(atoms)-type(atoms).\n"
+            "Defaults: count=1.\n"
+            "Repeat for multiple molecules: -m 1(2)-2(5) 10 -m 2(10)-3(1)-1(4)"
+        ),
+    )
+
+    parser.add_argument(
+        "--molecule-file",
+        metavar = "",
+        help = (
+            "JSON, YAML or TOML file with a 'molecules' list of entries holding\n"
+            "'composition' (string as for --molecule or a type->count mapping) and 'count'."
+        ),
+    )
+
+    parser.add_argument(
+        "--template",
+        metavar = "",
+        nargs = "+",
+        action = "append",
+        help = (
+            "Provide <file> [<count>] to insert randomly rotated rigid copies of a molecule.\n"
+            "The file is an XYZ file with atom type numbers in the first column or a LAMMPS\n"
+            "molecule file, whose Bonds section is written for every copy. Defaults: count=1."
+        ),
+    )
+
+
+def add_bond_arguments(parser, *bond_flags):
+    parser.add_argument(
+        *bond_flags,
+        dest = "bond",
+        metavar = "",
+        nargs = "+",
+        action = "append",
+        help = (
+            "Provide <type pair> [<count>] specifying a number of bonds of a particular type.\n"
+            "Types are given to atoms according to the order specified (starting at 1)\n"
+            "Defaults: count=1.\n"
+            "Repeat for multiple bond types: -b 1-2 10 -b 3-4"
+        ),
+    )
+
+    parser.add_argument(
+        "--intermol",
+        type = int,
+        nargs = "+",
+        metavar = "",
+        help = (
+            "If specified this argument determines the number of bonds of each type that will be assigned to the intermolecular pairs. "
+            "The number of values provided should be less than or equal to the number of bonds requested. "
+            "When omitted this is NOT the default for all bond types meaning that structgen will attempt to assign all bonds to intramolecular pairs."
+        ),
+    )
+
+
+def add_box_arguments(parser):
+    for axis in ("x", "y", "z"):
+        parser.add_argument(
+            f"--l{axis}",
+            type = float,
+            metavar = "",
+            help = f"Fix the box length along {axis} in Angstrom. Free sides are solved from the density.",
+        )
+
+    parser.add_argument(
+        "--aspect",
+        type = float,
+        nargs = 3,
+        metavar = "",
+        help = (
+            "Ratios X Y Z between the box sides that are solved from the density (default: 1 1 1).\n"
+            "Example for a slab elongated along z: --aspect 1 1 3"
+        ),
+    )
+
+    parser.add_argument(
+        "--tilt",
+        type = float,
+        nargs = 3,
+        metavar = "",
+        help = (
+            "Triclinic tilt factors XY XZ YZ as fractions of the box length along x (xy, xz) and y (yz).\n"
+            "Each has to be within [-0.5, 0.5]."
+        ),
+    )
+
+    parser.add_argument(
+        "--boundary",
+        nargs = 3,
+        choices = constants.BOUNDARY_MODES,
+        default = constants.DEFAULT_BOUNDARY,
+        metavar = "",
+        help = (
+            "LAMMPS boundary style X Y Z, each p (periodic), f (fixed) or s (shrink-wrapped) (default: p p p).\n"
+            "Periodic axes fill the box evenly across the boundary, the others keep the --buffer from both walls.\n"
+            "The styles are noted in the data file header for the boundary command of the input script."
+        ),
+    )
+
+
+def add_composition_arguments(parser, atom_group):
+    atom_group.add_argument(
+        "--composition",
+        metavar = "",
+        help = (
+            "Glass composition in mol%% used instead of -a, such as 70SiO2-20Na2O-10CaO.\n"
+            "Masses come from a built-in element table and charges are 0.6 times the oxidation state."
+        ),
+    )
+
+    parser.add_argument(
+        "-n", "--natoms",
+        type = int,
+        metavar = "",
+        help = "Target number of atoms for --composition, matched as closely as whole formula units allow.",
+    )
+
+
+def add_charge_arguments(parser):
+    parser.add_argument(
+        "--auto-neutralize",
+        metavar = "",
+        help = (
+            "Make the system neutral when the charges do not cancel:\n"
+            "'counts' changes the atom counts of up to two types by as few atoms as possible,\n"
+            "'charge:<type>' sets the charge of one type to cancel all others."
+        ),
+    )
+
+
+def add_memory_arguments(parser):
+    parser.add_argument(
+        "--out-of-core",
+        action = "store_true",
+        help = (
+            "Keep atoms in a disk-backed array with int32 ids/types and float32 values and\n"
+            "generate them one slab of --chunk-size sites at a time (lattice placement only)."
+        ),
+    )
+
+    parser.add_argument(
+        "--chunk-size",
+        type = int,
+        default = constants.DEFAULT_CHUNK_SIZE,
+        metavar = "",
+        help = "Rows generated and written at a time, bounding peak memory (default: 100000).",
+    )
+
+    parser.add_argument(
+        "--scratch-dir",
+        metavar = "",
+        help = "Directory for the temporary out-of-core array (default: next to the output file).",
+    )
+
+
+def add_report_arguments(parser):
+    parser.add_argument(
+        "--report",
+        action = "store_true",
+        help = (
+            "Write a JSON quality report next to the output (<output>.report.json) with minimum\n"
+            "distances and partial RDFs of every type pair, coordination histograms, nearest\n"
+            "neighbor distances and the spread of the local density."
+        ),
+    )
+
+    parser.add_argument(
+        "--report-cutoff",
+        type = float,
+        default = constants.REPORT_CUTOFF,
+        metavar = "",
+        help = "Range of the partial RDFs in Angstrom, at most half the box width (default: 5.0).",
+    )
+
+    parser.add_argument(
+        "--coordination-cutoff",
+        type = float,
+        metavar = "",
+        help = "Neighbors closer than this count towards the coordination (default: mean atomic spacing).",
+    )
+
+
+def add_timing_arguments(parser):
+    parser.add_argument(
+        "--timings",
+        action = "store_true",
+        help = (
+            "Print wall time, share, atoms/s and peak memory of every phase (setup, placement,\n"
+            "format, write, report) to stderr and write them as JSON to <output>.timings.json."
+        ),
+    )
+
+    parser.add_argument(
+        "--profile",
+        metavar = "",
+        help = (
+            "Run under cProfile and dump the statistics to this file (python -m pstats <file>).\n"
+            "Worker processes started by --jobs are not profiled."
+        ),
+    )
+
+
+def add_cache_arguments(parser):
+    parser.add_argument(
+        "--cache",
+        action = "store_true",
+        help = (
+            "Look structures up in an on-disk cache keyed by a hash of all inputs including the seed,\n"
+            "and link or copy a stored file instead of generating it again. Needs --seed."
+        ),
+    )
+
+    parser.add_argument(
+        "--cache-dir",
+        metavar = "",
+        help = "Directory of the cache (default: $XDG_CACHE_HOME/structgen or ~/.cache/structgen).",
+    )
+
+    parser.add_argument(
+        "--cache-size",
+        type = float,
+        default = constants.DEFAULT_CACHE_SIZE_MB,
+        metavar = "",
+        help = "Size of the cache in MB, least recently used structures are evicted beyond it (default: 1024).",
+    )
+
+
+def add_sort_arguments(parser):
+    parser.add_argument(
+        "--sort",
+        choices = constants.SORT_ORDERS,
+        default = constants.DEFAULT_SORT,
+        metavar = "",
+        help = (
+            "Order of the atom ids (default: type).\n"
+            "type: ids in blocks of atom types.\n"
+            "morton, hilbert: ids along a space-filling curve, so atoms close in id are close in space.\n"
+            "Types and charges stay with their atoms."
+        ),
+    )
+
+
+def add_run_arguments(parser):
+    parser.add_argument(
+        "-s", "--seed",
+        type = int,
+        metavar = "",
+        help = (
+            "Seed for the random number generator (default: fresh entropy).\n"
+            "The same seed reproduces the same structure, replica seeds are spawned from it."
+        ),
+    )
+
+    parser.add_argument(
+        "--replicas",
+        type = int,
+        default = constants.DEFAULT_REPLICAS,
+        metavar = "",
+        help = (
+            "Number of independent structures to generate (default: 1).\n"
+            "Each replica gets its own seed and an output file numbered after --output."
+        ),
+    )
+
+    parser.add_argument(
+        "-j", "--jobs",
+        type = int,
+        default = constants.DEFAULT_JOBS,
+        metavar = "",
+        help = "Number of worker processes used for replicas (default: 1).",
+    )
+
+
 def parse_args():
     parser = utils.ErrorHandlingParser(
         prog="structgen",
@@ -22,12 +341,13 @@ def parse_args():
 
     atomic = subparsers.add_parser("atomic", help = "Argument parser for generating initial glass structures in lammps format compliant with atom_style ATOMIC.", formatter_class = utils.NoMetavarHelpFormatter)
 
-    atomic.add_argument(
+    atomic_atoms = atomic.add_mutually_exclusive_group(required = True)
+
+    atomic_atoms.add_argument(
         "-a", "--atom",
         metavar = "",
         nargs = "+",
         action = "append",
-        required = True,
         help = (
             "Provide <mass> [<count>] for an atom type.\n"
             "Defaults: count=1\n"
@@ -48,7 +368,7 @@ def parse_args():
         type=float,
         default = constants.DEFAULT_BUFFER_PERCENT,
         metavar = "",
-        help = "Spacing between simulation region walls in %% of box size (default: 5).",
+        help = "Spacing between simulation region walls in %% of box size, kept on non-periodic axes only (default: 5).",
     )
 
     atomic.add_argument(
@@ -66,16 +386,27 @@ def parse_args():
         help = "Name of the resulting structure file (default: initial.structure).",
     )
 
-    atomic.set_defaults(handler_class = ATOMIC)
+    add_composition_arguments(atomic, atomic_atoms)
+    add_box_arguments(atomic)
+    add_placement_arguments(atomic)
+    add_output_arguments(atomic)
+    add_report_arguments(atomic)
+    add_timing_arguments(atomic)
+    add_cache_arguments(atomic)
+    add_sort_arguments(atomic)
+    add_memory_arguments(atomic)
+    add_run_arguments(atomic)
+
 
     charge = subparsers.add_parser("charge", help = "Argument parser for generating initial glass structures in lammps format compliant with atom_style CHARGE.", formatter_class = utils.NoMetavarHelpFormatter)
 
-    charge.add_argument(
+    charge_atoms = charge.add_mutually_exclusive_group(required = True)
+
+    charge_atoms.add_argument(
         "-a", "--atom",
         metavar = "",
         nargs = "+",
         action = "append",
-        required = True,
         help = (
             "Provide <mass> [<count> <charge>] for an atom type.\n"
             "Defaults: count=1, charge=0.0.\n"
@@ -97,7 +428,7 @@ def parse_args():
         type=float,
         default = constants.DEFAULT_BUFFER_PERCENT,
         metavar = "",
-        help = "Spacing between simulation region walls in %% of box size (default: 5).",
+        help = "Spacing between simulation region walls in %% of box size, kept on non-periodic axes only (default: 5).",
     )
 
     charge.add_argument(
@@ -115,11 +446,21 @@ def parse_args():
         help = "Name of the resulting structure file (default: initial.structure).",
     )
 
-    charge.set_defaults(handler_class = CHARGE)
+    add_composition_arguments(charge, charge_atoms)
+    add_charge_arguments(charge)
+    add_box_arguments(charge)
+    add_placement_arguments(charge)
+    add_output_arguments(charge)
+    add_report_arguments(charge)
+    add_timing_arguments(charge)
+    add_cache_arguments(charge)
+    add_sort_arguments(charge)
+    add_memory_arguments(charge)
+    add_run_arguments(charge)
+
 
 
-    """
-    full = subparsers.add_parser("full", help = "Argument parser for generating initial glass structures in lammps format compliant with atom_style FULL.")
+    full = subparsers.add_parser("full", help = "Argument parser for generating initial glass structures in lammps format compliant with atom_style FULL.", formatter_class = utils.NoMetavarHelpFormatter)
 
     full.add_argument(
         "-a", "--atom",
@@ -147,7 +488,7 @@ def parse_args():
         type=float,
         default = constants.DEFAULT_BUFFER_PERCENT,
         metavar = "",
-        help = "Spacing between simulation region walls in %% of box size (default: 5).",
+        help = "Spacing between simulation region walls in %% of box size, kept on non-periodic axes only (default: 5).",
     )
 
     full.add_argument(
@@ -165,9 +506,19 @@ def parse_args():
         help = "Name of the resulting structure file (default: initial.structure).",
     )
 
-    full.set_defaults(handler_class = FULL)
+    add_bond_arguments(full, "--bond")
+    add_molecule_arguments(full)
+    add_charge_arguments(full)
+    add_box_arguments(full)
+    add_placement_arguments(full)
+    add_output_arguments(full)
+    add_report_arguments(full)
+    add_timing_arguments(full)
+    add_cache_arguments(full)
+    add_run_arguments(full)
 
-    molecular = subparsers.add_parser("molecular", help = "Argument parser for generating initial glass structures in lammps format compliant with atom_style MOLECULAR.")
+
+    molecular = subparsers.add_parser("molecular", help = "Argument parser for generating initial glass structures in lammps format compliant with atom_style MOLECULAR.", formatter_class = utils.NoMetavarHelpFormatter)
 
     molecular.add_argument(
         "-a", "--atom",
@@ -182,19 +533,6 @@ def parse_args():
         ),
     )
 
-    molecular.add_argument(
-        "-b", "--bond",
-        metavar = "",
-        nargs = "+",
-        action = "append",
-        help = (
-            "Provide <type pair> [<count>] specifying a number of bonds of a particular type.\n"
-            "Types are given to atoms according to the order specified (starting at 1)\n"
-            "Defaults: count=1.\n"
-            "Repeat for multiple bond types: -b 1-2 10 -b 3-4"
-        ),
-    )
-
     molecular.add_argument(
         "-d", "--density",
         type = float,
@@ -208,7 +546,7 @@ def parse_args():
         type=float,
         default = constants.DEFAULT_BUFFER_PERCENT,
         metavar = "",
-        help = "Spacing between simulation region walls in %% of box size (default: 5).",
+        help = "Spacing between simulation region walls in %% of box size, kept on non-periodic axes only (default: 5).",
     )
 
     molecular.add_argument(
@@ -220,105 +558,274 @@ def parse_args():
     )
 
     molecular.add_argument(
-        "--intermol",
+        "-o", "--output",
+        default = constants.DEFAULT_FILENAME,
+        metavar = "",
+        help = "Name of the resulting structure file (default: initial.structure).",
+    )
+
+    add_bond_arguments(molecular, "-b", "--bond")
+    add_molecule_arguments(molecular)
+    add_box_arguments(molecular)
+    add_placement_arguments(molecular)
+    add_output_arguments(molecular)
+    add_report_arguments(molecular)
+    add_timing_arguments(molecular)
+    add_cache_arguments(molecular)
+    add_run_arguments(molecular)
+
+
+
+    edit = subparsers.add_parser("edit", help = "Replicate, merge or extend an existing LAMMPS data file.", formatter_class = utils.NoMetavarHelpFormatter)
+
+    edit.add_argument(
+        "input",
+        help = (
+            "LAMMPS data file to start from, plain or gzip-compressed.\n"
+            "Operations run in the order replicate, merge, insert."
+        ),
+    )
+
+    edit.add_argument(
+        "--style",
+        choices = list(constants.ATOM_STYLE_ATTRS),
+        metavar = "",
+        help = "Atom style of data files whose Atoms section does not name it.",
+    )
+
+    edit.add_argument(
+        "--replicate",
         type = int,
+        nargs = 3,
+        metavar = "",
+        help = "Tile the structure NX NY NZ times along its cell vectors.",
+    )
+
+    edit.add_argument(
+        "--merge",
+        metavar = "",
+        help = (
+            "Data file of the same atom style whose atoms are added, with types, molecules and bond types\n"
+            "numbered after the existing ones. Existing atoms closer than --min-dist are removed."
+        ),
+    )
+
+    edit.add_argument(
+        "--offset",
+        type = float,
+        nargs = 3,
+        metavar = "",
+        help = "Shift X Y Z of the merged structure (default: both box centers coincide).",
+    )
+
+    edit.add_argument(
+        "-a", "--atom",
+        metavar = "",
         nargs = "+",
+        action = "append",
+        help = (
+            "Provide <mass> [<count> <charge>] for a new atom type inserted at random positions.\n"
+            "Defaults: count=1, charge=0.0.\n"
+            "Repeat for multiple atom types: -a 1.008 100 0.4 -a 16.00 50 -0.8"
+        ),
+    )
+
+    edit.add_argument(
+        "--min-dist",
+        action = "append",
         metavar = "",
         help = (
-            "If specified this argument determines the number of bonds of each type that will be assigned to the intermolecular pairs. "
-            "The number of values provided should be less than or equal to the number of bonds requested. "
-            "When omitted this is NOT the default for all bond types meaning that structgen will attempt to assign all bonds to intramolecular pairs."
+            "Minimum separation in Angstrom between merged or inserted atoms and the existing ones,\n"
+            "given as for the other styles. Pairs without one keep 1.0 apart."
         ),
     )
 
-    molecular.add_argument(
+    edit.add_argument(
+        "-s", "--seed",
+        type = int,
+        metavar = "",
+        help = "Seed for the positions of inserted atoms (default: fresh entropy).",
+    )
+
+    edit.add_argument(
         "-o", "--output",
         default = constants.DEFAULT_FILENAME,
         metavar = "",
         help = "Name of the resulting structure file (default: initial.structure).",
     )
 
-    molecular.set_defaults(handler_class = MOLECULAR)
-    """
+    add_output_arguments(edit)
+    add_report_arguments(edit)
+    add_timing_arguments(edit)
+
+
+
+    sweep = subparsers.add_parser("sweep", help = "Generate one structure per row of a CSV or JSON table of compositions and densities.", formatter_class = utils.NoMetavarHelpFormatter)
+
+    sweep.add_argument(
+        "table",
+        help = (
+            "CSV file with a header line or JSON list of objects, one structure per row.\n"
+            "Columns: atoms (\"mass count charge; ...\") or composition with natoms, density, and\n"
+            "optionally style, buffer, factor, seed, placement, min_dist, sort, lx, ly, lz, aspect, tilt, boundary,\n"
+            "auto_neutralize, output and format."
+        ),
+    )
+
+    sweep.add_argument(
+        "-o", "--output",
+        default = constants.DEFAULT_FILENAME,
+        metavar = "",
+        help = "Name numbered after the row for rows without an output column (default: initial.structure).",
+    )
+
+    sweep.add_argument(
+        "--output-dir",
+        default = ".",
+        metavar = "",
+        help = "Directory receiving the structures and the manifest (default: current directory).",
+    )
+
+    sweep.add_argument(
+        "--manifest",
+        default = constants.DEFAULT_MANIFEST,
+        metavar = "",
+        help = "Name of the JSON manifest listing every generated structure (default: manifest.json).",
+    )
+
+    sweep.add_argument(
+        "-s", "--seed",
+        type = int,
+        metavar = "",
+        help = "Root seed, rows without a seed column get independent seeds spawned from it.",
+    )
+
+    sweep.add_argument(
+        "-j", "--jobs",
+        type = int,
+        default = constants.DEFAULT_JOBS,
+        metavar = "",
+        help = "Number of worker processes (default: 1).",
+    )
+
+    add_output_arguments(sweep)
+    add_cache_arguments(sweep)
 
     return parser.parse_args()
 
-def gen_header(handler):
-    handler_style = handler.get_atom_style()
 
-    header = str()
-    header += "#Generated by structgen utility git@github.com:superde1fin/structgen.git\n\n"
+def get_replica_filename(filename, index, num_replicas):
+    root, ext = os.path.splitext(filename)
+    width = len(str(num_replicas))
+    return f"{root}_{index + 1:0{width}d}{ext}"
 
-    header += f"{handler.get_natoms()} atoms\n"
-    if handler_style in constants.NEED_BONDS:
-        header += f"{handler.get_nbonds()} bonds\n"
 
-    header += f"{handler.get_natom_types()} atom types\n"
-    if handler_style in constants.NEED_BONDS:
-        header += f"{handler.get_nbond_types()} bond types\n"
+def generate_structure(args):
+    #Handlers pull in NumPy, so they are only imported once a structure is built
+    from . import api
+    from . import timing
+    from . import quality
 
-    sides = handler.get_sim_region_sides()
-    header += f"\n0 {sides[0]} xlo xhi"
-    header += f"\n0 {sides[1]} ylo yhi"
-    header += f"\n0 {sides[2]} zlo zhi"
+    #Phases are always timed, which costs microseconds, and only reported on request
+    timings = timing.Timings()
+    report_filename = quality.get_report_filename(args.output) if getattr(args, "report", False) else None
 
-    header += "\n\n"
-    header += "Masses\n\n"
+    cache_key = None
+    if getattr(args, "cache", False):
+        from . import cache
+        cache_dir = args.cache_dir or cache.get_cache_dir()
+        with timings.phase("cache"):
+            cache_key = cache.get_cache_key(cache.get_cli_inputs(args))
+            metadata = cache.fetch(cache_dir, cache_key, args.output, report_filename) if cache_key else None
 
-    for i, mass in enumerate(handler.get_masses()):
-        header += f"{i + 1} {mass}\n"
+        if metadata is not None:
+            timings.set_natoms(metadata.get("natoms"))
+            if getattr(args, "timings", False):
+                timing.save_timings(timings, timing.get_timings_filename(args.output))
+            return args.output
 
-    return header
+    with timings.phase("setup"):
+        handler = api.HANDLERS[args.command](args)
+    handler.TIMINGS = timings
+    timings.set_natoms(handler.get_natoms())
 
+    with timings.phase("placement"):
+        handler.get_atom_data()
+    with timings.phase("write"):
+        filename = api.save(handler, args.output, args.format)
 
-def gen_atoms(handler):
-    atoms = str()
-    atoms += "\n\n"
-    column_headers = ' '.join(handler.get_atom_attrs())
-    atoms += f"#Attributes: {column_headers}\n"
-    atoms += f"Atoms # {handler.get_atom_style()}\n\n"
+    if report_filename:
+        with timings.phase("report"):
+            api.report(handler, report_filename, args.report_cutoff, args.coordination_cutoff)
 
-    atom_data = handler.get_atom_data()
+    if cache_key:
+        with timings.phase("cache"):
+            cache.store(cache_dir, cache_key, filename, report_filename, {"natoms": handler.get_natoms()}, args.cache_size*2**20)
 
-    #Add atom lines and convert necesary elements to integers
-    indices_to_int = handler.get_int_atom_indices()
+    if getattr(args, "timings", False):
+        timing.save_timings(timings, timing.get_timings_filename(filename))
 
-    atoms += "\n".join(" ".join(str(int(x)) if i in indices_to_int else str(x) for i, x in enumerate(row)) for row in atom_data)
+    return filename
 
-    return atoms
 
-def gen_bonds(handler):
-    bonds = str()
-    bonds += "\n\n"
-    column_headers = " ".join(handler.get_bond_attrs())
-    bonds += f"Bonds # {column_headers}"
+def generate_replicas(args):
+    if args.replicas < 1:
+        raise StructgenError("Number of replicas must be a positive integer.")
+    if args.jobs < 1:
+        raise StructgenError("Number of jobs must be a positive integer.")
 
-    bond_data = handler.get_bond_data()
+    import numpy as np
+    from concurrent.futures import ProcessPoolExecutor
 
-    bonds += "\n".join(" ".join(str(x) for x in row) for row in bond_data)
+    #Child seeds are derived from one root so the ensemble members are independent streams
+    seeds = np.random.SeedSequence(args.seed).spawn(args.replicas)
 
-    return bonds
+    #Children of fresh entropy never repeat, so only a given root seed makes them worth caching
+    if getattr(args, "cache", False) and args.seed is None:
+        warnings.warn("The cache needs a seed to tell structures apart, generating without it.")
+        args = copy.copy(args)
+        args.cache = False
 
+    replica_args = list()
+    for i, seed in enumerate(seeds):
+        rep_args = copy.copy(args)
+        rep_args.seed = seed
+        rep_args.output = get_replica_filename(args.output, i, args.replicas)
+        replica_args.append(rep_args)
 
-def main():
-    args = parse_args()
+    if args.jobs == 1:
+        return [generate_structure(rep_args) for rep_args in replica_args]
+
+    with ProcessPoolExecutor(max_workers = min(args.jobs, args.replicas)) as pool:
+        return list(pool.map(generate_structure, replica_args))
 
-    handler = args.handler_class(args)
 
-    handler_style = handler.get_atom_style()
+def run_command(args):
+    if args.command == "sweep":
+        from .sweep import run_sweep
+        return run_sweep(args)
+    if args.command == "edit":
+        from .operations import run_edit
+        return run_edit(args)
+    if args.replicas == 1:
+        return generate_structure(args)
 
-    file_str = str()
+    return generate_replicas(args)
 
-    file_str += gen_header(handler)
-    file_str += gen_atoms(handler)
 
-    if handler_style in constants.NEED_BONDS:
-        file_str += gen_bonds(handler)
+def main():
+    args = parse_args()
+    warnings.formatwarning = utils.format_warning
 
-    with open(handler.get_outfile_name(), "w") as file:
-        file.write(file_str)
+    try:
+        if getattr(args, "profile", None):
+            from .timing import run_profiled
+            run_profiled(run_command, args, args.profile)
+        else:
+            run_command(args)
+    except StructgenError as err:
+        sys.exit(f"ERROR! {err}")
 
-        
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,109 @@
+import re
+
+import numpy as np
+
+from structgen import constants
+from structgen.elements import ELEMENTS
+from structgen.errors import StructgenError
+from structgen.placement import apportion
+
+COMPONENT_PATTERN = re.compile(r"^(\d+(?:\.\d*)?|\.\d+)([A-Z][A-Za-z0-9]*)$")
+FORMULA_PATTERN = re.compile(r"([A-Z][a-z]?)(\d*)")
+
+
+def parse_formula(formula):
+    """Parse a formula such as "Al2O3" into [symbol, count] pairs in order of appearance."""
+    if FORMULA_PATTERN.sub("", formula):
+        raise StructgenError(f"Incorrect chemical formula: '{formula}'.")
+
+    stoichiometry = dict()
+    for symbol, count_str in FORMULA_PATTERN.findall(formula):
+        if symbol not in ELEMENTS:
+            raise StructgenError(f"Unknown element '{symbol}' in '{formula}'.")
+        stoichiometry[symbol] = stoichiometry.get(symbol, 0) + int(count_str or 1)
+
+    return list(stoichiometry.items())
+
+
+def parse_composition(composition_str):
+    """Parse "70SiO2-20Na2O-10CaO" into (formula, mole fraction, stoichiometry) triples."""
+    components = list()
+    for component_str in re.sub(r"\s+", "", composition_str).split("-"):
+        match = COMPONENT_PATTERN.match(component_str)
+        if not match:
+            raise StructgenError(f"Composition components have to look like 70SiO2: '{component_str}'.")
+        components.append((match[2], float(match[1]), parse_formula(match[2])))
+
+    total = sum(amount for _, amount, _ in components)
+    if total <= 0:
+        raise StructgenError(f"Composition amounts have to add up to a positive number: '{composition_str}'.")
+
+    return [(formula, amount/total, stoichiometry) for formula, amount, stoichiometry in components]
+
+
+def get_oxidation_states(components):
+    """Oxidation state of every element, balancing single-cation formulas such as Fe2O3 against their anions."""
+    states = dict()
+    for formula, _, stoichiometry in components:
+        cations = [(symbol, count) for symbol, count in stoichiometry if ELEMENTS[symbol][1] > 0]
+        anion_charge = sum(ELEMENTS[symbol][1]*count for symbol, count in stoichiometry if ELEMENTS[symbol][1] <= 0)
+
+        for symbol, count in stoichiometry:
+            state = ELEMENTS[symbol][1]
+            if len(cations) == 1 and state > 0:
+                state = -anion_charge/count
+
+            if states.setdefault(symbol, state) != state:
+                raise StructgenError(f"Element {symbol} appears with oxidation states {states[symbol]:g} and {state:g} ({formula}).")
+
+    return states
+
+
+def solve_formula_counts(fractions, atoms_per_formula, natoms):
+    """Whole formula units closest to the mole fractions with a total atom count near natoms.
+
+    Totals of formula units around the ideal one are apportioned by largest
+    remainder, the one whose atom count is closest to natoms wins and ties go
+    to the smallest deviation from the mole fractions.
+    """
+    fractions = np.asarray(fractions)
+    atoms_per_formula = np.asarray(atoms_per_formula)
+    ideal = natoms/np.dot(fractions, atoms_per_formula)
+
+    best, best_key = None, None
+    for total in range(max(int(ideal) - 2, 1), int(np.ceil(ideal)) + 3):
+        units = apportion(fractions, total)
+        key = (abs(int(units @ atoms_per_formula) - natoms), np.abs(units/total - fractions).sum())
+        if best_key is None or key < best_key:
+            best, best_key = units, key
+
+    return best
+
+
+def get_atom_rows(composition_str, natoms):
+    """Per-element rows of [mass, count, charge] strings, as given with -a, plus the element symbols."""
+    if natoms is None or natoms < 1:
+        raise StructgenError("A composition needs a positive target number of atoms (--natoms).")
+
+    components = parse_composition(composition_str)
+    states = get_oxidation_states(components)
+
+    units = solve_formula_counts(
+        [fraction for _, fraction, _ in components],
+        [sum(count for _, count in stoichiometry) for _, _, stoichiometry in components],
+        natoms,
+    )
+
+    for (formula, _, _), formula_units in zip(components, units):
+        if formula_units == 0:
+            raise StructgenError(f"{natoms} atoms are too few to include any {formula}. Raise --natoms.")
+
+    counts = dict()
+    for (_, _, stoichiometry), formula_units in zip(components, units):
+        for symbol, count in stoichiometry:
+            counts[symbol] = counts.get(symbol, 0) + int(formula_units)*count
+
+    rows = [[repr(ELEMENTS[symbol][0]), str(count), repr(round(constants.PARTIAL_CHARGE_SCALE*states[symbol], 10))]
+            for symbol, count in counts.items()]
+
+    return rows, list(counts)
@@ -4,7 +4,67 @@ DEFAULT_ATOM_FACTOR = 1
 DEFAULT_BUFFER_PERCENT = 5
 
 DEFAULT_BOND_COUNT = 1
+MAX_BOND_LENGTH = 5.0 #Widest bond search in Angstrom, about three times a typical bond
+GENERATED_BOND_LENGTH = 1.5 #Grid spacing in Angstrom of the shapes generated for molecules without a template
+BOND_SEARCH_FACTOR = 1.25 #First bond search radius as a multiple of GENERATED_BOND_LENGTH
 
 DEFAULT_FILENAME = "initial.structure"
+DEFAULT_FORMAT = "lammps"
+OUTPUT_FORMATS = ["lammps", "lammps.gz", "lammps.zst", "npz", "hdf5", "extxyz"] #Keys of writers.FORMATS, listed here so the CLI need not import the writers
+
+DEFAULT_MANIFEST = "manifest.json"
+
+DEFAULT_REPLICAS = 1
+DEFAULT_JOBS = 1
 
 NEED_BONDS = ["full", "molecular"]
+
+#Atoms section columns of every style, as written by the handlers
+ATOM_STYLE_ATTRS = {
+    "atomic": ["id", "type", "x", "y", "z"],
+    "charge": ["id", "type", "q", "x", "y", "z"],
+    "molecular": ["atom-id", "molecule-id", "type", "x", "y", "z"],
+    "full": ["atom-id", "molecule-id", "type", "q", "x", "y", "z"],
+}
+
+DEFAULT_CHUNK_SIZE = 100000 #Rows formatted per write call
+
+INT_FORMAT = "%d"
+FLOAT_FORMAT = "%.16g"
+SPECIES_MASS_TOLERANCE = 0.05 #Largest mass difference in amu for naming an atom type after an element
+UNKNOWN_SPECIES = "X" #Species of atom types whose mass matches no element, read as a dummy atom by ASE
+
+COMPACT_FLOAT_FORMAT = "%.9g" #Enough digits to round-trip float32
+
+PLACEMENT_STRATEGIES = ["lattice", "random"]
+DEFAULT_PLACEMENT = "lattice"
+
+SORT_ORDERS = ["type", "morton", "hilbert"]
+DEFAULT_SORT = "type"
+
+BOUNDARY_MODES = ["p", "f", "s"] #LAMMPS boundary styles: periodic, fixed and shrink-wrapped
+DEFAULT_BOUNDARY = ["p", "p", "p"]
+
+MAX_LATTICE_ANISOTROPY = 1.15 #Largest ratio between lattice spacings along different axes
+
+LATTICE_PLANE_STREAM = 2**32 - 1 #Spawn key entry setting the per-plane lattice streams apart from spawned replica seeds
+
+RANDOM_BATCH_SIZE = 4096 #Candidates proposed per random insertion round
+MAX_STALLED_ROUNDS = 1000 #Rounds without a single accepted atom before giving up
+
+INSERT_MIN_DIST = 1.0 #Clearance between inserted or merged atoms and atoms already present when --min-dist leaves a pair unset
+TEMPLATE_MIN_DIST = 1.0 #Clearance between atoms of different molecules when --min-dist leaves a pair unset
+MAX_ROTATION_TRIES = 10 #Rotations tried at a lattice site before a molecule moves to a random center
+
+CHARGE_TOLERANCE = 1e-6 #Largest net charge in e still treated as neutral
+MAX_CHARGE_DENOMINATOR = 1000 #Charges are matched to fractions of e with at most this denominator
+
+PARTIAL_CHARGE_SCALE = 0.6 #Partial charges as a fraction of the oxidation state, as in the Pedone potential
+
+REPORT_SUFFIX = ".report.json" #Replaces the output extension for the quality report
+REPORT_CUTOFF = 5.0 #Range of the partial RDFs in Angstrom
+REPORT_RDF_BINS = 100
+
+TIMINGS_SUFFIX = ".timings.json" #Replaces the output extension for the --timings breakdown
+
+DEFAULT_CACHE_SIZE_MB = 1024 #Least recently used structures are evicted beyond this size
@@ -0,0 +1,71 @@
+from structgen import constants
+
+#Standard atomic weight in amu and the most common oxidation state in oxide and halide glasses
+ELEMENTS = {
+    "H": (1.008, 1),
+    "Li": (6.94, 1),
+    "Be": (9.0122, 2),
+    "B": (10.81, 3),
+    "C": (12.011, 4),
+    "N": (14.007, -3),
+    "O": (15.999, -2),
+    "F": (18.998, -1),
+    "Na": (22.990, 1),
+    "Mg": (24.305, 2),
+    "Al": (26.982, 3),
+    "Si": (28.085, 4),
+    "P": (30.974, 5),
+    "S": (32.06, -2),
+    "Cl": (35.45, -1),
+    "K": (39.098, 1),
+    "Ca": (40.078, 2),
+    "Sc": (44.956, 3),
+    "Ti": (47.867, 4),
+    "V": (50.942, 5),
+    "Cr": (51.996, 3),
+    "Mn": (54.938, 2),
+    "Fe": (55.845, 3),
+    "Co": (58.933, 2),
+    "Ni": (58.693, 2),
+    "Cu": (63.546, 2),
+    "Zn": (65.38, 2),
+    "Ga": (69.723, 3),
+    "Ge": (72.630, 4),
+    "As": (74.922, 5),
+    "Se": (78.971, -2),
+    "Br": (79.904, -1),
+    "Rb": (85.468, 1),
+    "Sr": (87.62, 2),
+    "Y": (88.906, 3),
+    "Zr": (91.224, 4),
+    "Nb": (92.906, 5),
+    "Mo": (95.95, 6),
+    "Ag": (107.87, 1),
+    "Cd": (112.41, 2),
+    "In": (114.82, 3),
+    "Sn": (118.71, 4),
+    "Sb": (121.76, 3),
+    "Te": (127.60, 4),
+    "I": (126.90, -1),
+    "Cs": (132.91, 1),
+    "Ba": (137.33, 2),
+    "La": (138.91, 3),
+    "Ce": (140.12, 3),
+    "Nd": (144.24, 3),
+    "Sm": (150.36, 3),
+    "Eu": (151.96, 3),
+    "Gd": (157.25, 3),
+    "Er": (167.26, 3),
+    "Yb": (173.05, 3),
+    "Hf": (178.49, 4),
+    "Ta": (180.95, 5),
+    "W": (183.84, 6),
+    "Pb": (207.2, 2),
+    "Bi": (208.98, 3),
+}
+
+
+def guess_symbol(mass):
+    #Element whose standard atomic weight matches the mass, None when none is close enough
+    symbol, (weight, _) = min(ELEMENTS.items(), key = lambda item: abs(item[1][0] - mass))
+    return symbol if abs(weight - mass) <= constants.SPECIES_MASS_TOLERANCE else None
@@ -0,0 +1,2 @@
+class StructgenError(ValueError):
+    """Raised for invalid structure specifications or unsatisfiable generation requests."""
@@ -1,7 +1,19 @@
-from .charge import CHARGE
-from .atomic import ATOMIC
-#from .full import FULL
-#from .molecular import MOLECULAR
+import importlib
 
-#__all__ = ["CHARGE", "ATOMIC", "FULL", "MOLECULAR"]
-__all__ = ["CHARGE", "ATOMIC"]
+#Handler modules import NumPy, so they are loaded on first access
+HANDLER_MODULES = {
+    "CHARGE": "charge",
+    "ATOMIC": "atomic",
+    "FULL": "full",
+    "MOLECULAR": "molecular",
+    "DATA": "data",
+}
+
+__all__ = ["CHARGE", "ATOMIC", "FULL", "MOLECULAR", "DATA"]
+
+
+def __getattr__(name):
+    if name in HANDLER_MODULES:
+        return getattr(importlib.import_module(f".{HANDLER_MODULES[name]}", __name__), name)
+
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
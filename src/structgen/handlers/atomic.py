@@ -1,8 +1,13 @@
-import sys
+import os
+import tempfile
+
 import numpy as np
-import random
 
+from structgen import composition
 from structgen import constants
+from structgen import neighbors
+from structgen import placement
+from structgen.errors import StructgenError
 
 class ATOMIC:
 
@@ -21,15 +26,16 @@ class ATOMIC:
         self.ATOM_DATA = None
 
         if args.factor < 1:
-            sys.exit("ERROR! Factor must be a positive integer.")
+            raise StructgenError("Factor must be a positive integer.")
 
         atom_args_limit = self.get_max_args()
+        self.ATOM_ROWS, self.ELEMENTS = self.get_atom_rows(args)
 
-        for atom_data in args.atom:
+        for atom_data in self.ATOM_ROWS:
             num_attrs = len(atom_data)
 
             if num_attrs > atom_args_limit:
-                sys.exit(f"ERROR! Too many per-atom arguments ({num_attrs}).")
+                raise StructgenError(f"Too many per-atom arguments ({num_attrs}).")
 
             self.NUM_TYPES += 1
 
@@ -42,7 +48,7 @@ class ATOMIC:
 
                 self.MASSES.append(mass_val)
             except ValueError:
-                sys.exit(f"ERROR! Non‑numeric or non-positive value for atom mass: '{mass_str}'.")
+                raise StructgenError(f"Non‑numeric or non-positive value for atom mass: '{mass_str}'.")
 
 
             if num_attrs >= 2:
@@ -51,7 +57,7 @@ class ATOMIC:
                 if count_str.isdigit():
                     add_atoms = args.factor*int(count_str)
                 else:
-                    sys.exit(f"ERROR! Non‑numeric value for atom count: '{count_str}'.")
+                    raise StructgenError(f"Non‑numeric value for atom count: '{count_str}'.")
 
             else:
                 add_atoms = constants.DEFAULT_ATOM_COUNT*args.factor
@@ -61,13 +67,105 @@ class ATOMIC:
             self.NATOMS += add_atoms
             self.TOTAL_MASS += (mass_val * add_atoms)
 
-        volume = self.TOTAL_MASS/(args.density * 0.6022136) #Conversion from g to amu
-        self.REGION_SIDE = volume**(1/3)
+        self.set_sim_region(args)
+
+        self.BOUNDARY = list(getattr(args, "boundary", None) or constants.DEFAULT_BOUNDARY)
+        if len(self.BOUNDARY) != 3 or any(mode not in constants.BOUNDARY_MODES for mode in self.BOUNDARY):
+            raise StructgenError(f"Boundary needs one of {', '.join(constants.BOUNDARY_MODES)} per axis: '{' '.join(self.BOUNDARY)}'.")
+
+        #Fraction of the box length kept empty at each wall, periodic axes have no walls
+        self.PERIODIC = np.array([mode == "p" for mode in self.BOUNDARY])
+        self.BUFFER = np.where(self.PERIODIC, 0.0, args.buffer/100)
+
+        self.PLACEMENT = getattr(args, "placement", constants.DEFAULT_PLACEMENT)
+        if self.PLACEMENT not in constants.PLACEMENT_STRATEGIES:
+            raise StructgenError(f"Unknown placement strategy: '{self.PLACEMENT}'.")
+
+        self.MIN_DIST = self.parse_min_dist(getattr(args, "min_dist", None) or list())
 
-        self.BUFFER = self.REGION_SIDE*args.buffer/100
+        self.SORT = getattr(args, "sort", None) or constants.DEFAULT_SORT
+        if self.SORT not in constants.SORT_ORDERS:
+            raise StructgenError(f"Unknown atom order: '{self.SORT}'.")
+
+        self.OUT_OF_CORE = getattr(args, "out_of_core", False)
+        self.CHUNK_SIZE = getattr(args, "chunk_size", None) or constants.DEFAULT_CHUNK_SIZE
+        self.SCRATCH_DIR = getattr(args, "scratch_dir", None)
+        if self.CHUNK_SIZE < 1:
+            raise StructgenError("Chunk size must be a positive integer.")
+        if self.OUT_OF_CORE and self.PLACEMENT != "lattice":
+            raise StructgenError("Out-of-core generation only supports lattice placement.")
+
+        #Accept a plain integer seed or a SeedSequence spawned by a parent run
+        seed = getattr(args, "seed", None)
+        self.SEED_SEQUENCE = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.RNG = np.random.default_rng(self.SEED_SEQUENCE)
 
         self.OUTFILE = args.output
 
+    def get_atom_rows(self, args):
+        #A composition is turned into the same per-type rows -a provides
+        composition_str = getattr(args, "composition", None)
+        if not composition_str:
+            return args.atom, None
+
+        rows, elements = composition.get_atom_rows(composition_str, getattr(args, "natoms", None))
+        return [row[:self.get_max_args()] for row in rows], elements
+
+    def set_sim_region(self, args):
+        if not args.density > 0:
+            raise StructgenError(f"Density must be positive: '{args.density}'.")
+        if self.NATOMS < 1:
+            raise StructgenError("No atoms to place, at least one atom count has to be positive.")
+
+        volume = self.TOTAL_MASS/(args.density * 0.6022136) #Conversion from g to amu
+
+        fixed_sides = [getattr(args, side, None) for side in ("lx", "ly", "lz")]
+        self.REGION_SIDES = self.solve_region_sides(volume, fixed_sides, getattr(args, "aspect", None))
+        self.TILTS = self.get_tilt_lengths(getattr(args, "tilt", None))
+
+    def set_counts(self, counts, args):
+        #Changing counts changes the total mass and hence the box
+        self.COUNTS = list(counts)
+        self.NATOMS = sum(self.COUNTS)
+        self.TOTAL_MASS = sum(mass*count for mass, count in zip(self.MASSES, self.COUNTS))
+        self.set_sim_region(args)
+
+    def solve_region_sides(self, volume, fixed_sides, aspect):
+        #Free sides follow the aspect ratio and absorb whatever volume the fixed ones leave
+        aspect = [1.0]*3 if aspect is None else aspect
+        if any(ratio <= 0 for ratio in aspect):
+            raise StructgenError("Box aspect ratios have to be positive.")
+
+        free_axes = [i for i, side in enumerate(fixed_sides) if side is None]
+        if not free_axes:
+            raise StructgenError("At most two box sides can be fixed, the remaining one is solved from the density.")
+
+        fixed_volume = 1.0
+        for side in fixed_sides:
+            if side is not None:
+                if side <= 0:
+                    raise StructgenError(f"Box sides have to be positive: '{side}'.")
+                fixed_volume *= side
+
+        free_ratios = np.prod([aspect[i] for i in free_axes])
+        scale = (volume/(fixed_volume*free_ratios))**(1/len(free_axes))
+
+        return [scale*aspect[i] if side is None else side for i, side in enumerate(fixed_sides)]
+
+    def get_tilt_lengths(self, tilt):
+        #Tilts are given as fractions of the box length along x (xy, xz) and y (yz)
+        if tilt is None:
+            return [0.0]*3
+
+        if any(abs(fraction) > 0.5 for fraction in tilt):
+            raise StructgenError("Tilt factors have to be within [-0.5, 0.5] of the box length.")
+
+        lx, ly, _ = self.REGION_SIDES
+        return [tilt[0]*lx, tilt[1]*lx, tilt[2]*ly]
+
+    def parse_min_dist(self, min_dist_specs):
+        return placement.parse_min_dist(min_dist_specs, self.NUM_TYPES)
+
     def get_max_args(self):
         return self.base_atom_args
 
@@ -90,46 +188,141 @@ class ATOMIC:
         return self.MASSES
 
     def get_sim_region_sides(self):
-        return [self.REGION_SIDE]*3
+        return list(self.REGION_SIDES)
+
+    def get_tilt_factors(self):
+        return list(self.TILTS)
+
+    def get_boundary(self):
+        return list(self.BOUNDARY)
+
+    def is_triclinic(self):
+        return any(self.TILTS)
+
+    def get_box_matrix(self):
+        #Rows are the LAMMPS cell vectors a, b and c
+        lx, ly, lz = self.REGION_SIDES
+        xy, xz, yz = self.TILTS
+        return np.array([[lx, 0, 0], [xy, ly, 0], [xz, yz, lz]])
 
     def get_outfile_name(self):
         return self.OUTFILE
 
-    def get_atom_data(self):
+    def get_atom_types(self):
+        #Types are assigned in contiguous blocks of self.COUNTS
+        return np.repeat(np.arange(1, self.NUM_TYPES + 1), self.COUNTS)
+
+    def get_positions(self, types, rng):
+        box = self.get_box_matrix()
 
-        atoms_per_side = int(self.NATOMS**(1/3)) + 1 #Round up
-        pos_options = np.linspace(self.BUFFER, self.REGION_SIDE - self.BUFFER, atoms_per_side)
+        if self.PLACEMENT == "random":
+            return placement.place_random(types - 1, box, self.BUFFER, self.MIN_DIST, rng)
 
-        pos_visited = list()
+        #The planes of the out-of-core path, so both give the same structure
+        slabs = placement.place_typed_lattice(self.COUNTS, box, self.BUFFER, self.SEED_SEQUENCE, self.NATOMS, self.PERIODIC)
+        lattice_types, positions = [np.concatenate(parts) for parts in zip(*slabs)]
 
-        atoms_counter = 0
-        atoms_added = 0 #Sum of self.COUNTS up to the current type
+        #Atoms of every type take the sites drawn for that type in plane order
+        placed = np.empty_like(positions)
+        placed[np.argsort(types, kind = "stable")] = positions[np.argsort(lattice_types, kind = "stable")]
+        return placed
 
-        self.ATOM_DATA = np.empty((self.NATOMS, len(self.ATOM_ATTRS)))
+    def get_curve_order(self, positions):
+        #Permutation putting atoms along the chosen space-filling curve
+        if self.SORT == "hilbert":
+            codes = neighbors.position_hilbert_codes(positions, self.get_box_matrix())
+        else:
+            codes = neighbors.position_morton_codes(positions, self.get_box_matrix())
 
-        for i in range(self.NUM_TYPES):
-            while atoms_counter < self.COUNTS[i] + atoms_added:
-                found_unused_pos = False
-                while not found_unused_pos:
-                    x_rand = random.randint(0, atoms_per_side - 1)
-                    y_rand = random.randint(0, atoms_per_side - 1)
-                    z_rand = random.randint(0, atoms_per_side - 1)
-                    cur_pos = (pos_options[x_rand], pos_options[y_rand], pos_options[z_rand])
-                    if cur_pos not in pos_visited:
-                        found_unused_pos = True
+        return np.argsort(codes, kind = "stable")
 
-                id = atoms_counter + 1
-                type = i + 1
+    def get_chunk_size(self):
+        return self.CHUNK_SIZE
 
-                extra_props = self.get_extra_atom_props(id, type, cur_pos)
+    def get_atom_dtype(self, compact = False):
+        #One field per atom attribute, compact storage also keeps coordinates in float32
+        int_type = np.int32 if self.NATOMS < np.iinfo(np.int32).max else np.int64
+        coord_type = np.float32 if compact else np.float64
 
-                self.ATOM_DATA[atoms_counter] = np.array([*extra_props, *cur_pos])
-                pos_visited.append(cur_pos)
-                atoms_counter += 1
+        fields = list()
+        for i, attr in enumerate(self.ATOM_ATTRS):
+            if i in self.INT_ATOM_ATTRS:
+                fields.append((attr, int_type))
+            else:
+                fields.append((attr, coord_type if attr in ("x", "y", "z") else np.float64))
+
+        return np.dtype(fields)
+
+    def get_atom_data_out_of_core(self):
+        """Fill a disk-backed structured array slab by slab.
+
+        Slabs group the lattice planes of the in-memory path, which draw
+        their sites and types from streams of their own, and rows are stored
+        in the same type blocks as in memory, so the chunk size changes
+        nothing but memory use. With a curve order rows follow the slabs
+        instead, sorted along the curve within each slab. Only one slab of
+        positions is held in memory at a time.
+        """
+        scratch_dir = self.SCRATCH_DIR or os.path.dirname(os.path.abspath(self.OUTFILE))
+        self.SCRATCH_FILE = tempfile.TemporaryFile(dir = scratch_dir)
+        atom_data = np.memmap(self.SCRATCH_FILE, dtype = self.get_atom_dtype(compact = True), mode = "w+", shape = (self.NATOMS,))
+
+        next_rows = np.r_[0, np.cumsum(self.COUNTS)[:-1]]
+        next_row = 0
+
+        slabs = placement.place_typed_lattice(self.COUNTS, self.get_box_matrix(), self.BUFFER, self.SEED_SEQUENCE, self.CHUNK_SIZE, self.PERIODIC)
+        for types, positions in slabs:
+            chunk_counts = np.bincount(types - 1, minlength = self.NUM_TYPES)
+            order = np.argsort(types, kind = "stable")
+            types, positions = types[order], positions[order]
+
+            if self.SORT == "type":
+                rows = np.concatenate([np.arange(first, first + count) for first, count in zip(next_rows, chunk_counts)])
+                next_rows += chunk_counts
+            else:
+                order = self.get_curve_order(positions)
+                types, positions = types[order], positions[order]
+                rows = np.arange(next_row, next_row + len(positions))
+                next_row += len(positions)
 
-            atoms_added += self.COUNTS[i]
+            ids = rows + 1
+            columns = self.get_extra_atom_props(ids, types, positions) + list(positions.T)
+            for attr, column in zip(atom_data.dtype.names, columns):
+                atom_data[attr][rows] = column
+
+        atom_data.flush()
+        return atom_data
+
+    def get_atom_data(self):
+        #Placement happens once, later calls return the same structure
+        if self.ATOM_DATA is not None:
+            return self.ATOM_DATA
+
+        if self.OUT_OF_CORE:
+            self.ATOM_DATA = self.get_atom_data_out_of_core()
+            return self.ATOM_DATA
+
+        ids = np.arange(1, self.NATOMS + 1)
+        types = self.get_atom_types()
+
+        positions = self.get_positions(types, self.RNG)
+
+        #Ids follow the curve while every atom keeps its type
+        if self.SORT != "type":
+            order = self.get_curve_order(positions)
+            types, positions = types[order], positions[order]
+
+        columns = self.get_extra_atom_props(ids, types, positions) + list(positions.T)
+
+        self.ATOM_DATA = np.empty(self.NATOMS, dtype = self.get_atom_dtype())
+        for attr, column in zip(self.ATOM_DATA.dtype.names, columns):
+            self.ATOM_DATA[attr] = column
 
         return self.ATOM_DATA
 
-    def get_extra_atom_props(self, id, type, position):
-        return [id, type]
+    def get_atom_positions(self):
+        atom_data = self.get_atom_data()
+        return np.column_stack([atom_data["x"], atom_data["y"], atom_data["z"]]).astype(float)
+
+    def get_extra_atom_props(self, ids, types, positions):
+        return [ids, types]
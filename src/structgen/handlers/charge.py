@@ -1,10 +1,12 @@
-import sys
+import warnings
+
 import numpy as np
-import random
 
 from .atomic import ATOMIC
 
 from structgen import constants
+from structgen import neutrality
+from structgen.errors import StructgenError
 
 class CHARGE(ATOMIC):
 
@@ -21,11 +23,11 @@ class CHARGE(ATOMIC):
 
         atom_args_limit = self.get_max_args()
 
-        for atom_data in args.atom:
+        for atom_data in self.ATOM_ROWS:
             num_attrs = len(atom_data)
 
             if num_attrs > atom_args_limit:
-                sys.exit(f"ERROR! Too many per-atom arguments ({num_attrs}).")
+                raise StructgenError(f"Too many per-atom arguments ({num_attrs}).")
 
             if num_attrs == atom_args_limit:
                 charge_str = atom_data[2]
@@ -33,12 +35,40 @@ class CHARGE(ATOMIC):
                 try:
                     self.CHARGES.append(float(charge_str))
                 except ValueError:
-                    sys.exit(f"ERROR! Non‑numeric  value for atom charge: '{charge_str}'.")
+                    raise StructgenError(f"Non‑numeric  value for atom charge: '{charge_str}'.")
             else:
                 self.CHARGES.append(constants.DEFAULT_ATOM_CHARGE)
 
+        auto_neutralize = getattr(args, "auto_neutralize", None)
+        report = self.neutralize(auto_neutralize, args) if auto_neutralize else None
+
+        total_charge = self.get_total_charge()
+        if abs(total_charge) > constants.CHARGE_TOLERANCE:
+            if report:
+                warnings.warn(f"{report}, residual charge {total_charge:.3g} e.")
+            else:
+                warnings.warn(f"System carries a net charge of {total_charge:.6g} e. Use --auto-neutralize to balance it.")
+
+    def neutralize(self, spec, args):
+        #Returns what was changed, the caller reports it when a net charge remains
+        mode, atom_type = neutrality.parse_neutralize_mode(spec, self.NUM_TYPES)
+
+        if mode == "counts":
+            changes = neutrality.solve_count_adjustment(self.CHARGES, self.COUNTS)
+            self.set_counts([count + change for count, change in zip(self.COUNTS, changes)], args)
+            adjusted = ", ".join(f"type {i + 1} {change:+d}" for i, change in enumerate(changes) if change)
+            report = f"Adjusted atom counts ({adjusted})" if adjusted else "Atom counts already neutral"
+        else:
+            self.CHARGES[atom_type] = neutrality.solve_charge(self.CHARGES, self.COUNTS, atom_type)
+            report = f"Set the charge of type {atom_type + 1} to {self.CHARGES[atom_type]:.10g}"
+
+        return report
+
+    def get_total_charge(self):
+        return neutrality.get_total_charge(self.CHARGES, self.COUNTS)
+
     def get_max_args(self):
         return super().get_max_args() + self.extra_atom_args
 
-    def get_extra_atom_props(self, id, type, position):
-        return [id, type, self.CHARGES[type - 1]]
+    def get_extra_atom_props(self, ids, types, positions):
+        return [ids, types, np.asarray(self.CHARGES)[types - 1]]
@@ -0,0 +1,53 @@
+import numpy as np
+
+from .atomic import ATOMIC
+
+from structgen import constants
+
+class DATA(ATOMIC):
+    """Finished structure read from a LAMMPS data file or built from other structures.
+
+    Nothing is placed, the atoms and bonds are given, and the getters shared
+    with ATOMIC serve the writers and the quality report.
+    """
+
+    def __init__(self, atom_style, masses, sides, tilts, columns, bond_data = None, num_bond_types = 0, output = constants.DEFAULT_FILENAME, boundary = None):
+        self.ATOM_STYLE = atom_style.upper()
+        self.ATOM_ATTRS = list(constants.ATOM_STYLE_ATTRS[atom_style])
+        self.INT_ATOM_ATTRS = [i for i, attr in enumerate(self.ATOM_ATTRS) if attr not in ("q", "x", "y", "z")]
+        self.BOND_ATTRS = ["id", "type", "atom1-id", "atom2-id"]
+
+        self.MASSES = list(masses)
+        self.NUM_TYPES = len(self.MASSES)
+        self.NATOMS = len(columns[0])
+        self.REGION_SIDES = list(sides)
+        self.TILTS = list(tilts)
+        self.BOUNDARY = list(boundary or constants.DEFAULT_BOUNDARY)
+        self.PERIODIC = np.array([mode == "p" for mode in self.BOUNDARY])
+
+        self.ATOM_DATA = np.empty(self.NATOMS, dtype = self.get_atom_dtype())
+        for attr, column in zip(self.ATOM_ATTRS, columns):
+            self.ATOM_DATA[attr] = column
+
+        self.COUNTS = np.bincount(self.ATOM_DATA["type"], minlength = self.NUM_TYPES + 1)[1:].tolist()
+        self.TOTAL_MASS = float(np.dot(self.MASSES, self.COUNTS))
+
+        self.BOND_DATA = np.empty((0, 4), dtype = int) if bond_data is None else np.asarray(bond_data, dtype = int)
+        self.BOND_TYPES = num_bond_types
+
+        self.OUT_OF_CORE = False
+        self.CHUNK_SIZE = constants.DEFAULT_CHUNK_SIZE
+        self.SEED_SEQUENCE = None
+        self.OUTFILE = output
+
+    def get_nbonds(self):
+        return len(self.BOND_DATA)
+
+    def get_nbond_types(self):
+        return self.BOND_TYPES
+
+    def get_bond_data(self):
+        return self.BOND_DATA
+
+    def get_bond_attrs(self):
+        return self.BOND_ATTRS
@@ -0,0 +1,16 @@
+import numpy as np
+
+from .molecular import MOLECULAR
+from .charge import CHARGE
+
+class FULL(MOLECULAR, CHARGE):
+
+    def __init__(self, args):
+
+        super().__init__(args)
+
+        self.ATOM_STYLE = "FULL"
+        self.ATOM_ATTRS = ["atom-id", "molecule-id", "type", "q", "x", "y", "z"]
+
+    def get_extra_atom_props(self, ids, types, positions):
+        return [ids, self.MOLECULE_IDS, types, np.asarray(self.CHARGES)[types - 1]]
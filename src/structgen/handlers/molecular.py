@@ -0,0 +1,128 @@
+import numpy as np
+
+from .atomic import ATOMIC
+
+from structgen import constants
+from structgen import molecules
+from structgen import placement
+from structgen import topology
+from structgen.errors import StructgenError
+
+class MOLECULAR(ATOMIC):
+
+    def __init__(self, args):
+
+        super().__init__(args)
+
+        if self.OUT_OF_CORE:
+            raise StructgenError("Out-of-core generation is not available for styles with molecules.")
+        if self.SORT != "type":
+            raise StructgenError("Molecules keep consecutive atom ids, so atoms cannot be sorted along a curve.")
+
+        self.ATOM_STYLE = "MOLECULAR"
+        self.ATOM_ATTRS = ["atom-id", "molecule-id", "type", "x", "y", "z"]
+        self.BOND_ATTRS = ["id", "type", "atom1-id", "atom2-id"]
+
+        self.INT_ATOM_ATTRS = [0, 1, 2]
+
+        bond_args = getattr(args, "bond", None) or list()
+        intermol_args = getattr(args, "intermol", None) or list()
+        self.BONDS, self.INTRAMOL, self.INTERMOL = topology.parse_bonds(bond_args, intermol_args, self.NUM_TYPES)
+        self.BOND_COUNTS = [intra + inter for intra, inter in zip(self.INTRAMOL, self.INTERMOL)]
+        self.BOND_TYPES = len(self.BONDS)
+
+        #Rigid templates come first, their stoichiometry is checked like any other molecule
+        self.TEMPLATES = molecules.get_templates(args)
+        specs = [(molecules.get_template_spec(template), count) for template, count in self.TEMPLATES]
+        specs += molecules.get_molecule_specs(args)
+        self.MOLECULE_STOICHEOMETRIES, self.MOLECULES, self.NUM_MOLECULES = molecules.build_molecules(specs, self.COUNTS)
+        self.MOLECULE_COUNTS = [mol_count for _, mol_count in specs]
+        self.NUM_MOLECULE_TYPES = len(self.MOLECULES)
+
+        self.MOLECULE_IDS = None
+        self.ATOM_TYPES = None
+        self.BOND_DATA = None
+
+    def get_molecule_sequences(self):
+        #Atom types of one molecule of every kind, templates first
+        sequences = [template[0] for template, _ in self.TEMPLATES]
+        sequences += [np.repeat([atom_type for atom_type, _ in molecule], [count for _, count in molecule])
+                      for molecule in self.MOLECULE_STOICHEOMETRIES[len(self.TEMPLATES):]]
+        return sequences
+
+    def get_molecule_shapes(self):
+        #Template geometries, molecules given only by their types get a compact generated shape
+        valences = topology.get_type_valences(self.COUNTS, self.BONDS, self.BOND_COUNTS)
+        shapes = [template[1] for template, _ in self.TEMPLATES]
+        shapes += [molecules.generate_shape(sequence, valences) for sequence in self.get_molecule_sequences()[len(self.TEMPLATES):]]
+        return shapes
+
+    def get_atom_types(self):
+        #Molecules occupy consecutive atom ids, leftover atoms get a molecule of their own
+        self.ATOM_TYPES, self.MOLECULE_IDS = topology.get_molecule_layout(self.get_molecule_sequences(), self.MOLECULE_COUNTS, self.COUNTS)
+        return self.ATOM_TYPES
+
+    def get_template_cutoffs(self):
+        #Atoms of different molecules keep a default clearance where --min-dist sets none
+        return np.where(self.MIN_DIST > 0, self.MIN_DIST, constants.TEMPLATE_MIN_DIST)
+
+    def get_positions(self, types, rng):
+        if not self.NUM_MOLECULES:
+            return super().get_positions(types, rng)
+
+        return self.get_molecule_positions(types, rng)
+
+    def get_molecule_positions(self, types, rng):
+        """Whole molecules at lattice or random centers, the leftover atoms inserted around them."""
+        box = self.get_box_matrix()
+        cutoffs = self.get_template_cutoffs()
+        num_rigid = sum(len(sequence)*count for sequence, count in zip(self.get_molecule_sequences(), self.MOLECULE_COUNTS))
+
+        mol_shapes = np.repeat(np.arange(len(self.MOLECULE_COUNTS)), self.MOLECULE_COUNTS)
+        rigid = placement.place_rigid(self.get_molecule_shapes(), mol_shapes, types[:num_rigid] - 1, box, self.BUFFER, cutoffs, rng,
+                                      lattice = self.PLACEMENT == "lattice", periodic = self.PERIODIC)
+
+        loose = placement.place_random(types[num_rigid:] - 1, box, self.BUFFER, cutoffs, rng,
+                                       occupied = (rigid, types[:num_rigid] - 1))
+
+        return np.concatenate([rigid, loose])
+
+    def get_fixed_bonds(self):
+        #Bonds listed in template files, shifted to every copy of the molecule
+        fixed = list()
+        start = 0
+        for (template_types, _, bonds), count in self.TEMPLATES:
+            offsets = start + len(template_types)*np.arange(count)
+            copies = np.repeat(bonds[None], count, axis = 0)
+            copies[:, :, 1:] += offsets[:, None, None]
+            fixed.append(copies.reshape(-1, 3))
+            start += len(template_types)*count
+
+        return np.concatenate(fixed) if fixed else np.empty((0, 3), dtype = int)
+
+    def get_extra_atom_props(self, ids, types, positions):
+        return [ids, self.MOLECULE_IDS, types]
+
+    def get_bond_search_cutoff(self):
+        #Start just beyond the bonds of generated shapes, assign_bonds widens it when needed
+        return constants.BOND_SEARCH_FACTOR*constants.GENERATED_BOND_LENGTH
+
+    def get_nbonds(self):
+        return len(self.get_bond_data())
+
+    def get_nbond_types(self):
+        return self.BOND_TYPES
+
+    def get_bond_data(self):
+        if self.BOND_DATA is None:
+            positions = self.get_atom_positions()
+            self.BOND_DATA = topology.assign_bonds(
+                positions, self.ATOM_TYPES, self.MOLECULE_IDS, self.get_box_matrix(),
+                self.BONDS, self.INTRAMOL, self.INTERMOL, self.get_bond_search_cutoff(),
+                fixed_bonds = self.get_fixed_bonds(),
+            )
+
+        return self.BOND_DATA
+
+    def get_bond_attrs(self):
+        return self.BOND_ATTRS
@@ -0,0 +1,270 @@
+import os
+import re
+import json
+import copy
+from functools import lru_cache
+
+import numpy as np
+
+from structgen import constants
+from structgen.errors import StructgenError
+
+ATOM_GROUP_PATTERN = re.compile(r"^(\d+)\((\d+)\)$")
+
+
+def parse_molecule_string(molecule_str):
+    """Parse "type(count)-type(count)" into a list of [type, count] pairs."""
+    molecule = list()
+    for atom_str in re.sub(r"\s+", "", molecule_str).split("-"):
+        match = ATOM_GROUP_PATTERN.match(atom_str)
+        if not match:
+            raise StructgenError(f"Incorrect molecule format: {molecule_str}")
+        molecule.append([int(match[1]), int(match[2])])
+
+    return molecule
+
+
+def parse_count(count, source):
+    count_str = str(count)
+    if not count_str.isdigit():
+        raise StructgenError(f"Number of molecules has to be a non-negative integer: '{count_str}' ({source}).")
+
+    return int(count_str)
+
+
+def parse_molecule_entry(entry, source):
+    if not isinstance(entry, dict) or "composition" not in entry:
+        raise StructgenError(f"Every molecule needs a 'composition' entry ({source}).")
+
+    composition = entry["composition"]
+    if isinstance(composition, str):
+        molecule = parse_molecule_string(composition)
+    elif isinstance(composition, dict):
+        try:
+            molecule = [[int(atom_type), int(count)] for atom_type, count in composition.items()]
+        except (TypeError, ValueError):
+            raise StructgenError(f"Molecule composition has to map atom types to counts: {composition} ({source}).")
+    else:
+        raise StructgenError(f"Unsupported molecule composition: {composition} ({source}).")
+
+    return molecule, parse_count(entry.get("count", 1), source)
+
+
+def read_spec_file(path):
+    ext = os.path.splitext(path)[1].lower()
+
+    if ext == ".json":
+        with open(path) as file:
+            return json.load(file)
+
+    if ext in (".yaml", ".yml"):
+        try:
+            import yaml
+        except ImportError:
+            raise StructgenError("Reading YAML molecule files requires the PyYAML package (pip install pyyaml).")
+        with open(path) as file:
+            return yaml.safe_load(file)
+
+    if ext == ".toml":
+        try:
+            import tomllib
+        except ImportError:
+            try:
+                import tomli as tomllib
+            except ImportError:
+                raise StructgenError("Reading TOML molecule files on Python < 3.11 requires the tomli package (pip install tomli).")
+        with open(path, "rb") as file:
+            return tomllib.load(file)
+
+    raise StructgenError(f"Unknown molecule file type '{ext}'. Use .json, .yaml/.yml or .toml.")
+
+
+@lru_cache(maxsize = None)
+def parse_molecule_file(path, mtime_ns, size):
+    #Keyed on modification time and size so an edited file is parsed again
+    try:
+        spec = read_spec_file(path)
+    except OSError as err:
+        raise StructgenError(f"Cannot read molecule file '{path}': {err.strerror}.")
+    except ValueError as err:
+        raise StructgenError(f"Cannot parse molecule file '{path}': {err}.")
+
+    entries = spec.get("molecules") if isinstance(spec, dict) else None
+    if not isinstance(entries, list):
+        raise StructgenError(f"Molecule file '{path}' has to contain a 'molecules' list.")
+
+    return tuple(parse_molecule_entry(entry, path) for entry in entries)
+
+
+def load_molecule_file(path):
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError as err:
+        raise StructgenError(f"Cannot read molecule file '{path}': {err.strerror}.")
+
+    return copy.deepcopy(list(parse_molecule_file(path, stat.st_mtime_ns, stat.st_size)))
+
+
+def get_molecule_specs(args):
+    """Collect (molecule, count) pairs from --molecule-file and repeated --molecule flags."""
+    specs = list()
+
+    molecule_file = getattr(args, "molecule_file", None)
+    if molecule_file:
+        specs += load_molecule_file(molecule_file)
+
+    for molecule_data in getattr(args, "molecule", None) or list():
+        if len(molecule_data) > 2:
+            raise StructgenError(f"Too many per-molecule arguments ({len(molecule_data)}).")
+
+        count = parse_count(molecule_data[1], "--molecule") if len(molecule_data) == 2 else 1
+        specs.append((parse_molecule_string(molecule_data[0]), count))
+
+    return specs
+
+
+def build_molecules(specs, type_counts):
+    """Check molecule specs against available atoms.
+
+    Returns the per-molecule stoichiometries, the same lists with counts
+    multiplied by the number of molecules, and the total number of molecules.
+    """
+    stoichiometries = list()
+    molecules = list()
+    num_molecules = 0
+    atoms_left = list(type_counts)
+
+    for molecule, mol_count in specs:
+        stoichiometries.append(copy.deepcopy(molecule))
+        num_molecules += mol_count
+
+        scaled = list()
+        for atom_type, count in molecule:
+            if not 1 <= atom_type <= len(type_counts):
+                raise StructgenError(f"Molecule refers to unknown atom type {atom_type}.")
+
+            atoms_left[atom_type - 1] -= count*mol_count
+            if atoms_left[atom_type - 1] < 0:
+                raise StructgenError(f"Not enough atoms of type {atom_type}")
+
+            scaled.append([atom_type, count*mol_count])
+
+        molecules.append(scaled)
+
+    return stoichiometries, molecules, num_molecules
+
+
+def read_xyz_template(path):
+    with open(path) as file:
+        lines = file.read().splitlines()
+
+    try:
+        natoms = int(lines[0].split()[0])
+        rows = [line.split() for line in lines[2:2 + natoms]]
+        types = [int(row[0]) for row in rows]
+        coords = [[float(value) for value in row[1:4]] for row in rows]
+        if len(rows) != natoms or any(len(xyz) != 3 for xyz in coords):
+            raise ValueError
+    except (IndexError, ValueError):
+        raise StructgenError(f"Template '{path}' has to be an XYZ file with atom type numbers in the first column.")
+
+    return types, coords, list()
+
+
+def read_lammps_molecule(path):
+    #Header lines hold "<count> <keyword>", sections start with a capitalized name
+    with open(path) as file:
+        lines = [line.split("#")[0].split() for line in file.read().splitlines()[1:]]
+
+    header, sections, current = dict(), dict(), None
+    for words in filter(None, lines):
+        if words[0][0].isalpha():
+            current = " ".join(words)
+            sections[current] = list()
+        elif current is None:
+            header[" ".join(words[1:])] = words[0]
+        else:
+            sections[current].append(words)
+
+    try:
+        natoms = int(header["atoms"])
+        coords = {int(row[0]): [float(value) for value in row[1:4]] for row in sections["Coords"]}
+        types = {int(row[0]): int(row[1]) for row in sections["Types"]}
+        bonds = [[int(row[1]), int(row[2]) - 1, int(row[3]) - 1] for row in sections.get("Bonds", list())]
+        ids = list(range(1, natoms + 1))
+        coords, types = [coords[atom_id] for atom_id in ids], [types[atom_id] for atom_id in ids]
+        if any(not 0 <= atom < natoms for _, *atoms in bonds for atom in atoms):
+            raise ValueError
+    except (KeyError, IndexError, ValueError):
+        raise StructgenError(f"Template '{path}' has to be a LAMMPS molecule file with numeric Coords, Types and optional Bonds sections.")
+
+    return types, coords, bonds
+
+
+@lru_cache(maxsize = None)
+def parse_template_file(path, mtime_ns, size):
+    try:
+        if os.path.splitext(path)[1].lower() == ".xyz":
+            types, coords, bonds = read_xyz_template(path)
+        else:
+            types, coords, bonds = read_lammps_molecule(path)
+    except OSError as err:
+        raise StructgenError(f"Cannot read template '{path}': {err.strerror}.")
+
+    if not types:
+        raise StructgenError(f"Template '{path}' holds no atoms.")
+
+    return tuple(types), tuple(map(tuple, coords)), tuple(map(tuple, bonds))
+
+
+def load_template(path):
+    """Atom types, centered coordinates and zero-based (type, atom, atom) bonds of a template."""
+    path = os.path.abspath(path)
+    try:
+        stat = os.stat(path)
+    except OSError as err:
+        raise StructgenError(f"Cannot read template '{path}': {err.strerror}.")
+
+    types, coords, bonds = parse_template_file(path, stat.st_mtime_ns, stat.st_size)
+    coords = np.array(coords)
+
+    return np.array(types), coords - coords.mean(axis = 0), np.array(bonds, dtype = int).reshape(-1, 3)
+
+
+def get_templates(args):
+    """Collect (template, count) pairs from repeated --template flags."""
+    templates = list()
+
+    for template_data in getattr(args, "template", None) or list():
+        if len(template_data) > 2:
+            raise StructgenError(f"Too many per-template arguments ({len(template_data)}).")
+
+        count = parse_count(template_data[1], "--template") if len(template_data) == 2 else 1
+        templates.append((load_template(template_data[0]), count))
+
+    return templates
+
+
+def get_template_spec(template):
+    #Stoichiometry of a template in the [type, count] form used for molecules
+    atom_types, counts = np.unique(template[0], return_counts = True)
+    return [[int(atom_type), int(count)] for atom_type, count in zip(atom_types, counts)]
+
+
+def generate_shape(sequence, valences, spacing = constants.GENERATED_BOND_LENGTH):
+    """Compact shape for a molecule given only by its atom types.
+
+    The atoms take the sites of a cubic grid closest to its origin, those
+    whose type has the highest valence innermost, so the bonds assigned
+    later join near neighbors. Returns centered coordinates in the order of
+    `sequence`.
+    """
+    sequence = np.asarray(sequence)
+    reach = int(np.ceil((3*len(sequence)/(4*np.pi))**(1/3))) + 2
+    grid = np.indices((2*reach + 1,)*3).reshape(3, -1).T - reach
+    sites = grid[np.lexsort((*grid.T[::-1], (grid**2).sum(axis = 1)))[:len(sequence)]]
+
+    coords = np.empty((len(sequence), 3))
+    coords[np.argsort(-valences[sequence], kind = "stable")] = spacing*sites
+    return coords - coords.mean(axis = 0)
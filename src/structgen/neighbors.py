@@ -0,0 +1,336 @@
+import numpy as np
+
+
+class CellList:
+    """Cell-list neighbor index over a periodic box.
+
+    `box` is either three orthogonal side lengths or a 3x3 matrix whose rows
+    are the (possibly tilted) cell vectors. Points are binned in fractional
+    coordinates into cells at least `cutoff` wide across every pair of
+    opposite faces, so every neighbor within the cutoff is found among the 27
+    surrounding cells. Each cell keeps its members in a row of a padded table
+    that grows when a cell overflows.
+    """
+
+    initial_cell_capacity = 4
+
+    def __init__(self, box, cutoff, capacity):
+        self.set_grid(box, cutoff)
+
+        self.POSITIONS = np.empty((capacity, 3))
+        self.TYPES = np.zeros(capacity, dtype = int)
+        self.TABLE = np.full((self.get_num_rows(), self.initial_cell_capacity), -1)
+        self.OCCUPANCY = np.zeros(self.get_num_rows(), dtype = int)
+
+    def set_grid(self, box, cutoff):
+        box = np.asarray(box, dtype = float)
+        self.BOX = np.diag(box) if box.ndim == 1 else box
+        self.INV_BOX = np.linalg.inv(self.BOX)
+        self.ORTHOGONAL = np.count_nonzero(self.BOX - np.diag(np.diag(self.BOX))) == 0
+        self.SIDES = np.diag(self.BOX).copy()
+
+        #Distance between opposite faces limits how many cutoff-wide cells fit along an axis
+        self.NCELLS = np.maximum((get_face_widths(self.BOX) // cutoff).astype(int), 1)
+        self.STRIDES = np.array([self.NCELLS[1]*self.NCELLS[2], self.NCELLS[2], 1])
+
+        #Avoid visiting the same cell twice when an axis has fewer than 3 cells
+        self.AXIS_OFFSETS = [np.unique(np.array([-1, 0, 1]) % n) for n in self.NCELLS]
+        self.NUM_NEIGHBOR_CELLS = int(np.prod([len(offsets) for offsets in self.AXIS_OFFSETS]))
+
+    def get_num_rows(self):
+        return int(np.prod(self.NCELLS))
+
+    def get_rows(self, flat_cells):
+        return flat_cells
+
+    def get_cells(self, points):
+        fractional = points @ self.INV_BOX
+        return np.floor(fractional*self.NCELLS).astype(int) % self.NCELLS
+
+    def wrap_deltas(self, deltas):
+        #Minimum image, done in fractional coordinates when the box is tilted
+        if self.ORTHOGONAL:
+            return deltas - self.SIDES*np.round(deltas/self.SIDES)
+
+        fractional = deltas @ self.INV_BOX
+        return (fractional - np.round(fractional)) @ self.BOX
+
+    def get_flat_cells(self, points):
+        return self.get_cells(points) @ self.STRIDES
+
+    def get_neighbor_cells(self, points):
+        """Flat indices of the cells surrounding every point, shape (npoints, ncells)."""
+        cells = self.get_cells(points)
+
+        #Combine per-axis neighbors by broadcasting instead of wrapping all 27 offsets at once
+        flat = np.zeros((len(points), 1, 1, 1), dtype = int)
+        for axis in range(3):
+            axis_cells = (cells[:, axis, None] + self.AXIS_OFFSETS[axis]) % self.NCELLS[axis]
+            shape = [len(points), 1, 1, 1]
+            shape[axis + 1] = len(self.AXIS_OFFSETS[axis])
+            flat = flat + (axis_cells*self.STRIDES[axis]).reshape(shape)
+
+        return flat.reshape(len(points), self.NUM_NEIGHBOR_CELLS)
+
+    def insert(self, indices, points, types):
+        self.POSITIONS[indices] = points
+        self.TYPES[indices] = types
+
+        rows = self.get_rows(self.get_flat_cells(points))
+        order = np.argsort(rows, kind = "stable")
+        rows_sorted = rows[order]
+
+        #Rank of every point among the points landing in the same cell
+        group_start = np.r_[0, np.flatnonzero(np.diff(rows_sorted)) + 1]
+        group_sizes = np.diff(np.r_[group_start, len(rows_sorted)])
+        ranks = np.arange(len(rows_sorted)) - np.repeat(group_start, group_sizes)
+
+        slots = self.OCCUPANCY[rows_sorted] + ranks
+        if len(slots) and slots.max() >= self.TABLE.shape[1]:
+            new_capacity = max(2*self.TABLE.shape[1], slots.max() + 1)
+            grown = np.full((self.TABLE.shape[0], new_capacity), -1)
+            grown[:, :self.TABLE.shape[1]] = self.TABLE
+            self.TABLE = grown
+
+        self.TABLE[rows_sorted, slots] = np.asarray(indices)[order]
+        np.add.at(self.OCCUPANCY, rows_sorted, 1)
+
+    def get_candidate_pairs(self, points):
+        """Pair every point with the stored points of its surrounding cells.
+
+        Returns point indices, stored indices and squared minimum-image distances.
+        """
+        rows = self.get_rows(self.get_neighbor_cells(points))
+
+        #Most surrounding cells are empty, so only look inside the occupied ones
+        point_ids, cell_ids = np.nonzero(self.OCCUPANCY[rows] > 0)
+        members = self.TABLE[rows[point_ids, cell_ids]]
+        pair_ids, slot_ids = np.nonzero(members >= 0)
+        point_ids = point_ids[pair_ids]
+        neighbor_ids = members[pair_ids, slot_ids]
+
+        deltas = self.wrap_deltas(self.POSITIONS[neighbor_ids] - points[point_ids])
+        dist_sq = np.einsum("ij,ij->i", deltas, deltas)
+
+        return point_ids, neighbor_ids, dist_sq
+
+    def find_close(self, points, types, cutoffs):
+        """Return (point, stored index) pairs that are closer than their pair cutoff."""
+        point_ids, neighbor_ids, dist_sq = self.get_candidate_pairs(points)
+
+        pair_cutoffs = cutoffs[types[point_ids], self.TYPES[neighbor_ids]]
+        close = dist_sq < pair_cutoffs**2
+
+        return point_ids[close], neighbor_ids[close]
+
+    def iter_pairs(self, cutoff, chunk_size = 65536):
+        """Stored pairs i < j within cutoff as (i, j, distance) arrays, one chunk of points i at a time.
+
+        Expects every slot up to the capacity to be filled and cutoff to be no
+        larger than the one the cell list was built with.
+        """
+        num_points = len(self.POSITIONS)
+
+        for start in range(0, num_points, chunk_size):
+            point_ids, neighbor_ids, dist_sq = self.get_candidate_pairs(self.POSITIONS[start:start + chunk_size])
+            point_ids = point_ids + start
+
+            keep = (neighbor_ids > point_ids) & (dist_sq < cutoff**2)
+            yield point_ids[keep], neighbor_ids[keep], np.sqrt(dist_sq[keep])
+
+    def find_pairs(self, cutoff, chunk_size = 65536):
+        """All stored pairs i < j within cutoff as (i, j, distance) arrays, see iter_pairs."""
+        first, second, distances = list(), list(), list()
+        for chunk_first, chunk_second, chunk_distances in self.iter_pairs(cutoff, chunk_size):
+            first.append(chunk_first)
+            second.append(chunk_second)
+            distances.append(chunk_distances)
+
+        if not first:
+            return np.empty(0, dtype = int), np.empty(0, dtype = int), np.empty(0)
+
+        return np.concatenate(first), np.concatenate(second), np.concatenate(distances)
+
+    def has_conflict(self, points, types, cutoffs):
+        point_ids, _ = self.find_close(points, types, cutoffs)
+        conflict = np.zeros(len(points), dtype = bool)
+        conflict[point_ids] = True
+        return conflict
+
+
+class SparseCellList(CellList):
+    """Cell list that only allocates rows for occupied cells.
+
+    Meant for a small set of points in a large box, where a dense table of
+    every cell would cost more than the points themselves.
+    """
+
+    def __init__(self, box, cutoff, points, types):
+        self.set_grid(box, cutoff)
+
+        #Sorted occupied cells followed by a sentinel that maps to an always empty row
+        self.KEYS = np.r_[np.unique(self.get_flat_cells(points)), -1]
+
+        super().__init__(box, cutoff, len(points))
+        self.insert(np.arange(len(points)), points, types)
+
+    def get_num_rows(self):
+        return len(self.KEYS)
+
+    def get_rows(self, flat_cells):
+        rows = np.searchsorted(self.KEYS[:-1], flat_cells)
+        return np.where(self.KEYS[rows] == flat_cells, rows, len(self.KEYS) - 1)
+
+
+def get_half_stencil(reach):
+    #Cell offsets within reach along every axis, one of every +/- pair
+    offsets = np.indices((2*reach + 1,)*3).reshape(3, -1).T - reach
+    positive = (offsets[:, 0] > 0) | ((offsets[:, 0] == 0) & ((offsets[:, 1] > 0) | ((offsets[:, 1] == 0) & (offsets[:, 2] > 0))))
+    return offsets[positive]
+
+
+def iter_neighbor_pairs(positions, box, cutoff, chunk_size = 4096, reach = 2):
+    """Every pair of points within cutoff exactly once, as (i, j, distance) chunks.
+
+    Meant for visiting all pairs of a large periodic box. Points are sorted
+    into cells 1/reach of the cutoff wide, and every cell is only paired with
+    the cells in one half of the surrounding stencil, so each pair is tested
+    once and far fewer distant candidates are tested than with cutoff-wide
+    cells. Distances are taken per axis in fractional coordinates through the
+    metric of the box. Boxes too small for the stencil fall back to a
+    CellList. The order of i and j within a pair is arbitrary.
+    """
+    box = np.asarray(box, dtype = float)
+    natoms = len(positions)
+    ncells = np.maximum((reach*get_face_widths(box)//cutoff).astype(int), 1)
+
+    if (ncells < 2*reach + 1).any():
+        cells = CellList(box, cutoff, natoms)
+        cells.insert(np.arange(natoms), positions, np.zeros(natoms, dtype = int))
+        yield from cells.iter_pairs(cutoff, chunk_size)
+        return
+
+    fractional = (positions @ np.linalg.inv(box)) % 1.0
+    all_cells = np.floor(fractional*ncells).astype(int) % ncells
+    strides = np.array([ncells[1]*ncells[2], ncells[2], 1])
+
+    #Points sorted by cell, so the members of a cell are one contiguous run
+    flat_cells = all_cells @ strides
+    order = np.argsort(flat_cells, kind = "stable")
+    axes = [np.ascontiguousarray(fractional[order, axis]) for axis in range(3)]
+    sorted_cells = all_cells[order]
+    cell_counts = np.bincount(flat_cells, minlength = int(np.prod(ncells)))
+    cell_starts = np.r_[0, np.cumsum(cell_counts)[:-1]]
+    cell_ends = cell_starts + cell_counts
+
+    #Flat index contributions of every axis, so neighbor cells are sums of small table lookups
+    stencil = get_half_stencil(reach)
+    axis_offsets = np.arange(-reach, reach + 1)
+    stencil_tables = [((np.arange(n)[:, None] + axis_offsets[None, stencil[:, axis] + reach]) % n)*stride
+                      for axis, (n, stride) in enumerate(zip(ncells, strides))]
+
+    metric = box @ box.T
+    metric_terms = [(a, b, metric[a, b]*(1 if a == b else 2)) for a in range(3) for b in range(a, 3) if metric[a, b] != 0]
+
+    for start in range(0, natoms, chunk_size):
+        points = np.arange(start, min(start + chunk_size, natoms))
+        cells = sorted_cells[start:start + chunk_size]
+        neighbor_cells = sum(table[cells[:, axis]] for axis, table in enumerate(stencil_tables))
+
+        #Per point, the later members of its own cell come first, then the runs of the stencil cells
+        first_ids = np.column_stack([points + 1, cell_starts[neighbor_cells]]).ravel()
+        num_candidates = np.column_stack([cell_ends[cells @ strides] - points - 1, cell_counts[neighbor_cells]])
+
+        point_ids = np.repeat(points, num_candidates.sum(axis = 1))
+        num_candidates = num_candidates.ravel()
+        run_starts = np.cumsum(num_candidates) - num_candidates
+        neighbor_ids = np.arange(len(point_ids)) + np.repeat(first_ids - run_starts, num_candidates)
+
+        deltas = list()
+        for axis in axes:
+            delta = axis[neighbor_ids] - axis[point_ids]
+            delta -= np.round(delta)
+            deltas.append(delta)
+
+        dist_sq = 0
+        for a, b, weight in metric_terms:
+            dist_sq = dist_sq + weight*deltas[a]*deltas[b]
+
+        keep = np.flatnonzero(dist_sq < cutoff**2)
+        yield order[point_ids[keep]], order[neighbor_ids[keep]], np.sqrt(dist_sq[keep])
+
+
+def spread_bits(values):
+    #Insert two zero bits between the lowest 21 bits of every value
+    values = values.astype(np.uint64) & np.uint64(0x1fffff)
+    for shift, mask in ((32, 0x1f00000000ffff), (16, 0x1f0000ff0000ff), (8, 0x100f00f00f00f00f),
+                        (4, 0x10c30c30c30c30c3), (2, 0x1249249249249249)):
+        values = (values | (values << np.uint64(shift))) & np.uint64(mask)
+
+    return values
+
+
+def get_face_widths(box):
+    #Distance between opposite faces of the cell spanned by the rows of box
+    volume = abs(np.linalg.det(box))
+    face_areas = np.linalg.norm(np.cross(box[[1, 2, 0]], box[[2, 0, 1]]), axis = 1)
+    return volume/face_areas
+
+
+def morton_codes(grid_indices):
+    """Z-order curve keys for integer (x, y, z) grid coordinates, one row per point."""
+    grid_indices = np.asarray(grid_indices)
+    return (spread_bits(grid_indices[:, 0])
+            | (spread_bits(grid_indices[:, 1]) << np.uint64(1))
+            | (spread_bits(grid_indices[:, 2]) << np.uint64(2)))
+
+
+def hilbert_codes(grid_indices, bits):
+    """Hilbert curve keys for integer (x, y, z) grid coordinates below 2**bits.
+
+    Unlike the Z-order curve, consecutive keys are always neighboring cells.
+    Vectorized form of Skilling's transpose algorithm (AIP Conf. Proc. 707,
+    2004): the coordinates are turned into the transposed Hilbert index,
+    whose bits are then interleaved like a Morton code.
+    """
+    axes = np.asarray(grid_indices).T.astype(np.uint64)
+
+    #Undo the excess work of the recursive rotations
+    level = np.uint64(1 << (bits - 1))
+    while level > 1:
+        low_bits = level - np.uint64(1)
+        for i in range(3):
+            flip = (axes[i] & level) != 0
+            axes[0] = np.where(flip, axes[0] ^ low_bits, axes[0])
+            swap = np.where(flip, np.uint64(0), (axes[0] ^ axes[i]) & low_bits)
+            axes[0] ^= swap
+            axes[i] ^= swap
+        level >>= np.uint64(1)
+
+    #Gray encode
+    for i in range(1, 3):
+        axes[i] ^= axes[i - 1]
+    gray = np.zeros_like(axes[0])
+    level = np.uint64(1 << (bits - 1))
+    while level > 1:
+        gray = np.where((axes[2] & level) != 0, gray ^ (level - np.uint64(1)), gray)
+        level >>= np.uint64(1)
+    axes ^= gray
+
+    return (spread_bits(axes[0]) << np.uint64(2)) | (spread_bits(axes[1]) << np.uint64(1)) | spread_bits(axes[2])
+
+
+def get_curve_cells(positions, box, bits):
+    #Integer cell coordinates with 2**bits cells along every box vector
+    fractional = (positions @ np.linalg.inv(box)) % 1.0
+    return np.minimum((fractional*(1 << bits)).astype(np.int64), (1 << bits) - 1)
+
+
+def position_morton_codes(positions, box, bits = 10):
+    """Z-order curve keys of Cartesian positions, quantized to 2**bits cells per box vector."""
+    return morton_codes(get_curve_cells(positions, box, bits))
+
+
+def position_hilbert_codes(positions, box, bits = 10):
+    """Hilbert curve keys of Cartesian positions, quantized to 2**bits cells per box vector."""
+    return hilbert_codes(get_curve_cells(positions, box, bits), bits)
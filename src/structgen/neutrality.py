@@ -0,0 +1,118 @@
+import math
+from fractions import Fraction
+
+from structgen import constants
+from structgen.errors import StructgenError
+
+
+def get_total_charge(charges, counts):
+    return sum(charge*count for charge, count in zip(charges, counts))
+
+
+def parse_neutralize_mode(spec, num_types):
+    """Parse "counts" or "charge:<type>" into (mode, zero-based type or None)."""
+    if spec == "counts":
+        return "counts", None
+
+    mode, _, type_str = spec.partition(":")
+    if mode == "charge" and type_str.isdigit() and 1 <= int(type_str) <= num_types:
+        return "charge", int(type_str) - 1
+
+    raise StructgenError(f"Auto-neutralize has to be 'counts' or 'charge:<type>' with an existing atom type: '{spec}'.")
+
+
+def get_integer_charges(charges):
+    #Express every charge as a whole multiple of the smallest common fraction of e
+    fractions = [Fraction(charge).limit_denominator(constants.MAX_CHARGE_DENOMINATOR) for charge in charges]
+    scale = math.lcm(*(fraction.denominator for fraction in fractions))
+    return [int(fraction*scale) for fraction in fractions]
+
+
+def extended_gcd(a, b):
+    if b == 0:
+        return (abs(a), (1 if a >= 0 else -1), 0)
+
+    g, x, y = extended_gcd(b, a % b)
+    return g, y, x - (a//b)*y
+
+
+def solve_pair(z_i, z_j, target, min_a, min_b):
+    """Integer (a, b) with a*z_i + b*z_j == target, a >= min_a, b >= min_b and the smallest |a| + |b|.
+
+    Returns None when there is no such pair.
+    """
+    g, x, y = extended_gcd(z_i, z_j)
+    if target % g:
+        return None
+
+    #Every solution is (a0 + k*step_a, b0 + k*step_b) for an integer k
+    a0, b0 = x*(target//g), y*(target//g)
+    step_a, step_b = z_j//g, -z_i//g
+
+    lower, upper = -math.inf, math.inf
+    for start, step, minimum in ((a0, step_a, min_a), (b0, step_b, min_b)):
+        bound = (minimum - start)/step
+        if step > 0:
+            lower = max(lower, math.ceil(bound))
+        else:
+            upper = min(upper, math.floor(bound))
+
+    if lower > upper:
+        return None
+
+    #|a| + |b| is convex in k, so its minimum sits next to a kink or on a bound
+    candidates = [k + offset for k in (math.floor(-a0/step_a), math.floor(-b0/step_b)) for offset in (0, 1)]
+    candidates = {min(max(k, lower), upper) for k in candidates}
+    return min(((a0 + k*step_a, b0 + k*step_b) for k in candidates), key = lambda ab: abs(ab[0]) + abs(ab[1]))
+
+
+def solve_count_adjustment(charges, counts):
+    """Smallest change of whole atom counts that makes the system neutral.
+
+    Changes of one or two atom types are searched and the one touching the
+    fewest atoms is returned as a list of per-type count changes. Types with
+    atoms keep at least one.
+    """
+    z = get_integer_charges(charges)
+    target = -sum(charge*count for charge, count in zip(z, counts))
+    if target == 0:
+        return [0]*len(counts)
+
+    floors = [1 if count > 0 else 0 for count in counts]
+
+    best = None
+    for i in range(len(z)):
+        for j in range(i, len(z)):
+            if z[i] == 0 and z[j] == 0:
+                continue
+
+            if i == j or not z[i] or not z[j]:
+                single = i if z[i] else j
+                if target % z[single] or counts[single] + target//z[single] < floors[single]:
+                    continue
+                solution = (target//z[single], 0) if single == i else (0, target//z[single])
+            else:
+                solution = solve_pair(z[i], z[j], target, floors[i] - counts[i], floors[j] - counts[j])
+            if solution is None:
+                continue
+
+            delta = [0]*len(counts)
+            delta[i] += solution[0]
+            delta[j] += solution[1]
+
+            if best is None or sum(map(abs, delta)) < sum(map(abs, best)):
+                best = delta
+
+    if best is None:
+        raise StructgenError("No change of atom counts of up to two types makes the system neutral without removing a type. Use charge:<type> instead.")
+
+    return best
+
+
+def solve_charge(charges, counts, atom_type):
+    """Charge of atom_type that cancels the charge of every other type."""
+    if counts[atom_type] == 0:
+        raise StructgenError(f"Cannot neutralize with the charge of atom type {atom_type + 1}, it has no atoms.")
+
+    rest = get_total_charge(charges, counts) - charges[atom_type]*counts[atom_type]
+    return -rest/counts[atom_type]
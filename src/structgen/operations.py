@@ -0,0 +1,279 @@
+import numpy as np
+
+from structgen import constants
+from structgen import placement
+from structgen.errors import StructgenError
+from structgen.handlers.data import DATA
+from structgen.neighbors import CellList
+
+
+def get_columns(structure):
+    atom_data = structure.get_atom_data()
+    return {attr: np.asarray(atom_data[attr]) for attr in structure.get_atom_attrs()}
+
+
+def get_bonds(structure):
+    if structure.get_atom_style() not in constants.NEED_BONDS:
+        return np.empty((0, 4), dtype = int)
+    return np.asarray(structure.get_bond_data(), dtype = int).reshape(-1, 4)
+
+
+def get_id_attr(columns):
+    return "atom-id" if "atom-id" in columns else "id"
+
+
+def wrap_positions(positions, box):
+    return ((positions @ np.linalg.inv(box)) % 1.0) @ box
+
+
+def get_box_sides(box):
+    return [float(box[i, i]) for i in range(3)], [float(box[1, 0]), float(box[2, 0]), float(box[2, 1])]
+
+
+def build_structure(structure, columns, positions, bonds, masses = None, num_bond_types = None, box = None, seed_sequence = None):
+    """A new DATA with the style of structure, renumbering atoms and bonds from 1."""
+    style = structure.get_atom_style()
+    columns = dict(columns)
+    columns[get_id_attr(columns)] = np.arange(1, len(positions) + 1)
+    columns["x"], columns["y"], columns["z"] = positions.T
+
+    box = structure.get_box_matrix() if box is None else box
+    sides, tilts = get_box_sides(box)
+    bonds = np.column_stack([np.arange(1, len(bonds) + 1), bonds[:, 1:]]) if len(bonds) else None
+    if num_bond_types is None:
+        num_bond_types = structure.get_nbond_types() if style in constants.NEED_BONDS else 0
+
+    result = DATA(
+        style,
+        structure.get_masses() if masses is None else masses,
+        sides,
+        tilts,
+        [columns[attr] for attr in constants.ATOM_STYLE_ATTRS[style]],
+        bonds,
+        num_bond_types,
+        output = structure.get_outfile_name(),
+        boundary = structure.get_boundary(),
+    )
+    result.SEED_SEQUENCE = seed_sequence
+    return result
+
+
+def get_unwrap_images(fractional, molecule_ids):
+    #Image of every atom that puts it next to the first atom of its molecule
+    if molecule_ids is None:
+        return np.zeros(fractional.shape, dtype = int)
+
+    _, first, inverse = np.unique(molecule_ids, return_index = True, return_inverse = True)
+    return -np.round(fractional - fractional[first[inverse.ravel()]]).astype(int)
+
+
+def replicate(structure, counts):
+    """Tile a structure counts[0] x counts[1] x counts[2] times along its cell vectors.
+
+    Copies are built by broadcasting, molecules and bonds of every copy get
+    their own ids. Positions in a data file are wrapped, so molecules are
+    unwrapped around their first atom before tiling. An atom that crossed a
+    periodic face then goes into the neighboring copy while keeping the
+    molecule of its own copy, and every bond joins the minimum images of its
+    partners, as in LAMMPS replicate.
+    """
+    counts = np.asarray(counts, dtype = int)
+    if counts.shape != (3,) or (counts < 1).any():
+        raise StructgenError("Replication needs three positive counts.")
+
+    columns = get_columns(structure)
+    bonds = get_bonds(structure)
+    box = structure.get_box_matrix()
+    natoms = structure.get_natoms()
+
+    fractional = (structure.get_atom_positions() @ np.linalg.inv(box)) % 1.0
+    images = get_unwrap_images(fractional, columns.get("molecule-id"))
+    unwrapped = fractional + images
+
+    shifts = np.indices(counts).reshape(3, -1).T
+    num_copies = len(shifts)
+    atom_shifts = (shifts[:, None, :] + images[None, :, :]) % counts
+    positions = ((fractional[None] + atom_shifts) @ box).reshape(-1, 3)
+
+    copies = dict()
+    for attr, column in columns.items():
+        copies[attr] = np.tile(column, num_copies)
+    if "molecule-id" in columns:
+        copies["molecule-id"] = copies["molecule-id"] + np.repeat(np.arange(num_copies)*columns["molecule-id"].max(), natoms)
+
+    #Bonds still crossing a face after unwrapping, e.g. between molecules, reach into the neighboring copy
+    crossings = -np.round(unwrapped[bonds[:, 3] - 1] - unwrapped[bonds[:, 2] - 1]).astype(int)
+    partner_shifts = (shifts[:, None, :] + crossings[None, :, :]) % counts
+    partner_copies = np.ravel_multi_index(partner_shifts.reshape(-1, 3).T, counts)
+
+    bond_copies = np.tile(bonds, (num_copies, 1))
+    bond_copies[:, 2] += np.repeat(np.arange(num_copies)*natoms, len(bonds))
+    bond_copies[:, 3] += partner_copies*natoms
+
+    return build_structure(structure, copies, positions, bond_copies, box = counts[:, None]*box)
+
+
+def get_clearance(min_dist_specs, num_types):
+    #Pairs that no --min-dist sets keep the default clearance
+    return placement.parse_min_dist([repr(constants.INSERT_MIN_DIST)] + list(min_dist_specs or list()), num_types)
+
+
+def merge(structure, other, offset = None, min_dist = None):
+    """Add the atoms of other to structure, e.g. to put a second phase into a matrix.
+
+    Types, molecules and bond types of other are numbered after those of
+    structure, and other is moved by offset (default: so the centers of both
+    boxes coincide) and wrapped into the box of structure. Atoms of structure
+    closer to an atom of other than the minimum distance are removed, with
+    their whole molecule when the style has molecules.
+    """
+    if structure.get_atom_attrs() != other.get_atom_attrs():
+        raise StructgenError(f"Cannot merge atom style '{other.get_atom_style()}' into '{structure.get_atom_style()}'.")
+
+    box = structure.get_box_matrix()
+    num_types = structure.get_natom_types()
+    total_types = num_types + other.get_natom_types()
+
+    if offset is None:
+        offset = 0.5*(box.sum(axis = 0) - other.get_box_matrix().sum(axis = 0))
+    other_positions = wrap_positions(other.get_atom_positions() + np.asarray(offset, dtype = float), box)
+    positions = structure.get_atom_positions()
+
+    columns, other_columns = get_columns(structure), get_columns(other)
+    other_columns["type"] = other_columns["type"] + num_types
+    types = columns["type"] - 1
+    other_types = other_columns["type"] - 1
+
+    #Carve out the atoms of structure that overlap the added ones
+    cutoffs = get_clearance(min_dist, total_types)
+    keep = np.ones(len(positions), dtype = bool)
+    if len(other_positions) and cutoffs.max() > 0:
+        cells = CellList(box, cutoffs.max(), len(other_positions))
+        cells.insert(np.arange(len(other_positions)), other_positions, other_types)
+        point_ids, _ = cells.find_close(positions, types, cutoffs)
+        keep[point_ids] = False
+
+    bonds = get_bonds(structure)
+    if "molecule-id" in columns:
+        removed_molecules = np.unique(columns["molecule-id"][~keep])
+        keep &= ~np.isin(columns["molecule-id"], removed_molecules)
+
+    #Old ids of kept atoms map to their new ids, bonds of removed atoms go with them
+    new_ids = np.cumsum(keep)
+    bonds = bonds[keep[bonds[:, 2] - 1] & keep[bonds[:, 3] - 1]]
+    bonds[:, 2:] = new_ids[bonds[:, 2:] - 1]
+
+    num_kept = int(keep.sum())
+    num_bond_types = structure.get_nbond_types() if structure.get_atom_style() in constants.NEED_BONDS else 0
+    other_bonds = get_bonds(other) + [0, num_bond_types, num_kept, num_kept]
+
+    merged = dict()
+    for attr, column in columns.items():
+        merged[attr] = np.concatenate([column[keep], other_columns[attr]])
+    if "molecule-id" in columns:
+        kept_molecules = columns["molecule-id"][keep]
+        merged["molecule-id"] = np.concatenate([kept_molecules, other_columns["molecule-id"] + (kept_molecules.max() if num_kept else 0)])
+
+    other_bond_types = other.get_nbond_types() if other.get_atom_style() in constants.NEED_BONDS else 0
+    return build_structure(
+        structure, merged, np.concatenate([positions[keep], other_positions]), np.concatenate([bonds, other_bonds]),
+        masses = list(structure.get_masses()) + list(other.get_masses()),
+        num_bond_types = num_bond_types + other_bond_types,
+    )
+
+
+def insert(structure, masses, counts, charges = None, min_dist = None, seed = None, buffer = 0.0):
+    """Add new atom types at random positions that keep clear of the atoms already present.
+
+    Uses the random insertion of placement.place_random with the existing
+    atoms as occupied sites. Every inserted atom becomes a molecule of its own
+    when the style has molecules.
+    """
+    if len(counts) != len(masses) or (charges is not None and len(charges) != len(masses)):
+        raise StructgenError("Every inserted atom type needs a mass, a count and, if given, a charge.")
+    if any(mass <= 0 for mass in masses) or any(count < 0 for count in counts):
+        raise StructgenError("Inserted atoms need positive masses and non-negative counts.")
+
+    columns = get_columns(structure)
+    if charges is not None and "q" not in columns:
+        raise StructgenError(f"Atom style '{structure.get_atom_style()}' has no charges.")
+
+    box = structure.get_box_matrix()
+    num_types = structure.get_natom_types()
+    seed_sequence = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    rng = np.random.default_rng(seed_sequence)
+
+    new_types = np.repeat(np.arange(num_types, num_types + len(masses)), counts)
+    positions = structure.get_atom_positions()
+    cutoffs = get_clearance(min_dist, num_types + len(masses))
+    periodic = np.array([mode == "p" for mode in structure.get_boundary()])
+    new_positions = placement.place_random(new_types, box, np.where(periodic, 0.0, buffer/100), cutoffs, rng, occupied = (positions, columns["type"] - 1))
+
+    added = {
+        "type": new_types + 1,
+        "q": np.repeat(np.asarray(charges if charges is not None else [constants.DEFAULT_ATOM_CHARGE]*len(masses), dtype = float), counts),
+    }
+    if "molecule-id" in columns:
+        first_molecule = columns["molecule-id"].max() + 1 if len(positions) else 1
+        added["molecule-id"] = np.arange(first_molecule, first_molecule + len(new_types))
+
+    merged = {attr: np.concatenate([column, added[attr]]) if attr in added else column for attr, column in columns.items()}
+    return build_structure(
+        structure, merged, np.concatenate([positions, new_positions]), get_bonds(structure),
+        masses = list(structure.get_masses()) + list(masses),
+        seed_sequence = seed_sequence,
+    )
+
+
+def parse_insert_atoms(atom_args):
+    #Rows of <mass> [<count> [<charge>]] as given with -a
+    masses, counts, charges = list(), list(), list()
+    for row in atom_args:
+        if not 1 <= len(row) <= 3:
+            raise StructgenError(f"Inserted atoms are given as <mass> [<count> [<charge>]]: '{' '.join(row)}'.")
+        try:
+            masses.append(float(row[0]))
+            counts.append(int(row[1]) if len(row) > 1 else constants.DEFAULT_ATOM_COUNT)
+            charges.append(float(row[2]) if len(row) > 2 else constants.DEFAULT_ATOM_CHARGE)
+        except ValueError:
+            raise StructgenError(f"Non-numeric value for an inserted atom: '{' '.join(row)}'.")
+
+    has_charges = any(len(row) > 2 for row in atom_args)
+    return masses, counts, charges if has_charges else None
+
+
+def run_edit(args):
+    """Read a data file, then replicate it, merge another one into it and insert atoms, in that order."""
+    from structgen import api
+    from structgen import readers
+    from structgen import timing
+
+    timings = timing.Timings()
+    with timings.phase("read"):
+        structure = readers.read_lammps(args.input, args.style)
+        other = readers.read_lammps(args.merge, args.style) if args.merge else None
+
+    with timings.phase("edit"):
+        if args.replicate:
+            structure = replicate(structure, args.replicate)
+        if other is not None:
+            structure = merge(structure, other, args.offset, args.min_dist)
+        if args.atom:
+            masses, counts, charges = parse_insert_atoms(args.atom)
+            structure = insert(structure, masses, counts, charges, args.min_dist, args.seed)
+
+    structure.OUTFILE = args.output
+    structure.TIMINGS = timings
+    timings.set_natoms(structure.get_natoms())
+
+    with timings.phase("write"):
+        filename = api.save(structure, args.output, args.format)
+    if args.report:
+        from structgen import quality
+        with timings.phase("report"):
+            api.report(structure, quality.get_report_filename(filename), args.report_cutoff, args.coordination_cutoff)
+
+    if getattr(args, "timings", False):
+        timing.save_timings(timings, timing.get_timings_filename(filename))
+
+    return filename
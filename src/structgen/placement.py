@@ -0,0 +1,342 @@
+import numpy as np
+
+from structgen import constants
+from structgen.errors import StructgenError
+from structgen.neighbors import CellList, SparseCellList, get_face_widths, morton_codes
+
+def apportion(fractions, total):
+    #Largest remainder rounding of fractions*total to whole numbers adding up to total
+    exact = np.asarray(fractions)*total
+    counts = np.floor(exact).astype(int)
+    order = np.argsort(counts - exact, kind = "stable")
+    counts[order[:total - counts.sum()]] += 1
+
+    return counts
+
+
+def parse_min_dist(min_dist_specs, num_types):
+    """Square matrix of minimum separations indexed by zero-based atom types.
+
+    Specs are "<distance>" for every pair or "<type>-<type>:<distance>" for one.
+    """
+    min_dist = np.zeros((num_types, num_types))
+
+    for spec in min_dist_specs:
+        pair_str, _, dist_str = spec.rpartition(":")
+
+        try:
+            dist_val = float(dist_str)
+            if dist_val < 0:
+                raise ValueError
+        except ValueError:
+            raise StructgenError(f"Non‑numeric or negative minimum distance: '{spec}'.")
+
+        if not pair_str:
+            min_dist[:, :] = dist_val
+            continue
+
+        try:
+            type_a, type_b = map(int, pair_str.split("-"))
+            if not (1 <= type_a <= num_types and 1 <= type_b <= num_types):
+                raise ValueError
+        except ValueError:
+            raise StructgenError(f"Minimum distance pair has to be two existing atom types like 1-2: '{spec}'.")
+
+        min_dist[type_a - 1, type_b - 1] = dist_val
+        min_dist[type_b - 1, type_a - 1] = dist_val
+
+    return min_dist
+
+
+def plan_lattice(natoms, sides):
+    """Pick per-axis plane counts that cover natoms with as few spare sites as possible.
+
+    Candidates around the ideal count for every axis are searched together and
+    only those whose spacing stays within MAX_LATTICE_ANISOTROPY between axes
+    are kept, so the grid still matches the box shape.
+    """
+    sides = np.asarray(sides, dtype = float)
+    ideal = sides*(natoms/np.prod(sides))**(1/3)
+
+    #Search x and y around the ideal counts, z follows from covering natoms
+    ranges = [np.arange(max(int(n*0.8), 1), int(np.ceil(n*1.25)) + 2) for n in ideal[:2]]
+    nx, ny = [grid.ravel() for grid in np.meshgrid(*ranges, indexing = "ij")]
+    nz = -(-natoms//(nx*ny)) #Ceiling division
+    counts = np.column_stack([nx, ny, nz])
+
+    spacings = sides/counts
+    anisotropy = spacings.max(axis = 1)/spacings.min(axis = 1)
+    slack = counts.prod(axis = 1) - natoms
+
+    #Least slack among well shaped grids, ties broken by the most even spacing
+    allowed = anisotropy <= constants.MAX_LATTICE_ANISOTROPY
+    if not allowed.any():
+        allowed = anisotropy == anisotropy.min()
+    candidates = np.flatnonzero(allowed)
+    best = candidates[np.lexsort((anisotropy[candidates], slack[candidates]))[0]]
+
+    return counts[best]
+
+
+def choose_stratified_sites(atoms_per_side, natoms, rng):
+    """Choose natoms grid sites so vacancies are spread evenly over the box.
+
+    Sites are ordered along a Morton curve, which keeps consecutive sites
+    spatially close, and the curve is cut into natoms equal strata with one
+    site drawn from each. Returns grid indices of shape (natoms, 3).
+    """
+    grid_indices = get_curve_sites(atoms_per_side)
+    return grid_indices[pick_strata(len(grid_indices), natoms, rng)]
+
+
+def get_curve_sites(atoms_per_side):
+    #Grid indices of every site in Morton curve order
+    grid_indices = np.indices(atoms_per_side).reshape(3, -1).T
+    return grid_indices[np.argsort(morton_codes(grid_indices), kind = "stable")]
+
+
+def pick_strata(num_sites, natoms, rng):
+    """One of num_sites drawn from each of natoms equal strata, in random order."""
+    bounds = (np.arange(natoms + 1)*num_sites)//natoms
+    picks = bounds[:-1] + (rng.random(natoms)*np.diff(bounds)).astype(int)
+
+    #Shuffle so atom order (and hence type) is unrelated to position along the curve
+    return picks[rng.permutation(natoms)]
+
+
+def get_site_coordinates(atoms_per_side, buffer, periodic):
+    """Fractional coordinates of the grid planes along every axis.
+
+    Periodic axes put n planes at (i + 0.5)/n, so the spacing across the
+    boundary equals the one inside the box. Other axes span the box minus
+    buffer at both walls.
+    """
+    buffer = np.broadcast_to(buffer, 3)
+    periodic = np.broadcast_to(periodic, 3)
+
+    return [
+        (np.arange(n) + 0.5)/n if is_periodic else np.linspace(wall, 1 - wall, n)
+        for n, wall, is_periodic in zip(atoms_per_side, buffer, periodic)
+    ]
+
+
+def place_lattice(natoms, box, buffer, rng, periodic = False):
+    """Occupy sites of a grid spanning the box.
+
+    `box` holds the cell vectors as rows, `buffer` the fraction of every
+    cell vector kept empty next to the walls and `periodic` which axes wrap
+    around instead, either for all axes or one value per axis.
+    """
+    atoms_per_side = plan_lattice(natoms, np.diag(box))
+    pos_options = get_site_coordinates(atoms_per_side, buffer, periodic)
+
+    grid_indices = choose_stratified_sites(atoms_per_side, natoms, rng)
+
+    fractional = np.column_stack([pos_options[axis][grid_indices[:, axis]] for axis in range(3)])
+    return fractional @ box
+
+
+def get_plane_rng(seed_sequence, plane):
+    #A stream per z plane keyed by the seed and the plane index alone
+    spawn_key = tuple(seed_sequence.spawn_key) + (constants.LATTICE_PLANE_STREAM, int(plane))
+    return np.random.default_rng(np.random.SeedSequence(seed_sequence.entropy, spawn_key = spawn_key))
+
+
+def place_typed_lattice(counts, box, buffer, seed_sequence, chunk_size, periodic = False):
+    """Occupy a grid spanning the box with typed atoms, one slab of z planes at a time.
+
+    Planes hold an even share of the atoms. Each plane draws its sites,
+    stratified along a Morton curve, and the types of its atoms from the
+    types still left, with a random stream of its own, so the structure is
+    the same however many planes a slab holds. Every slab holds about
+    chunk_size sites, or a single plane when a plane is larger. Yields
+    (types, positions) of one slab each, types one-based.
+    """
+    counts = np.asarray(counts, dtype = np.int64)
+    natoms = int(counts.sum())
+    atoms_per_side = plan_lattice(natoms, np.diag(box))
+    pos_options = get_site_coordinates(atoms_per_side, buffer, periodic)
+
+    nx, ny, nz = atoms_per_side
+    plane_sites = get_curve_sites((nx, ny, 1))
+    plane_atoms = np.diff((np.arange(nz + 1)*natoms)//nz)
+    planes_per_slab = max(chunk_size//(nx*ny), 1)
+
+    remaining = counts.copy()
+    for start in range(0, nz, planes_per_slab):
+        slab_types, slab_sites = list(), list()
+        for plane in range(start, min(start + planes_per_slab, nz)):
+            rng = get_plane_rng(seed_sequence, plane)
+            plane_counts = rng.multivariate_hypergeometric(remaining, plane_atoms[plane])
+            remaining -= plane_counts
+
+            sites = plane_sites[pick_strata(len(plane_sites), plane_atoms[plane], rng)]
+            sites[:, 2] = plane
+            #Sites come shuffled, so types can follow in blocks
+            slab_types.append(np.repeat(np.arange(1, len(counts) + 1), plane_counts))
+            slab_sites.append(sites)
+
+        grid_indices = np.concatenate(slab_sites)
+        fractional = np.column_stack([pos_options[axis][grid_indices[:, axis]] for axis in range(3)])
+        yield np.concatenate(slab_types), fractional @ box
+
+
+def place_random(types, box, buffer, cutoffs, rng, batch_size = constants.RANDOM_BATCH_SIZE, occupied = None):
+    """Random sequential insertion honoring per-type-pair minimum distances.
+
+    Candidates are proposed in batches and tested against already placed atoms
+    through a cell list, then against each other, so every round costs
+    O(batch) regardless of how many atoms are already in the box.
+    `types` holds zero-based type indices into the `cutoffs` matrix, `box`
+    and `buffer` are the same as for place_lattice, where a zero buffer
+    draws over the whole periodic axis. `occupied` optionally
+    holds (positions, types) of atoms that are already in the box.
+    """
+    natoms = len(types)
+
+    if natoms == 0 or cutoffs.max() <= 0:
+        return rng.uniform(buffer, 1 - buffer, size = (natoms, 3)) @ box
+
+    positions = np.empty((natoms, 3))
+    num_occupied = 0 if occupied is None else len(occupied[0])
+    placed = CellList(box, cutoffs.max(), natoms + num_occupied)
+    if num_occupied:
+        placed.insert(np.arange(natoms, natoms + num_occupied), *occupied)
+
+    pending = np.arange(natoms)
+    stalled_rounds = 0
+    while pending.size:
+        batch = pending[:batch_size]
+        candidates = rng.uniform(buffer, 1 - buffer, size = (len(batch), 3)) @ box
+        batch_types = types[batch]
+
+        accepted = ~placed.has_conflict(candidates, batch_types, cutoffs)
+
+        #Resolve clashes inside the batch by keeping the earlier candidate of each pair
+        survivors = np.flatnonzero(accepted)
+        local = SparseCellList(box, cutoffs.max(), candidates[survivors], batch_types[survivors])
+        point_ids, neighbor_ids = local.find_close(candidates[survivors], batch_types[survivors], cutoffs)
+        accepted[survivors[point_ids[neighbor_ids < point_ids]]] = False
+
+        new_atoms = batch[accepted]
+        positions[new_atoms] = candidates[accepted]
+        placed.insert(new_atoms, candidates[accepted], batch_types[accepted])
+
+        if new_atoms.size:
+            stalled_rounds = 0
+        else:
+            stalled_rounds += 1
+            if stalled_rounds >= constants.MAX_STALLED_ROUNDS:
+                raise StructgenError(
+                    f"Random placement stalled with {pending.size} atoms left to place. "
+                    "Lower --min-dist or the density."
+                )
+
+        pending = np.concatenate([batch[~accepted], pending[len(batch):]])
+
+    return positions
+
+
+def random_rotations(num, rng):
+    """Uniformly distributed rotation matrices of shape (num, 3, 3).
+
+    Built from uniform random unit quaternions (Shoemake's method).
+    """
+    u1, u2, u3 = rng.random((3, num))
+    w = np.sqrt(1 - u1)*np.sin(2*np.pi*u2)
+    x = np.sqrt(1 - u1)*np.cos(2*np.pi*u2)
+    y = np.sqrt(u1)*np.sin(2*np.pi*u3)
+    z = np.sqrt(u1)*np.cos(2*np.pi*u3)
+
+    return np.stack([
+        np.stack([1 - 2*(y*y + z*z), 2*(x*y - z*w), 2*(x*z + y*w)], axis = -1),
+        np.stack([2*(x*y + z*w), 1 - 2*(x*x + z*z), 2*(y*z - x*w)], axis = -1),
+        np.stack([2*(x*z - y*w), 2*(y*z + x*w), 1 - 2*(x*x + y*y)], axis = -1),
+    ], axis = 1)
+
+
+def place_rigid(shapes, mol_shapes, types, box, buffer, cutoffs, rng, lattice = False, batch_size = constants.RANDOM_BATCH_SIZE, periodic = False):
+    """Insert randomly rotated copies of rigid molecule shapes.
+
+    `shapes` holds centered template coordinates, `mol_shapes` the shape index
+    of every molecule and `types` the zero-based types of all their atoms in
+    molecule order. Molecules whose atoms come closer than `cutoffs` to atoms
+    of other molecules are rejected and proposed again. With `lattice`
+    centers start on grid sites and only the rotation is redrawn a few times
+    before a molecule moves to a random center. As for single atoms, only
+    axes that are not `periodic` keep `buffer` free, there whole molecules
+    stay that far from the walls. Atoms sticking out of a periodic face are
+    wrapped back in, overlaps are checked with the minimum image anyway.
+    Returns atom positions.
+    """
+    mol_shapes = np.asarray(mol_shapes)
+    num_molecules = len(mol_shapes)
+
+    mol_sizes = np.array([len(shape) for shape in shapes])[mol_shapes]
+    mol_starts = np.r_[0, np.cumsum(mol_sizes)[:-1]]
+    local = np.concatenate([shapes[shape] for shape in mol_shapes]) if num_molecules else np.empty((0, 3))
+
+    positions = np.empty((len(local), 3))
+    placed = CellList(box, cutoffs.max(), len(local))
+    inverse_box = np.linalg.inv(box)
+
+    #Fraction of every cell vector kept free around the centers of each shape
+    periodic = np.broadcast_to(periodic, 3)
+    radii = np.array([np.linalg.norm(shape, axis = 1).max() if len(shape) else 0.0 for shape in shapes])
+    margins = np.where(periodic, 0.0, np.broadcast_to(buffer, 3) + radii[:, None]/get_face_widths(box))
+    if (margins >= 0.5).any():
+        raise StructgenError("Molecule templates do not fit between the walls of the non-periodic axes. Enlarge the box or lower --buffer.")
+
+    sites = place_lattice(num_molecules, box, margins.max(axis = 0), rng, periodic) if lattice and num_molecules else None
+    tries = np.zeros(num_molecules, dtype = int)
+
+    pending = np.arange(num_molecules)
+    stalled_rounds = 0
+    while pending.size:
+        batch = pending[:batch_size]
+
+        batch_margins = margins[mol_shapes[batch]]
+        centers = rng.uniform(batch_margins, 1 - batch_margins) @ box
+        if sites is not None:
+            on_site = tries[batch] < constants.MAX_ROTATION_TRIES
+            centers[on_site] = sites[batch[on_site]]
+        rotations = random_rotations(len(batch), rng)
+
+        #Atoms of the batch, each tagged with the position of its molecule in the batch
+        sizes = mol_sizes[batch]
+        owners = np.repeat(np.arange(len(batch)), sizes)
+        atoms = np.repeat(mol_starts[batch] - np.r_[0, np.cumsum(sizes)[:-1]], sizes) + np.arange(sizes.sum())
+        candidates = centers[owners] + np.einsum("nij,nj->ni", rotations[owners], local[atoms])
+        fractional = candidates @ inverse_box
+        fractional[:, periodic] %= 1.0
+        candidates = fractional @ box
+
+        rejected = np.zeros(len(batch), dtype = bool)
+        point_ids, _ = placed.find_close(candidates, types[atoms], cutoffs)
+        rejected[owners[point_ids]] = True
+
+        #Resolve clashes between molecules of the batch by keeping the earlier one
+        survivors = np.flatnonzero(~rejected[owners])
+        batch_cells = SparseCellList(box, cutoffs.max(), candidates[survivors], types[atoms][survivors])
+        point_ids, neighbor_ids = batch_cells.find_close(candidates[survivors], types[atoms][survivors], cutoffs)
+        point_owners, neighbor_owners = owners[survivors[point_ids]], owners[survivors[neighbor_ids]]
+        rejected[np.maximum(point_owners, neighbor_owners)[point_owners != neighbor_owners]] = True
+
+        accepted_atoms = ~rejected[owners]
+        positions[atoms[accepted_atoms]] = candidates[accepted_atoms]
+        placed.insert(atoms[accepted_atoms], candidates[accepted_atoms], types[atoms][accepted_atoms])
+        tries[batch[rejected]] += 1
+
+        if rejected.all():
+            stalled_rounds += 1
+            if stalled_rounds >= constants.MAX_STALLED_ROUNDS:
+                raise StructgenError(
+                    f"Rigid insertion stalled with {pending.size} molecules left to place. "
+                    "Lower --min-dist or the density."
+                )
+        else:
+            stalled_rounds = 0
+
+        pending = np.concatenate([batch[rejected], pending[len(batch):]])
+
+    return positions
@@ -0,0 +1,174 @@
+import os
+import json
+
+import numpy as np
+
+from structgen import constants
+from structgen.neighbors import get_face_widths, iter_neighbor_pairs
+
+
+def get_report_filename(output):
+    root, _ = os.path.splitext(output)
+    return root + constants.REPORT_SUFFIX
+
+
+def get_pair_index(num_types):
+    #Index of every unordered type pair, numbered along the upper triangle
+    first, second = np.triu_indices(num_types)
+    index = np.zeros((num_types, num_types), dtype = int)
+    index[first, second] = np.arange(len(first))
+    index[second, first] = np.arange(len(first))
+
+    return index, first, second
+
+
+def accumulate_pairs(positions, types, num_types, box, cutoff, coordination_cutoff, num_bins):
+    """Walk all pairs within cutoff once, one chunk at a time.
+
+    Returns the minimum distance and the RDF histogram of every unordered type
+    pair, the number of neighbors within coordination_cutoff and the nearest
+    neighbor distance of every atom. Only one chunk of pairs is held at a time.
+    """
+    natoms = len(positions)
+    pair_index, pair_first, _ = get_pair_index(num_types)
+    num_pairs = len(pair_first)
+
+    min_dist = np.full(num_pairs, np.inf)
+    rdf_counts = np.zeros(num_pairs*num_bins, dtype = np.int64)
+    coordination = np.zeros(natoms, dtype = np.int64)
+    nearest = np.full(natoms, np.inf)
+
+    for first, second, distances in iter_neighbor_pairs(positions, box, cutoff):
+        pairs = pair_index[types[first], types[second]]
+        np.minimum.at(min_dist, pairs, distances)
+
+        bins = np.minimum((distances*(num_bins/cutoff)).astype(int), num_bins - 1)
+        rdf_counts += np.bincount(pairs*num_bins + bins, minlength = num_pairs*num_bins)
+
+        close = distances < coordination_cutoff
+        np.add.at(coordination, first[close], 1)
+        np.add.at(coordination, second[close], 1)
+
+        np.minimum.at(nearest, first, distances)
+        np.minimum.at(nearest, second, distances)
+
+    return min_dist, rdf_counts.reshape(num_pairs, num_bins), coordination, nearest
+
+
+def get_partial_rdf(rdf_counts, type_counts, volume, cutoff):
+    #Pair counts over the counts an ideal gas of the same composition puts in every shell
+    num_types = len(type_counts)
+    _, pair_first, pair_second = get_pair_index(num_types)
+
+    edges = np.linspace(0, cutoff, rdf_counts.shape[1] + 1)
+    shells = 4/3*np.pi*np.diff(edges**3)
+
+    counts_a, counts_b = type_counts[pair_first], type_counts[pair_second]
+    ideal_pairs = np.where(pair_first == pair_second, counts_a*(counts_a - 1)/2, counts_a*counts_b)
+    ideal = ideal_pairs[:, None]*shells[None, :]/volume
+
+    rdf = np.divide(rdf_counts, ideal, out = np.zeros(rdf_counts.shape), where = ideal > 0)
+    return 0.5*(edges[1:] + edges[:-1]), rdf
+
+
+def get_local_density(positions, box, cell_size):
+    """Atom counts of a grid of about cell_size wide cells, summarized by their spread.
+
+    A dispersion (variance over mean) of 1 is what uncorrelated random points
+    give, values well above 1 point to clusters and voids.
+    """
+    ncells = np.maximum((get_face_widths(box)//cell_size).astype(int), 1)
+    cells = np.floor(((positions @ np.linalg.inv(box)) % 1.0)*ncells).astype(int) % ncells
+    counts = np.bincount(np.ravel_multi_index(cells.T, ncells), minlength = int(np.prod(ncells)))
+
+    mean = counts.mean()
+    variance = counts.var()
+    return {
+        "cells": ncells.tolist(),
+        "cell_volume": abs(np.linalg.det(box))/counts.size,
+        "mean_atoms": mean,
+        "variance": variance,
+        "relative_std": np.sqrt(variance)/mean if mean > 0 else None,
+        "dispersion": variance/mean if mean > 0 else None,
+    }
+
+
+def finite_or_none(value):
+    #JSON has no infinity, pairs that never come within the cutoff are reported as null
+    return float(value) if np.isfinite(value) else None
+
+
+def get_report(handler, cutoff = constants.REPORT_CUTOFF, coordination_cutoff = None, num_bins = constants.REPORT_RDF_BINS):
+    """Quality statistics of a generated structure as a JSON-ready dict.
+
+    Holds the minimum distance and partial RDF of every type pair up to
+    cutoff, per-type coordination histograms within coordination_cutoff
+    (default: the mean atomic spacing), nearest neighbor distances and the
+    spread of the local density. Pairs are found with a periodic cell list,
+    so the cost grows linearly with the number of atoms.
+    """
+    atom_data = handler.get_atom_data()
+    positions = handler.get_atom_positions()
+    types = np.asarray(atom_data["type"], dtype = int) - 1
+    box = handler.get_box_matrix()
+
+    natoms = len(positions)
+    num_types = handler.get_natom_types()
+    volume = abs(np.linalg.det(box))
+    type_counts = np.bincount(types, minlength = num_types)
+
+    #Beyond half the box width the minimum image would miss pairs
+    cutoff = min(cutoff, 0.5*get_face_widths(box).min())
+    if coordination_cutoff is None:
+        coordination_cutoff = (volume/max(natoms, 1))**(1/3)
+    coordination_cutoff = min(coordination_cutoff, cutoff)
+
+    min_dist, rdf_counts, coordination, nearest = accumulate_pairs(positions, types, num_types, box, cutoff, coordination_cutoff, num_bins)
+    radii, rdf = get_partial_rdf(rdf_counts, type_counts, volume, cutoff)
+
+    _, pair_first, pair_second = get_pair_index(num_types)
+    pairs = list()
+    for i, (type_a, type_b) in enumerate(zip(pair_first, pair_second)):
+        pairs.append({
+            "types": [int(type_a) + 1, int(type_b) + 1],
+            "min_distance": finite_or_none(min_dist[i]),
+            "rdf": rdf[i].tolist(),
+        })
+
+    coordination_stats = dict()
+    for atom_type in range(num_types):
+        members = coordination[types == atom_type]
+        coordination_stats[str(atom_type + 1)] = {
+            "mean": float(members.mean()) if len(members) else None,
+            "histogram": np.bincount(members).tolist(),
+        }
+
+    found = np.isfinite(nearest)
+    seed_sequence = getattr(handler, "SEED_SEQUENCE", None)
+    return {
+        "atom_style": handler.get_atom_style(),
+        "natoms": natoms,
+        "seed": seed_sequence.entropy if seed_sequence is not None else None,
+        "cutoff": cutoff,
+        "coordination_cutoff": coordination_cutoff,
+        "min_distance": finite_or_none(min_dist.min()) if len(min_dist) else None,
+        "pairs": pairs,
+        "rdf_radii": radii.tolist(),
+        "coordination": coordination_stats,
+        "nearest_neighbor": {
+            "min": finite_or_none(nearest[found].min()) if found.any() else None,
+            "mean": float(nearest[found].mean()) if found.any() else None,
+            "std": float(nearest[found].std()) if found.any() else None,
+            "max": float(nearest[found].max()) if found.any() else None,
+            "isolated": int(natoms - found.sum()),
+        },
+        "local_density": get_local_density(positions, box, cutoff),
+    }
+
+
+def save_report(handler, filename, cutoff = constants.REPORT_CUTOFF, coordination_cutoff = None):
+    report = get_report(handler, cutoff, coordination_cutoff)
+    with open(filename, "w") as file:
+        json.dump(report, file, indent = 2)
+
+    return report
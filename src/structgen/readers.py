@@ -0,0 +1,169 @@
+import re
+import gzip
+import warnings
+
+import numpy as np
+
+from structgen import constants
+from structgen.errors import StructgenError
+from structgen.handlers.data import DATA
+
+#Sections start with a word, header keywords follow numbers. Finding line starts first keeps the scan fast.
+SECTION_START_PATTERN = re.compile(r"\n[ \t]*[A-Za-z]")
+SECTION_PATTERN = re.compile(r"[ \t]*([A-Za-z][A-Za-z0-9 ]*?)[ \t]*(?:#[ \t]*(\S*)[^\n]*)?(?=\n|$)")
+COUNT_PATTERN = re.compile(
+    r"^\s*(\d+)\s+(atoms|bonds|angles|dihedrals|impropers|ellipsoids|lines|triangles|bodies|crossterms"
+    r"|(?:atom|bond|angle|dihedral|improper) types|extra (?:bond|angle|dihedral|improper|special) per atom)\s*$"
+)
+BOUNDS_PATTERN = re.compile(r"^\s*(\S+)\s+(\S+)\s+(xlo xhi|ylo yhi|zlo zhi)\s*$")
+TILT_PATTERN = re.compile(r"^\s*(\S+)\s+(\S+)\s+(\S+)\s+xy xz yz\s*$")
+COMMENT_PATTERN = re.compile(r"#[^\n]*")
+BOUNDARY_PATTERN = re.compile(r"#\s*Boundary:\s*([pfs])\s+([pfs])\s+([pfs])\s*$", re.MULTILINE)
+
+
+def read_text(filename):
+    try:
+        if filename.endswith(".gz"):
+            with gzip.open(filename, "rt") as file:
+                return file.read()
+        with open(filename) as file:
+            return file.read()
+    except OSError as err:
+        raise StructgenError(f"Cannot read data file '{filename}': {err.strerror or err}.")
+
+
+def split_sections(text):
+    """Header text and a {name: (style comment, body text)} mapping of the sections."""
+    #The first line is always a comment, it may hold anything
+    first_newline = text.find("\n") + 1
+    matches = list()
+    for start in SECTION_START_PATTERN.finditer(text, first_newline - 1):
+        match = SECTION_PATTERN.match(text, start.start() + 1)
+        if not match:
+            raise StructgenError(f"Cannot parse data file line: '{text[start.start() + 1:].partition(chr(10))[0]}'.")
+        matches.append(match)
+
+    sections = dict()
+    for match, next_match in zip(matches, matches[1:] + [None]):
+        end = next_match.start() if next_match else len(text)
+        sections[match[1]] = (match[2], text[match.end():end])
+
+    header_end = matches[0].start() if matches else len(text)
+    return text[first_newline:header_end], sections
+
+
+def parse_header(header):
+    counts = dict()
+    bounds = dict()
+    tilts = [0.0]*3
+
+    for line in COMMENT_PATTERN.sub("", header).splitlines():
+        if not line.strip():
+            continue
+        if match := COUNT_PATTERN.match(line):
+            counts[match[2]] = int(match[1])
+        elif match := BOUNDS_PATTERN.match(line):
+            bounds[match[3][0]] = (float(match[1]), float(match[2]))
+        elif match := TILT_PATTERN.match(line):
+            tilts = [float(match[i]) for i in range(1, 4)]
+        else:
+            raise StructgenError(f"Unknown data file header line: '{line.strip()}'.")
+
+    if "atoms" not in counts or len(bounds) < 3:
+        raise StructgenError("Data file header needs the number of atoms and the xlo xhi, ylo yhi and zlo zhi bounds.")
+
+    return counts, [bounds[axis] for axis in "xyz"], tilts
+
+
+def parse_boundary(header):
+    #Data files carry no boundary, structgen notes it in a header comment
+    match = BOUNDARY_PATTERN.search(header)
+    return [match[i] for i in range(1, 4)] if match else list(constants.DEFAULT_BOUNDARY)
+
+
+def parse_table(body, num_rows, name):
+    """Rows of a numeric section as a 2D float array, parsed in one call."""
+    body = COMMENT_PATTERN.sub("", body)
+    first_row = re.search(r"\S[^\n]*", body)
+    num_cols = len(first_row[0].split()) if first_row else 0
+
+    values = np.fromstring(body, sep = " ")
+    if num_cols == 0 or values.size != num_rows*num_cols:
+        raise StructgenError(f"{name} section has {values.size} values, expected {num_rows} rows of {num_cols}.")
+
+    return values.reshape(num_rows, num_cols)
+
+
+def get_atom_style(style_comment, num_cols, atom_style):
+    #The style named in the file wins, then the one given, then the column count
+    style = style_comment or atom_style
+    if style is None:
+        styles = [name for name, attrs in constants.ATOM_STYLE_ATTRS.items() if num_cols in (len(attrs), len(attrs) + 3)]
+        if len(styles) != 1:
+            raise StructgenError(f"Cannot tell the atom style from {num_cols} Atoms columns. Give the style explicitly.")
+        style = styles[0]
+
+    if style not in constants.ATOM_STYLE_ATTRS:
+        raise StructgenError(f"Unsupported atom style '{style}'. Choices: {', '.join(constants.ATOM_STYLE_ATTRS)}.")
+
+    if num_cols not in (len(constants.ATOM_STYLE_ATTRS[style]), len(constants.ATOM_STYLE_ATTRS[style]) + 3):
+        raise StructgenError(f"Atoms section has {num_cols} columns, which does not match atom style '{style}'.")
+
+    return style
+
+
+def read_lammps(filename, atom_style = None):
+    """Read a LAMMPS data file into a DATA structure.
+
+    Sections are located with one regular expression over the whole file and
+    parsed as bulk NumPy arrays. The box is moved to the origin, positions
+    are wrapped into it and image flags are dropped. Atoms are renumbered
+    1..N in id order and bonds follow them. Sections other than Masses,
+    Atoms and Bonds are skipped with a warning.
+    """
+    header, sections = split_sections(read_text(filename))
+    counts, bounds, tilts = parse_header(header)
+    boundary = parse_boundary(header)
+
+    for required in ("Masses", "Atoms"):
+        if required not in sections:
+            raise StructgenError(f"Data file '{filename}' has no {required} section.")
+
+    skipped = [name for name in sections if name not in ("Masses", "Atoms", "Bonds")]
+    if skipped:
+        warnings.warn(f"Skipped data file sections: {', '.join(skipped)}.")
+
+    num_types = counts.get("atom types")
+    masses = parse_table(sections["Masses"][1], num_types, "Masses") if num_types else None
+    if masses is None or masses.shape[1] != 2:
+        raise StructgenError("Masses section needs one 'type mass' row per atom type.")
+    masses = masses[np.argsort(masses[:, 0])][:, 1].tolist()
+
+    natoms = counts["atoms"]
+    style_comment, atoms_body = sections["Atoms"]
+    atoms = parse_table(atoms_body, natoms, "Atoms")
+    style = get_atom_style(style_comment, atoms.shape[1], atom_style)
+    attrs = constants.ATOM_STYLE_ATTRS[style]
+    atoms = atoms[np.argsort(atoms[:, 0], kind = "stable"), :len(attrs)]
+
+    origin = np.array([low for low, _ in bounds])
+    sides = [high - low for low, high in bounds]
+    box = np.array([[sides[0], 0, 0], [tilts[0], sides[1], 0], [tilts[1], tilts[2], sides[2]]])
+    positions = ((atoms[:, -3:] - origin) @ np.linalg.inv(box)) % 1.0 @ box
+
+    old_ids = atoms[:, 0].astype(np.int64)
+    columns = [np.arange(1, natoms + 1)] + [atoms[:, i] for i in range(1, len(attrs) - 3)] + list(positions.T)
+
+    bonds = None
+    if style in constants.NEED_BONDS and counts.get("bonds"):
+        if "Bonds" not in sections:
+            raise StructgenError(f"Data file '{filename}' lists {counts['bonds']} bonds but has no Bonds section.")
+        bonds = parse_table(sections["Bonds"][1], counts["bonds"], "Bonds").astype(np.int64)
+
+        #Bond partners follow the renumbered atoms
+        partners = np.searchsorted(old_ids, bonds[:, 2:])
+        if (partners >= natoms).any() or (old_ids[np.minimum(partners, natoms - 1)] != bonds[:, 2:]).any():
+            raise StructgenError("Bonds section refers to atom ids missing from the Atoms section.")
+        bonds = np.column_stack([np.arange(1, len(bonds) + 1), bonds[:, 1], partners + 1])
+
+    return DATA(style, masses, sides, tilts, columns, bonds, counts.get("bond types", 0), boundary = boundary)
@@ -0,0 +1,205 @@
+import os
+import csv
+import json
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from structgen import api
+from structgen import constants
+from structgen.errors import StructgenError
+
+
+def parse_list(value, convert):
+    #CSV cells hold whitespace or comma separated values, JSON may hold real lists
+    if isinstance(value, str):
+        value = value.replace(",", " ").split()
+    return [convert(item) for item in value]
+
+
+def parse_min_dist(value):
+    if isinstance(value, (int, float)):
+        return float(value)
+    return parse_list(value, str)
+
+
+def parse_atoms(value):
+    """Parse "mass count [charge]; ..." or a list of such entries into masses, counts and charges."""
+    entries = value.split(";") if isinstance(value, str) else value
+    entries = [entry.split() if isinstance(entry, str) else list(entry) for entry in entries]
+    entries = [entry for entry in entries if entry]
+
+    if not entries or any(not 1 <= len(entry) <= 3 for entry in entries):
+        raise StructgenError(f"Atoms have to be given as 'mass [count [charge]]' entries separated by ';': '{value}'.")
+
+    try:
+        masses = [float(entry[0]) for entry in entries]
+        counts = [int(entry[1]) if len(entry) > 1 else constants.DEFAULT_ATOM_COUNT for entry in entries]
+        charges = [float(entry[2]) if len(entry) > 2 else constants.DEFAULT_ATOM_CHARGE for entry in entries]
+    except ValueError:
+        raise StructgenError(f"Non-numeric atom entry: '{value}'.")
+
+    has_charges = any(len(entry) > 2 for entry in entries)
+    return {"masses": masses, "counts": counts, "charges": charges if has_charges else None}
+
+
+COLUMNS = {
+    "atoms": parse_atoms,
+    "composition": str,
+    "natoms": int,
+    "density": float,
+    "style": str,
+    "buffer": float,
+    "factor": int,
+    "seed": int,
+    "placement": str,
+    "min_dist": parse_min_dist,
+    "sort": str,
+    "lx": float,
+    "ly": float,
+    "lz": float,
+    "aspect": lambda value: parse_list(value, float),
+    "tilt": lambda value: parse_list(value, float),
+    "boundary": lambda value: parse_list(value, str),
+    "auto_neutralize": str,
+    "output": str,
+    "format": str,
+}
+
+
+def read_table(path):
+    """Rows of a CSV file with a header line or of a JSON list of objects, as dicts."""
+    try:
+        with open(path, newline = "") as file:
+            if os.path.splitext(path)[1].lower() == ".json":
+                rows = json.load(file)
+                rows = rows.get("rows") if isinstance(rows, dict) else rows
+            else:
+                rows = list(csv.DictReader(file))
+    except OSError as err:
+        raise StructgenError(f"Cannot read sweep table '{path}': {err.strerror}.")
+    except ValueError as err:
+        raise StructgenError(f"Cannot parse sweep table '{path}': {err}.")
+
+    if not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows):
+        raise StructgenError(f"Sweep table '{path}' has to hold a list of rows.")
+
+    return rows
+
+
+def parse_row(row, index):
+    #Empty CSV cells fall back to the defaults
+    options = dict()
+    for column, value in row.items():
+        column = column.strip().replace("-", "_")
+        if column not in COLUMNS:
+            raise StructgenError(f"Row {index + 1}: unknown column '{column}'. Columns: {', '.join(COLUMNS)}.")
+        if value is None or (isinstance(value, str) and not value.strip()):
+            continue
+
+        try:
+            options[column] = COLUMNS[column](value.strip() if isinstance(value, str) else value)
+        except (TypeError, ValueError) as err:
+            raise StructgenError(f"Row {index + 1}: bad value for '{column}': {value!r} ({err}).")
+
+    options.update(options.pop("atoms", dict()))
+    if "density" not in options:
+        raise StructgenError(f"Row {index + 1}: every row needs a density.")
+
+    return options
+
+
+def get_row_filename(output_dir, output, index, num_rows):
+    root, ext = os.path.splitext(output)
+    width = len(str(num_rows))
+    return os.path.join(output_dir, f"{root}_{index + 1:0{width}d}{ext}")
+
+
+def generate_row(task):
+    """Generate and save the structure of one table row, returning its manifest entry.
+
+    With cache settings (directory, size in bytes) the row is looked up in
+    the cache first, and its manifest entry is stored along with the file.
+    """
+    index, options, filename, output_format, seed, cache_settings = task
+    options = dict(options, seed = options.get("seed", seed))
+
+    cache_key = None
+    if cache_settings:
+        from structgen import cache
+        cache_key = cache.get_cache_key(dict(options, command = "sweep", format = output_format))
+        entry = cache.fetch(cache_settings[0], cache_key, filename)
+        if entry is not None:
+            return dict(entry, row = index + 1, output = filename)
+
+    try:
+        handler = api.generate(**options)
+        api.save(handler, filename, output_format)
+    except StructgenError as err:
+        raise StructgenError(f"Row {index + 1}: {err}")
+
+    entry = {
+        "row": index + 1,
+        "output": filename,
+        "format": output_format,
+        "style": handler.get_atom_style(),
+        "natoms": handler.get_natoms(),
+        "box": list(handler.get_sim_region_sides()),
+        "tilt": list(handler.get_tilt_factors()),
+    }
+    if cache_key:
+        cache.store(cache_settings[0], cache_key, filename, metadata = entry, max_bytes = cache_settings[1])
+
+    return entry
+
+
+def run_sweep(args):
+    """Generate one structure per table row and write a JSON manifest next to them."""
+    if args.jobs < 1:
+        raise StructgenError("Number of jobs must be a positive integer.")
+
+    rows = read_table(args.table)
+    os.makedirs(args.output_dir, exist_ok = True)
+
+    #Rows without a seed get independent child streams of one root seed
+    root = np.random.SeedSequence(args.seed)
+    seeds = root.spawn(len(rows))
+
+    cache_settings = None
+    if getattr(args, "cache", False):
+        from structgen import cache
+        cache_settings = (args.cache_dir or cache.get_cache_dir(), args.cache_size*2**20)
+
+    tasks = list()
+    uncached = 0
+    for index, (row, seed) in enumerate(zip(rows, seeds)):
+        options = parse_row(row, index)
+        output_format = options.pop("format", args.format)
+        output = options.pop("output", None)
+        filename = os.path.join(args.output_dir, output) if output else get_row_filename(args.output_dir, args.output, index, len(rows))
+
+        #Seeds spawned from fresh entropy never repeat, so only rows with a given seed are cached
+        reproducible = "seed" in options or args.seed is not None
+        uncached += bool(cache_settings) and not reproducible
+        tasks.append((index, options, filename, output_format, seed, cache_settings if reproducible else None))
+
+    if uncached:
+        warnings.warn(f"{uncached} of {len(tasks)} rows have no seed and no -s root seed is given, they are generated without the cache.")
+
+    if args.jobs == 1:
+        structures = [generate_row(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers = min(args.jobs, len(tasks) or 1)) as pool:
+            structures = list(pool.map(generate_row, tasks, chunksize = max(len(tasks)//(4*args.jobs), 1)))
+
+    manifest = {
+        "table": os.path.abspath(args.table),
+        "seed": root.entropy,
+        "structures": structures,
+    }
+    manifest_path = os.path.join(args.output_dir, args.manifest)
+    with open(manifest_path, "w") as file:
+        json.dump(manifest, file, indent = 2)
+
+    return manifest_path
@@ -0,0 +1,133 @@
+import os
+import sys
+import json
+import time
+import contextlib
+
+try:
+    import resource
+except ImportError:
+    #Not available on Windows, peak memory is then reported as null
+    resource = None
+
+from structgen import constants
+
+
+def get_timings_filename(output):
+    root, _ = os.path.splitext(output)
+    return root + constants.TIMINGS_SUFFIX
+
+
+def get_peak_memory():
+    """Peak resident set size of the process so far in MiB, None where it is not reported."""
+    if resource is None:
+        return None
+
+    #Linux reports KiB, macOS bytes
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak/2**20 if sys.platform == "darwin" else peak/2**10
+
+
+class Timings:
+    """Wall time, peak memory and throughput of the phases of one run.
+
+    A phase costs two clock reads and one getrusage call, so timings stay
+    cheap enough to leave on in batch jobs. Phases may repeat, e.g. once per
+    formatted chunk, and add up. Time spent in a nested phase is not counted
+    again for the phase around it.
+    """
+
+    def __init__(self):
+        self.PHASES = dict()
+        self.NESTED = list() #Seconds of nested phases, one entry per open phase
+        self.START = time.perf_counter()
+        self.NATOMS = None
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        self.NESTED.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            nested = self.NESTED.pop()
+            if self.NESTED:
+                self.NESTED[-1] += elapsed
+
+            entry = self.PHASES.setdefault(name, {"seconds": 0.0, "calls": 0})
+            entry["seconds"] += elapsed - nested
+            entry["calls"] += 1
+            entry["peak_memory_mib"] = get_peak_memory()
+
+    def set_natoms(self, natoms):
+        self.NATOMS = natoms
+
+    def get_total_seconds(self):
+        return time.perf_counter() - self.START
+
+    def get_report(self):
+        total = self.get_total_seconds()
+        phases = list()
+        for name, entry in self.PHASES.items():
+            seconds = entry["seconds"]
+            phases.append({
+                "name": name,
+                "seconds": seconds,
+                "fraction": seconds/total if total > 0 else None,
+                "calls": entry["calls"],
+                "atoms_per_second": self.NATOMS/seconds if self.NATOMS and seconds > 0 else None,
+                "peak_memory_mib": entry["peak_memory_mib"],
+            })
+
+        return {
+            "natoms": self.NATOMS,
+            "total_seconds": total,
+            "atoms_per_second": self.NATOMS/total if self.NATOMS and total > 0 else None,
+            "peak_memory_mib": get_peak_memory(),
+            "phases": phases,
+        }
+
+    def format_table(self, report = None):
+        report = self.get_report() if report is None else report
+
+        def cell(value, fmt, scale = 1):
+            return "-" if value is None else fmt % (scale*value)
+
+        lines = [f"{'phase':<12}{'seconds':>10}{'share':>8}{'atoms/s':>12}{'peak MiB':>10}"]
+        for phase in report["phases"] + [dict(report, name = "total", seconds = report["total_seconds"], fraction = 1.0)]:
+            lines.append(
+                f"{phase['name']:<12}{phase['seconds']:>10.3f}{cell(phase['fraction'], '%.1f%%', 100):>8}"
+                f"{cell(phase['atoms_per_second'], '%.3g'):>12}{cell(phase['peak_memory_mib'], '%.1f'):>10}"
+            )
+
+        return "\n".join(lines)
+
+
+def get_phase(handler, name):
+    #Writers time their formatting only for handlers that carry timings
+    timings = getattr(handler, "TIMINGS", None)
+    return timings.phase(name) if timings is not None else contextlib.nullcontext()
+
+
+def save_timings(timings, filename):
+    """Write the timings as JSON and print them as a table to stderr."""
+    report = timings.get_report()
+    with open(filename, "w") as file:
+        json.dump(report, file, indent = 2)
+
+    print(timings.format_table(report), file = sys.stderr)
+    return report
+
+
+def run_profiled(function, args, filename):
+    """Run function(args) under cProfile and dump the statistics to filename for pstats or snakeviz."""
+    import cProfile
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        return function(args)
+    finally:
+        profiler.disable()
+        profiler.dump_stats(filename)
@@ -0,0 +1,285 @@
+import re
+import numpy as np
+
+from structgen import constants
+from structgen.errors import StructgenError
+from structgen.neighbors import get_face_widths, iter_neighbor_pairs
+
+def parse_bonds(bond_args, intermol_args, num_types):
+    """Parse -b <type pair> [<count>] entries and the --intermol split.
+
+    Returns bond type pairs and the intramolecular and intermolecular bond
+    counts of every bond type.
+    """
+    bond_pairs = list()
+    bond_counts = list()
+
+    for bond_data in bond_args:
+        num_attrs = len(bond_data)
+
+        if num_attrs > 2:
+            raise StructgenError(f"Too many per-bond arguments ({num_attrs}).")
+
+        pair_str = bond_data[0]
+        try:
+            b_types = list(map(int, re.sub(r'\s+', '', pair_str).split("-")))
+            if len(b_types) != 2 or not all(1 <= b_type <= num_types for b_type in b_types):
+                raise ValueError
+        except ValueError:
+            raise StructgenError(f"Atom types making up a bond have to be two existing atom types like 1-2: '{pair_str}'.")
+
+        bond_pairs.append(b_types)
+
+        if num_attrs >= 2:
+            count_str = bond_data[1]
+
+            if count_str.isdigit():
+                bond_counts.append(int(count_str))
+            else:
+                raise StructgenError(f"Non-numeric value for bond count {count_str}")
+
+        else:
+            bond_counts.append(constants.DEFAULT_BOND_COUNT)
+
+    if len(intermol_args) > len(bond_counts):
+        raise StructgenError("Please make sure that no extra --intermol parameters are provided.")
+
+    intermol = list(intermol_args) + [0]*(len(bond_counts) - len(intermol_args))
+    for i, inter in enumerate(intermol):
+        if not 0 <= inter <= bond_counts[i]:
+            raise StructgenError(f"Cannot make {inter} bonds intermolecular. Only {bond_counts[i]} bonds of this type requested.")
+
+    intramol = [count - inter for count, inter in zip(bond_counts, intermol)]
+
+    return bond_pairs, intramol, intermol
+
+
+def get_molecule_layout(sequences, molecule_counts, type_counts):
+    """Atom types and molecule ids with every molecule occupying consecutive atom ids.
+
+    `sequences` holds the atom types of one molecule of every kind in order.
+    Molecules come first in the order they were specified, atoms left outside
+    of molecules follow and get a molecule id of their own.
+    """
+    type_blocks = list()
+    size_blocks = list()
+    atoms_left = np.array(type_counts)
+
+    for template, mol_count in zip(sequences, molecule_counts):
+        template = np.asarray(template)
+        type_blocks.append(np.tile(template, mol_count))
+        size_blocks.append(np.full(mol_count, len(template)))
+        np.subtract.at(atoms_left, template - 1, mol_count)
+
+    leftover = np.repeat(np.arange(1, len(type_counts) + 1), atoms_left)
+    type_blocks.append(leftover)
+    size_blocks.append(np.ones(len(leftover), dtype = int))
+
+    types = np.concatenate(type_blocks).astype(int)
+    mol_sizes = np.concatenate(size_blocks)
+    mol_ids = np.repeat(np.arange(1, len(mol_sizes) + 1), mol_sizes)
+
+    return types, mol_ids
+
+
+def get_pair_ranks(first, second):
+    """How many earlier pairs share the first and the second atom of every pair."""
+    ends = np.r_[first, second]
+    order = np.lexsort((np.r_[np.arange(len(first)), np.arange(len(second))], ends))
+    sorted_ends = ends[order]
+    starts = np.flatnonzero(np.r_[True, sorted_ends[1:] != sorted_ends[:-1]])
+    ranks = np.empty(len(ends), dtype = int)
+    ranks[order] = np.arange(len(ends)) - np.repeat(starts, np.diff(np.r_[starts, len(ends)]))
+
+    return ranks[:len(first)], ranks[len(first):]
+
+
+def take_within_valence(first, second, slots, count):
+    """Indices of the earliest pairs, at most count, that leave no atom with more bonds than slots.
+
+    Pairs are accepted in rounds, a pair is taken when both atoms still have
+    a free slot after every earlier pair of the round, so the first pair of a
+    round is always taken. `slots` is updated in place.
+    """
+    chosen = list()
+    candidates = np.arange(len(first))
+
+    while count and len(candidates):
+        candidates = candidates[(slots[first[candidates]] > 0) & (slots[second[candidates]] > 0)]
+        first_ranks, second_ranks = get_pair_ranks(first[candidates], second[candidates])
+        fits = (first_ranks < slots[first[candidates]]) & (second_ranks < slots[second[candidates]])
+
+        accepted = candidates[fits][:count]
+        np.subtract.at(slots, first[accepted], 1)
+        np.subtract.at(slots, second[accepted], 1)
+        chosen.append(accepted)
+        count -= len(accepted)
+        candidates = candidates[~fits]
+
+    return np.sort(np.concatenate(chosen)) if chosen else np.empty(0, dtype = int)
+
+
+def select_bonds(first, second, distances, types, mol_ids, bond_pairs, intramol, intermol, slots):
+    """Greedily take the shortest matching pairs for every bond type.
+
+    No atom takes more bonds than its entry in `slots`.
+    Returns the bond rows found and the intramolecular and intermolecular
+    bonds still missing of every bond type.
+    """
+    order = np.argsort(distances, kind = "stable")
+    first, second = first[order], second[order]
+
+    first_types, second_types = types[first], types[second]
+    same_molecule = mol_ids[first] == mol_ids[second]
+    used = np.zeros(len(first), dtype = bool)
+    slots = np.array(slots)
+
+    bonds = list()
+    missing = np.zeros((len(bond_pairs), 2), dtype = int)
+    for bond_type, (type_a, type_b) in enumerate(bond_pairs):
+        matches = ((first_types == type_a) & (second_types == type_b)) | ((first_types == type_b) & (second_types == type_a))
+
+        for group_index, (group, count) in enumerate(((same_molecule, intramol[bond_type]), (~same_molecule, intermol[bond_type]))):
+            pairs = np.flatnonzero(matches & group & ~used)
+            chosen = pairs[take_within_valence(first[pairs], second[pairs], slots, count)]
+            missing[bond_type, group_index] = count - len(chosen)
+            used[chosen] = True
+            bonds.append(np.column_stack([np.full(len(chosen), bond_type + 1), first[chosen] + 1, second[chosen] + 1]))
+
+    bonds = np.concatenate(bonds) if bonds else np.empty((0, 3), dtype = int)
+
+    return bonds, missing
+
+
+def get_type_valences(type_counts, bond_pairs, bond_counts):
+    """Bonds per atom of every type, indexed by type: its share of the requested bond ends, rounded up."""
+    ends = np.zeros(len(type_counts) + 1, dtype = int)
+    for (type_a, type_b), count in zip(bond_pairs, bond_counts):
+        ends[type_a] += count
+        ends[type_b] += count
+
+    return -(-ends // np.maximum(np.r_[1, type_counts], 1))
+
+
+def get_bond_slots(types, bond_pairs, bond_counts, fixed_bonds):
+    """Bonds every atom can still take besides its template bonds."""
+    num_types = max(types.max(initial = 0), np.max(bond_pairs, initial = 0))
+    valences = get_type_valences(np.bincount(types, minlength = num_types + 1)[1:], bond_pairs, bond_counts)
+    fixed_degrees = np.bincount(fixed_bonds[:, 1:].ravel(), minlength = len(types))
+
+    return np.maximum(valences[types] - fixed_degrees, 0)
+
+
+def check_open_slots(missing, slots, found, types, mol_ids, bond_pairs):
+    """Raise when the atoms with free slots cannot take the missing bonds at any cutoff."""
+    left = slots - np.bincount(found[:, 1:].ravel() - 1, minlength = len(types))
+    open_atoms = np.flatnonzero(left > 0)
+    num_types = max(types.max(initial = 0), np.max(bond_pairs, initial = 0))
+    type_slots = np.bincount(types[open_atoms], weights = left[open_atoms], minlength = num_types + 1)
+
+    for bond_type, (type_a, type_b) in enumerate(bond_pairs):
+        needed = missing[bond_type].sum()
+        if not needed:
+            continue
+
+        if type_a == type_b:
+            short = type_slots[type_a] < 2*needed
+        else:
+            short = min(type_slots[type_a], type_slots[type_b]) < needed
+
+        #Intramolecular bonds need free slots on both types within one molecule
+        if missing[bond_type, 0] and not short:
+            holders_a = mol_ids[open_atoms[types[open_atoms] == type_a]]
+            if type_a == type_b:
+                short = not (np.unique(holders_a, return_counts = True)[1] >= 2).any()
+            else:
+                short = not np.isin(mol_ids[open_atoms[types[open_atoms] == type_b]], holders_a).any()
+
+        if short:
+            raise StructgenError(
+                f"Atoms of types {type_a} and {type_b} have no free valence left for {needed} more bonds of type {bond_type + 1}. "
+                "Check the bond counts, molecules and --intermol counts."
+            )
+
+
+def check_fixed_bonds(fixed_bonds, types, bond_pairs, intramol):
+    """Validate template bonds and return the intramolecular counts they leave over."""
+    fixed_types = fixed_bonds[:, 0]
+    if fixed_types.size and (fixed_types.min() < 1 or fixed_types.max() > len(bond_pairs)):
+        raise StructgenError(f"Template bonds use bond types up to {fixed_types.max()} but {len(bond_pairs)} bond types were requested.")
+
+    atom_pairs = np.sort(types[fixed_bonds[:, 1:]], axis = 1)
+    expected = np.sort(np.asarray(bond_pairs, dtype = int).reshape(-1, 2), axis = 1)[fixed_types - 1]
+    if np.any(atom_pairs != expected):
+        raise StructgenError("Template bonds have to join the atom types given for their bond type.")
+
+    fixed_counts = np.bincount(fixed_types - 1, minlength = len(bond_pairs))
+    for bond_type, (count, requested) in enumerate(zip(fixed_counts, intramol)):
+        if count > requested:
+            raise StructgenError(f"Templates hold {count} bonds of type {bond_type + 1} but only {requested} intramolecular bonds of that type were requested.")
+
+    return [requested - count for requested, count in zip(intramol, fixed_counts)]
+
+
+def find_close_pairs(positions, box, cutoff):
+    """All atom pairs i < j within cutoff as (i, j, distance) arrays.
+
+    Cells as wide as the cutoff with a half stencil visit every pair once,
+    which suits the short bond search radius.
+    """
+    first, second, distances = list(), list(), list()
+    for chunk_first, chunk_second, chunk_distances in iter_neighbor_pairs(positions, box, cutoff, chunk_size = 65536, reach = 1):
+        first.append(np.minimum(chunk_first, chunk_second))
+        second.append(np.maximum(chunk_first, chunk_second))
+        distances.append(chunk_distances)
+
+    if not first:
+        return np.empty(0, dtype = int), np.empty(0, dtype = int), np.empty(0)
+
+    return np.concatenate(first), np.concatenate(second), np.concatenate(distances)
+
+
+def assign_bonds(positions, types, mol_ids, box, bond_pairs, intramol, intermol, cutoff, fixed_bonds = None):
+    """Build the Bonds section from nearby atom pairs.
+
+    Candidate pairs come from a half-stencil cell search. When they cannot cover every
+    requested bond the search radius doubles, up to constants.MAX_BOND_LENGTH,
+    and an error is raised as soon as the atoms with free valence cannot
+    take the missing bonds. No atom gets more bonds than the valence of its
+    type. `fixed_bonds` holds (bond type, atom, atom) rows with zero-based
+    atom indices that are taken as they are and count towards the
+    intramolecular bonds.
+    Returns an int array of rows (bond id, bond type, atom1 id, atom2 id).
+    """
+    fixed_bonds = np.empty((0, 3), dtype = int) if fixed_bonds is None else np.asarray(fixed_bonds, dtype = int)
+    slots = get_bond_slots(types, bond_pairs, [inter + intra for inter, intra in zip(intermol, intramol)], fixed_bonds)
+    intramol = check_fixed_bonds(fixed_bonds, types, bond_pairs, intramol)
+    fixed_keys = np.sort(fixed_bonds[:, 1:], axis = 1) @ [len(positions), 1]
+
+    bonds = fixed_bonds + [0, 1, 1]
+    if sum(intramol) + sum(intermol) == 0:
+        return np.column_stack([np.arange(1, len(bonds) + 1), bonds]).astype(int)
+
+    max_cutoff = min(constants.MAX_BOND_LENGTH, 0.5*get_face_widths(box).min())
+    cutoff = min(cutoff, max_cutoff)
+
+    while True:
+        first, second, distances = find_close_pairs(positions, box, cutoff)
+
+        #Pairs bonded by a template are not offered again
+        free = ~np.isin(first*len(positions) + second, fixed_keys)
+        found, missing = select_bonds(first[free], second[free], distances[free], types, mol_ids, bond_pairs, intramol, intermol, slots)
+        if not missing.any():
+            break
+
+        check_open_slots(missing, slots, found, types, mol_ids, bond_pairs)
+        if cutoff >= max_cutoff:
+            raise StructgenError(
+                f"Could not find atom pairs within {max_cutoff:.3g} Angstrom for {missing.sum()} of the requested bonds. "
+                "Check the bond types, molecules and --intermol counts, or raise the density."
+            )
+        cutoff = min(2*cutoff, max_cutoff)
+
+    bonds = np.concatenate([bonds, found])
+    bond_ids = np.arange(1, len(bonds) + 1)
+    return np.column_stack([bond_ids, bonds]).astype(int)
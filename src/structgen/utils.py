@@ -1,4 +1,5 @@
 import argparse
+import re
 import sys
 
 
@@ -41,6 +42,10 @@ class NoMetavarHelpFormatter(argparse.RawDescriptionHelpFormatter):
         get_metavar = self._metavar_formatter(action, default_metavar)
         return "%s" % get_metavar(1)
 
+    def _format_actions_usage(self, actions, groups):
+        #Empty metavars leave double spaces that break argparse's usage line wrapping
+        return re.sub(r" {2,}", " ", super()._format_actions_usage(actions, groups)).strip()
+
 
 class ErrorHandlingParser(argparse.ArgumentParser):
     def __init__(self, *args, **kwargs):
@@ -51,3 +56,6 @@ class ErrorHandlingParser(argparse.ArgumentParser):
         self.print_help()
         sys.exit(2)
 
+
+def format_warning(message, *args, **kwargs):
+    return f"WARNING! {message}\n"
@@ -0,0 +1,216 @@
+import gzip
+import numpy as np
+
+from structgen import constants
+from structgen import elements
+from structgen import timing
+from structgen.errors import StructgenError
+
+def gen_header(handler):
+    handler_style = handler.get_atom_style()
+
+    header = str()
+    header += "#Generated by structgen utility git@github.com:superde1fin/structgen.git\n"
+    header += f"#Boundary: {' '.join(handler.get_boundary())}\n\n" #For the boundary command of the input script
+
+    header += f"{handler.get_natoms()} atoms\n"
+    if handler_style in constants.NEED_BONDS:
+        header += f"{handler.get_nbonds()} bonds\n"
+
+    header += f"{handler.get_natom_types()} atom types\n"
+    if handler_style in constants.NEED_BONDS:
+        header += f"{handler.get_nbond_types()} bond types\n"
+
+    sides = handler.get_sim_region_sides()
+    header += f"\n0 {sides[0]} xlo xhi"
+    header += f"\n0 {sides[1]} ylo yhi"
+    header += f"\n0 {sides[2]} zlo zhi"
+    if handler.is_triclinic():
+        tilts = handler.get_tilt_factors()
+        header += f"\n{tilts[0]} {tilts[1]} {tilts[2]} xy xz yz"
+
+    header += "\n\n"
+    header += "Masses\n\n"
+
+    for i, mass in enumerate(handler.get_masses()):
+        header += f"{i + 1} {mass}\n"
+
+    return header
+
+
+def get_column_formats(atom_data):
+    #Integer fields are printed as such, float fields with the digits their dtype holds
+    formats = list()
+    for name in atom_data.dtype.names:
+        kind = atom_data.dtype[name]
+        if kind.kind in "iu":
+            formats.append(constants.INT_FORMAT)
+        elif kind == np.float32:
+            formats.append(constants.COMPACT_FLOAT_FORMAT)
+        else:
+            formats.append(constants.FLOAT_FORMAT)
+
+    return formats
+
+
+def format_column(values, fmt):
+    """Strings of one column, formatting every distinct value only once.
+
+    Types, charges and lattice coordinates repeat a lot, so formatting the
+    distinct values and gathering them is much cheaper than formatting each
+    element.
+    """
+    unique, inverse = np.unique(values, return_inverse = True)
+    if 2*len(unique) <= len(values):
+        strings = np.array([fmt % value for value in unique.tolist()], dtype = object)
+        return strings[inverse.ravel()].tolist()
+
+    return list(map(fmt.__mod__, values.tolist()))
+
+
+def format_rows(columns, formats):
+    #Columns are formatted in bulk and only joined row by row at the end
+    strings = [format_column(column, fmt) for column, fmt in zip(columns, formats)]
+    return "".join(" ".join(row) + "\n" for row in zip(*strings))
+
+
+def write_atom_rows(handler, file, species = None):
+    #`species` holds a name per atom type that is written as a leading column
+    atom_data = handler.get_atom_data()
+    formats = (["%s"] if species is not None else list()) + get_column_formats(atom_data)
+    chunk_size = handler.get_chunk_size()
+
+    #Format a bounded number of rows at a time so memory does not grow with the box
+    for start in range(0, len(atom_data), chunk_size):
+        block = atom_data[start:start + chunk_size]
+        columns = [block[name] for name in atom_data.dtype.names]
+        if species is not None:
+            columns = [species[block["type"] - 1]] + columns
+        with timing.get_phase(handler, "format"):
+            text = format_rows(columns, formats)
+        file.write(text)
+
+
+def write_atoms(handler, file):
+    column_headers = ' '.join(handler.get_atom_attrs())
+    file.write("\n\n")
+    file.write(f"#Attributes: {column_headers}\n")
+    file.write(f"Atoms # {handler.get_atom_style()}\n\n")
+
+    write_atom_rows(handler, file)
+
+
+def write_bonds(handler, file):
+    column_headers = " ".join(handler.get_bond_attrs())
+    file.write("\n\n")
+    file.write(f"Bonds # {column_headers}\n\n")
+
+    bond_data = np.asarray(handler.get_bond_data(), dtype = int)
+    chunk_size = handler.get_chunk_size()
+
+    for start in range(0, len(bond_data), chunk_size):
+        block = bond_data[start:start + chunk_size]
+        with timing.get_phase(handler, "format"):
+            text = format_rows(block.T, [constants.INT_FORMAT]*block.shape[1])
+        file.write(text)
+
+
+def write_lammps(handler, file):
+    file.write(gen_header(handler))
+    write_atoms(handler, file)
+
+    if handler.get_atom_style() in constants.NEED_BONDS:
+        write_bonds(handler, file)
+
+
+def save_lammps(handler, filename):
+    with open(filename, "w") as file:
+        write_lammps(handler, file)
+
+
+def save_lammps_gz(handler, filename):
+    with gzip.open(filename, "wt") as file:
+        write_lammps(handler, file)
+
+
+def save_lammps_zst(handler, filename):
+    try:
+        import zstandard
+    except ImportError:
+        raise StructgenError("Writing zstd-compressed output requires the zstandard package (pip install zstandard).")
+
+    with zstandard.open(filename, "wt") as file:
+        write_lammps(handler, file)
+
+
+def get_metadata(handler):
+    return {
+        "atom_style": handler.get_atom_style(),
+        "atom_attrs": np.array(handler.get_atom_attrs()),
+        "masses": np.asarray(handler.get_masses()),
+        "box": np.asarray(handler.get_sim_region_sides()),
+        "tilt": np.asarray(handler.get_tilt_factors()),
+        "boundary": np.array(handler.get_boundary()),
+    }
+
+
+def save_npz(handler, filename):
+    #Write through a file handle so numpy does not append its own extension
+    with open(filename, "wb") as file:
+        np.savez(file, atom_data = handler.get_atom_data(), **get_metadata(handler))
+
+
+def save_hdf5(handler, filename):
+    try:
+        import h5py
+    except ImportError:
+        raise StructgenError("Writing hdf5 output requires the h5py package (pip install h5py).")
+
+    with h5py.File(filename, "w") as file:
+        file.create_dataset("atom_data", data = handler.get_atom_data())
+        for key, value in get_metadata(handler).items():
+            if key == "atom_style":
+                file.attrs[key] = value
+            elif key in ("atom_attrs", "boundary"):
+                file.attrs[key] = list(value)
+            else:
+                file.create_dataset(key, data = value)
+
+
+def get_species(handler):
+    """Element symbol of every atom type, from the composition or matched by mass."""
+    symbols = getattr(handler, "ELEMENTS", None) or [elements.guess_symbol(mass) for mass in handler.get_masses()]
+    return np.array([symbol or constants.UNKNOWN_SPECIES for symbol in symbols], dtype = object)
+
+
+def get_extxyz_properties(handler):
+    indices_to_int = handler.get_int_atom_indices()
+    properties = ["species:S:1"]
+    for i, attr in enumerate(handler.get_atom_attrs()):
+        if attr in ("x", "y", "z"):
+            continue
+        kind = "I" if i in indices_to_int else "R"
+        properties.append(f"{attr.replace('-', '_')}:{kind}:1")
+    properties.append("pos:R:3")
+
+    return ":".join(properties)
+
+
+def save_extxyz(handler, filename):
+    lattice = " ".join(str(x) for x in handler.get_box_matrix().ravel())
+    pbc = " ".join("T" if mode == "p" else "F" for mode in handler.get_boundary())
+
+    with open(filename, "w") as file:
+        file.write(f"{handler.get_natoms()}\n")
+        file.write(f'Lattice="{lattice}" Properties={get_extxyz_properties(handler)} pbc="{pbc}"\n')
+        write_atom_rows(handler, file, species = get_species(handler))
+
+
+FORMATS = {
+    "lammps": save_lammps,
+    "lammps.gz": save_lammps_gz,
+    "lammps.zst": save_lammps_zst,
+    "npz": save_npz,
+    "hdf5": save_hdf5,
+    "extxyz": save_extxyz,
+}
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+import structgen
+from structgen import StructgenError
+
+def test_generate_returns_structure_in_memory():
+    handler = structgen.generate([28.085, 16.00], [10, 20], [2.4, -1.2], density=2.2, seed=1)
+    data = handler.get_atom_data()
+    assert handler.get_atom_style() == "charge"
+    assert data.shape == (30,)
+    assert np.allclose(np.unique(data["q"]), [-1.2, 2.4])
+    assert handler.get_atom_data() is data
+
+def test_generate_raises_instead_of_exiting():
+    with pytest.raises(StructgenError):
+        structgen.generate([-1.0], [10], density=2.2)
+    with pytest.raises(StructgenError):
+        structgen.generate([28.085], [10], [1.0], density=2.2, style="atomic")
+
+@pytest.mark.parametrize("density", [0, -1.0])
+def test_generate_rejects_non_positive_density(density):
+    with pytest.raises(StructgenError, match="Density"):
+        structgen.generate([28.085, 16.00], [10, 20], density=density, style="atomic")
+
+def test_generate_rejects_zero_atoms():
+    with pytest.raises(StructgenError, match="No atoms"):
+        structgen.generate([28.085, 16.00], [0, 0], density=2.2, style="atomic")
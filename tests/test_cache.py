@@ -0,0 +1,47 @@
+import os
+import time
+
+import numpy as np
+import pytest
+
+from structgen import cache
+
+def test_key_normalizes_inputs_and_needs_a_seed():
+    base = {"command": "charge", "atom": [["28.085", "100", "2.4"]], "density": 2.2, "seed": 1}
+    assert cache.get_cache_key(base) == cache.get_cache_key(dict(base, atom=[["28.0850", "100", "2.40"]]))
+    assert cache.get_cache_key(base) != cache.get_cache_key(dict(base, seed=2))
+    assert cache.get_cache_key(base) != cache.get_cache_key(dict(base, seed=np.random.SeedSequence(1).spawn(2)[1]))
+    with pytest.warns(UserWarning, match="seed"):
+        assert cache.get_cache_key(dict(base, seed=None)) is None
+
+def test_store_copies_and_fetch_checks_hash(tmp_path):
+    source = tmp_path / "a.data"
+    source.write_text("structure")
+    cache.store(str(tmp_path / "cache"), "key", str(source), metadata={"natoms": 3})
+
+    #The entry is a read-only copy, edits of the original output leave it alone
+    source.write_text("edited!!!")
+    assert cache.fetch(str(tmp_path / "cache"), "missing", str(tmp_path / "b.data")) is None
+    assert cache.fetch(str(tmp_path / "cache"), "key", str(tmp_path / "b.data")) == {"natoms": 3}
+    assert (tmp_path / "b.data").read_text() == "structure"
+    assert not os.stat(tmp_path / "cache" / "key" / "structure").st_mode & 0o222
+
+    #A same-size change of the entry, as root can make through a hardlink, drops it
+    entry_file = tmp_path / "cache" / "key" / "structure"
+    os.chmod(entry_file, 0o644)
+    entry_file.write_text("STRUCTURE")
+    assert cache.fetch(str(tmp_path / "cache"), "key", str(tmp_path / "c.data")) is None
+    assert not (tmp_path / "cache" / "key").exists()
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    for key in ("a", "b", "c"):
+        (tmp_path / key).write_bytes(b"x"*1000)
+        cache.store(cache_dir, key, str(tmp_path / key), max_bytes=10**4)
+        time.sleep(0.01)
+
+    cache.fetch(cache_dir, "a", str(tmp_path / "out"))
+    (tmp_path / "d").write_bytes(b"x"*1000)
+    cache.store(cache_dir, "d", str(tmp_path / "d"), max_bytes=3500)
+
+    assert sorted(os.listdir(cache_dir)) == ["a", "c", "d"]
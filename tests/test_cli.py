@@ -6,3 +6,105 @@ def test_help_runs():
     result = subprocess.run(["python", "-m", "structgen.cli", "--help"], capture_output=True, text=True)
     assert result.returncode == 0
     assert "usage:" in result.stdout.lower()
+
+def test_charge_writes_structure(tmp_path):
+    """Generate a small charge structure and check the Atoms section."""
+    outfile = tmp_path / "out.structure"
+    result = subprocess.run(
+        ["python", "-m", "structgen.cli", "charge", "-a", "28.085", "-a", "16.00", "2", "-1.2", "-d", "2.2", "-f", "10", "-o", str(outfile)],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0
+    text = outfile.read_text()
+    assert "30 atoms" in text
+    rows = text.split("Atoms # charge\n\n")[1].strip().splitlines()
+    assert len(rows) == 30
+    assert rows[-1].split()[:3] == ["30", "2", "-1.2"]
+
+def test_replica_filenames_are_numbered():
+    from structgen.cli import get_replica_filename
+    assert get_replica_filename("glass.structure", 0, 12) == "glass_01.structure"
+    assert get_replica_filename("out/glass", 11, 12) == "out/glass_12"
+
+@pytest.mark.parametrize("style", ["atomic", "charge", "full", "molecular", "sweep", "edit"])
+def test_subcommand_help_runs(style):
+    """Subcommand help has a long usage line that has to wrap cleanly."""
+    result = subprocess.run(["python", "-m", "structgen.cli", style, "--help"], capture_output=True, text=True)
+    assert result.returncode == 0
+    assert "usage:" in result.stdout
+
+def test_sweep_writes_one_structure_per_row(tmp_path):
+    """A sweep table produces numbered structures and a manifest."""
+    import json
+
+    table = tmp_path / "table.csv"
+    table.write_text("composition,natoms,density,seed\n70SiO2-30Na2O,300,2.4,\n80SiO2-20Na2O,300,2.5,7\n")
+    result = subprocess.run(
+        ["python", "-m", "structgen.cli", "sweep", str(table), "--output-dir", str(tmp_path / "out"), "-s", "1", "-j", "2"],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0
+
+    manifest = json.loads((tmp_path / "out" / "manifest.json").read_text())
+    assert [entry["row"] for entry in manifest["structures"]] == [1, 2]
+    for entry in manifest["structures"]:
+        assert "300 atoms" in open(entry["output"]).read()
+
+def test_report_is_written_next_to_output(tmp_path):
+    """--report writes <output>.report.json beside the structure."""
+    import json
+
+    result = subprocess.run(
+        ["python", "-m", "structgen.cli", "atomic", "-a", "28.085", "300", "-d", "2.2", "-o", str(tmp_path / "si.structure"), "--report"],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0
+    report = json.loads((tmp_path / "si.report.json").read_text())
+    assert report["natoms"] == 300
+
+def test_timings_and_profile_are_written(tmp_path):
+    """--timings writes a per-phase JSON breakdown and --profile a cProfile dump."""
+    import json
+    import pstats
+
+    result = subprocess.run(
+        ["python", "-m", "structgen.cli", "full", "-a", "28.085", "30", "-a", "16.00", "60", "-d", "2.2", "-o", str(tmp_path / "si.structure"),
+         "--timings", "--profile", str(tmp_path / "si.prof")],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0
+    timings = json.loads((tmp_path / "si.timings.json").read_text())
+    assert [phase["name"] for phase in timings["phases"]] == ["setup", "placement", "format", "write"]
+    assert timings["natoms"] == 90
+    assert "placement" in result.stderr
+    assert pstats.Stats(str(tmp_path / "si.prof")).total_calls > 0
+
+def test_edit_replicates_a_data_file(tmp_path):
+    """edit reads a written structure back and tiles it."""
+    seed = tmp_path / "seed.data"
+    subprocess.run(["python", "-m", "structgen.cli", "atomic", "-a", "28.085", "50", "-d", "2.2", "-o", str(seed)], check=True)
+    result = subprocess.run(
+        ["python", "-m", "structgen.cli", "edit", str(seed), "--replicate", "2", "2", "2", "-a", "16.00", "10", "-s", "1", "-o", str(tmp_path / "big.data")],
+        capture_output=True, text=True,
+    )
+    assert result.returncode == 0
+    text = (tmp_path / "big.data").read_text()
+    assert "410 atoms" in text and "2 atom types" in text
+
+def test_parsing_skips_heavy_imports():
+    """Argument parsing must not import NumPy, the handlers or the writers."""
+    code = (
+        "import sys\n"
+        "sys.argv = ['structgen', 'charge', '-a', '28.085', '-d', '2.2']\n"
+        "from structgen import cli\n"
+        "cli.parse_args()\n"
+        "heavy = [name for name in ('numpy', 'structgen.handlers.atomic', 'structgen.writers') if name in sys.modules]\n"
+        "print(','.join(heavy))\n"
+    )
+    result = subprocess.run(["python", "-c", code], capture_output=True, text=True)
+    assert result.returncode == 0
+    assert result.stdout.strip() == ""
+
+def test_format_choices_match_writers():
+    from structgen import constants, writers
+    assert constants.OUTPUT_FORMATS == list(writers.FORMATS)
@@ -0,0 +1,34 @@
+import pytest
+
+from structgen import api
+from structgen import composition
+from structgen.errors import StructgenError
+
+def test_composition_matches_mol_percent_and_target():
+    rows, elements = composition.get_atom_rows("70SiO2-20Na2O-10CaO", 500000)
+    counts = dict(zip(elements, (int(row[1]) for row in rows)))
+    charges = dict(zip(elements, (float(row[2]) for row in rows)))
+
+    assert elements == ["Si", "O", "Na", "Ca"]
+    assert abs(sum(counts.values()) - 500000) <= 2
+    assert counts["Si"]/(counts["Na"]/2) == pytest.approx(70/20, rel = 1e-3)
+    assert charges == {"Si": 2.4, "O": -1.2, "Na": 0.6, "Ca": 1.2}
+    assert sum(counts[element]*charges[element] for element in elements) == pytest.approx(0, abs = 1e-6)
+
+def test_oxidation_state_follows_the_formula():
+    rows, elements = composition.get_atom_rows("80SiO2-20FeO", 1000)
+    assert float(rows[elements.index("Fe")][2]) == 1.2
+
+    with pytest.raises(StructgenError):
+        composition.get_atom_rows("80FeO-20Fe2O3", 1000)
+
+@pytest.mark.parametrize("composition_str", ["70SiO2-30Xx2O", "SiO2-Na2O", "70SiO2-"])
+def test_composition_rejects_bad_input(composition_str):
+    with pytest.raises(StructgenError):
+        composition.get_atom_rows(composition_str, 1000)
+
+def test_generate_from_composition():
+    handler = api.generate(composition = "75SiO2-25Na2O", natoms = 300, density = 2.4, seed = 1)
+    assert handler.get_atom_style() == "charge"
+    assert handler.ELEMENTS == ["Si", "O", "Na"]
+    assert abs(handler.get_natoms() - 300) <= 2
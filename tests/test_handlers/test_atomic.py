@@ -0,0 +1,156 @@
+import numpy as np
+from types import SimpleNamespace
+from structgen.handlers.atomic import ATOMIC
+
+def make_args(**overrides):
+    args = dict(
+        atom=[["28.085", "100"], ["16.00", "200"]],
+        density=2.2,
+        buffer=5.0,
+        factor=1,
+        output="test.structure",
+    )
+    args.update(overrides)
+    return SimpleNamespace(**args)
+
+def test_atomic_positions_are_unique_sites():
+    handler = ATOMIC(make_args())
+    data = handler.get_atom_data()
+    assert data.shape == (300,)
+    assert data.dtype.names == ("id", "type", "x", "y", "z")
+    assert len(np.unique(handler.get_atom_positions(), axis=0)) == 300
+    assert np.array_equal(data["id"], np.arange(1, 301))
+    assert np.bincount(data["type"])[1:].tolist() == [100, 200]
+
+def test_random_placement_honors_min_dist():
+    handler = ATOMIC(make_args(placement="random", min_dist=["1.5", "1-1:2.5"]))
+    data = handler.get_atom_data()
+    side = handler.get_sim_region_sides()[0]
+    positions = handler.get_atom_positions()
+    types = data["type"] - 1
+
+    deltas = positions[:, None, :] - positions[None, :, :]
+    deltas -= side*np.round(deltas/side)
+    dist = np.sqrt((deltas**2).sum(axis=-1))
+    np.fill_diagonal(dist, np.inf)
+
+    assert (dist >= handler.MIN_DIST[types[:, None], types[None, :]]).all()
+
+def test_same_seed_reproduces_structure():
+    for placement in ("lattice", "random"):
+        first = ATOMIC(make_args(seed=42, placement=placement, min_dist=["1.2"])).get_atom_data()
+        second = ATOMIC(make_args(seed=42, placement=placement, min_dist=["1.2"])).get_atom_data()
+        other = ATOMIC(make_args(seed=43, placement=placement, min_dist=["1.2"])).get_atom_data()
+        assert np.array_equal(first, second)
+        assert not np.array_equal(first, other)
+
+def test_box_sides_are_solved_from_density():
+    cube = ATOMIC(make_args())
+    slab = ATOMIC(make_args(lx=8.0, aspect=[1, 1, 2]))
+    lx, ly, lz = slab.get_sim_region_sides()
+    assert lx == 8.0
+    assert np.isclose(lz, 2*ly)
+    assert np.isclose(lx*ly*lz, np.prod(cube.get_sim_region_sides()))
+
+def test_triclinic_random_placement_stays_in_cell():
+    handler = ATOMIC(make_args(placement="random", min_dist=["1.5"], tilt=[0.3, -0.2, 0.1], seed=3))
+    box = handler.get_box_matrix()
+    fractional = handler.get_atom_positions() @ np.linalg.inv(box)
+    assert ((fractional >= 0) & (fractional < 1)).all()
+
+    deltas = fractional[:, None, :] - fractional[None, :, :]
+    deltas -= np.round(deltas)
+    dist = np.linalg.norm(deltas @ box, axis=-1)
+    np.fill_diagonal(dist, np.inf)
+    assert dist.min() >= 1.5
+
+def test_lattice_plan_covers_atoms_with_little_slack():
+    from structgen.placement import plan_lattice
+    for natoms, sides in ((1001, [1, 1, 1]), (28000, [1, 1, 1]), (1000, [1, 1, 3])):
+        counts = plan_lattice(natoms, sides)
+        assert counts.prod() >= natoms
+        assert counts.prod() <= 1.15*natoms
+
+def test_out_of_core_matches_in_memory_layout(tmp_path):
+    from structgen import writers
+
+    handler = ATOMIC(make_args(out_of_core=True, chunk_size=40, scratch_dir=str(tmp_path), output=str(tmp_path / "o.structure"), seed=2))
+    data = handler.get_atom_data()
+    assert data.dtype["id"] == np.int32 and data.dtype["x"] == np.float32
+    assert np.array_equal(data["id"], np.arange(1, 301))
+    assert np.bincount(data["type"])[1:].tolist() == [100, 200]
+
+    positions = np.column_stack([data["x"], data["y"], data["z"]])
+    assert len(np.unique(positions, axis=0)) == 300
+    assert np.all((positions > 0) & (positions < handler.get_sim_region_sides()))
+
+    writers.save_lammps(handler, handler.get_outfile_name())
+    rows = np.loadtxt((tmp_path / "o.structure").read_text().split("Atoms # atomic\n\n")[1].splitlines())
+    assert np.allclose(rows[:, 2:], positions)
+
+def test_chunk_size_does_not_change_the_structure(tmp_path):
+    from structgen import writers
+    from structgen.handlers.charge import CHARGE
+
+    def save(name, **overrides):
+        args = make_args(atom=[["28.085", "1", "2.4"], ["16.00", "2", "-1.2"]], factor=700, seed=5, output=str(tmp_path / name), scratch_dir=str(tmp_path), **overrides)
+        handler = CHARGE(args)
+        writers.save_lammps(handler, handler.get_outfile_name())
+        return handler
+
+    in_memory = save("memory.structure")
+    for chunk_size in (7, 1000, 5000):
+        save(f"{chunk_size}.structure", out_of_core=True, chunk_size=chunk_size)
+    texts = {(tmp_path / f"{chunk_size}.structure").read_bytes() for chunk_size in (7, 1000, 5000)}
+    assert len(texts) == 1
+
+    #In memory the same atoms sit at the same sites, only kept in float64
+    rows = np.loadtxt(texts.pop().decode().split("Atoms # charge\n\n")[1].splitlines())
+    data = in_memory.get_atom_data()
+    assert np.array_equal(rows[:, 1], data["type"])
+    assert np.allclose(rows[:, 3:], in_memory.get_atom_positions(), atol=1e-4)
+
+def test_curve_sort_keeps_types_with_their_atoms():
+    from structgen.neighbors import position_hilbert_codes
+
+    unsorted = ATOMIC(make_args(placement="random", min_dist=["1.2"], seed=5))
+    handler = ATOMIC(make_args(placement="random", min_dist=["1.2"], seed=5, sort="hilbert"))
+    data = handler.get_atom_data()
+    positions = handler.get_atom_positions()
+
+    assert np.array_equal(data["id"], np.arange(1, 301))
+    assert np.all(np.diff(position_hilbert_codes(positions, handler.get_box_matrix())) >= 0)
+
+    #Same atoms, only the ids changed
+    before = sorted(zip(unsorted.get_atom_data()["type"].tolist(), map(tuple, unsorted.get_atom_positions().tolist())))
+    after = sorted(zip(data["type"].tolist(), map(tuple, positions.tolist())))
+    assert before == after
+
+def test_hilbert_codes_step_between_neighboring_cells():
+    from structgen.neighbors import hilbert_codes
+
+    grid = np.indices((8, 8, 8)).reshape(3, -1).T
+    codes = hilbert_codes(grid, 3)
+    assert np.array_equal(np.sort(codes), np.arange(512))
+    assert np.all(np.abs(np.diff(grid[np.argsort(codes)], axis=0)).sum(axis=1) == 1)
+
+def test_out_of_core_sort_follows_slabs(tmp_path):
+    unsorted = ATOMIC(make_args(out_of_core=True, chunk_size=40, scratch_dir=str(tmp_path), seed=2)).get_atom_data()
+    data = ATOMIC(make_args(out_of_core=True, chunk_size=40, scratch_dir=str(tmp_path), sort="morton", seed=2)).get_atom_data()
+
+    #The same atoms only get other ids
+    assert sorted(data[["type", "x", "y", "z"]].tolist()) == sorted(unsorted[["type", "x", "y", "z"]].tolist())
+
+def test_periodic_axes_space_sites_evenly_across_the_boundary():
+    handler = ATOMIC(make_args(atom=[["28.085", "1000"]], buffer=10.0, boundary=["p", "p", "f"]))
+    positions = handler.get_atom_positions()
+    sides = handler.get_sim_region_sides()
+
+    for axis in (0, 1):
+        planes = np.unique(np.round(positions[:, axis], 9))
+        spacing = sides[axis]/len(planes)
+        assert np.allclose(np.diff(planes), spacing)
+        assert np.isclose(planes[0] + sides[axis] - planes[-1], spacing)
+
+    assert np.isclose(positions[:, 2].min(), 0.1*sides[2])
+    assert np.isclose(positions[:, 2].max(), 0.9*sides[2])
@@ -1,4 +1,9 @@
+import warnings
 from types import SimpleNamespace
+
+import pytest
+
+from structgen.errors import StructgenError
 from structgen.handlers.charge import CHARGE
 
 def test_charge_handler_atom_counts():
@@ -13,3 +18,44 @@ def test_charge_handler_atom_counts():
     assert handler.get_natoms() == 3
     assert handler.get_natom_types() == 2
 
+
+def make_glass_args(**overrides):
+    args = dict(
+        atom=[["28.085", "10", "2.4"], ["16.00", "21", "-1.2"], ["22.99", "5", "0.6"], ["40.08", "3", "1.2"]],
+        density=2.2,
+        buffer=5.0,
+        factor=1,
+        output="test.structure",
+    )
+    args.update(overrides)
+    return SimpleNamespace(**args)
+
+def test_charge_warns_about_net_charge():
+    with pytest.warns(UserWarning, match = "net charge"):
+        CHARGE(make_glass_args())
+
+def test_auto_neutralize_counts_changes_fewest_atoms():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        handler = CHARGE(make_glass_args(auto_neutralize="counts"))
+
+    assert abs(handler.get_total_charge()) < 1e-9
+    assert sum(abs(new - old) for new, old in zip(handler.COUNTS, [10, 21, 5, 3])) == 3
+    assert handler.get_natoms() == sum(handler.COUNTS)
+
+def test_auto_neutralize_charge_of_one_type():
+    with warnings.catch_warnings():
+        warnings.simplefilter("error")
+        handler = CHARGE(make_glass_args(auto_neutralize="charge:2"))
+
+    assert abs(handler.get_total_charge()) < 1e-9
+    assert handler.COUNTS == [10, 21, 5, 3]
+    assert handler.CHARGES[0] == 2.4
+
+def test_auto_neutralize_counts_keeps_every_type():
+    with pytest.raises(StructgenError, match = "removing a type"):
+        CHARGE(make_glass_args(atom=[["28.085", "10", "1.0"]], auto_neutralize="counts"))
+
+def test_auto_neutralize_rejects_unknown_mode():
+    with pytest.raises(StructgenError):
+        CHARGE(make_glass_args(auto_neutralize="charge:9"))
@@ -0,0 +1,42 @@
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from structgen import molecules
+from structgen.errors import StructgenError
+from structgen.handlers.full import FULL
+
+def make_args(**overrides):
+    args = dict(
+        atom=[["28.085", "10", "2.4"], ["16.00", "20", "-1.2"]],
+        density=2.2,
+        buffer=5.0,
+        factor=1,
+        output="test.structure",
+    )
+    args.update(overrides)
+    return SimpleNamespace(**args)
+
+def test_full_reads_molecules_without_prompting(tmp_path, monkeypatch):
+    monkeypatch.setattr("builtins.input", lambda _: pytest.fail("input() must not be called"))
+    spec = tmp_path / "molecules.json"
+    spec.write_text(json.dumps({"molecules": [{"composition": "1(1)-2(2)", "count": 5}, {"composition": {"2": 3}}]}))
+
+    handler = FULL(make_args(molecule_file=str(spec), molecule=[["1(2)", "2"]]))
+    assert handler.MOLECULES == [[[1, 5], [2, 10]], [[2, 3]], [[1, 4]]]
+    assert handler.NUM_MOLECULES == 8
+    assert handler.CHARGES == [2.4, -1.2]
+
+def test_molecule_file_is_parsed_once(tmp_path):
+    spec = tmp_path / "molecules.json"
+    spec.write_text(json.dumps({"molecules": [{"composition": "1(1)-2(2)", "count": 5}]}))
+
+    molecules.load_molecule_file(str(spec))
+    hits = molecules.parse_molecule_file.cache_info().hits
+    molecules.load_molecule_file(str(spec))
+    assert molecules.parse_molecule_file.cache_info().hits == hits + 1
+
+def test_full_rejects_oversubscribed_molecules():
+    with pytest.raises(StructgenError):
+        FULL(make_args(molecule=[["1(20)", "1"]]))
@@ -0,0 +1,160 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from structgen import constants, topology
+from structgen.errors import StructgenError
+from structgen.handlers.molecular import MOLECULAR
+
+def make_args(**overrides):
+    args = dict(
+        atom=[["12.011", "50"], ["1.008", "200"]],
+        density=0.5,
+        buffer=5.0,
+        factor=1,
+        seed=3,
+        molecule=[["1(1)-2(4)", "50"]],
+        bond=[["1-2", "200"]],
+        output="test.structure",
+    )
+    args.update(overrides)
+    return SimpleNamespace(**args)
+
+def test_molecular_bonds_stay_inside_molecules():
+    handler = MOLECULAR(make_args())
+    atoms = handler.get_atom_data()
+    bonds = handler.get_bond_data()
+
+    assert handler.get_nbonds() == 200
+    first, second = bonds[:, 2] - 1, bonds[:, 3] - 1
+    assert np.all(atoms["molecule-id"][first] == atoms["molecule-id"][second])
+    assert np.all(atoms["type"][first] != atoms["type"][second])
+
+    #Every atom pair is bonded at most once
+    pairs = np.sort(bonds[:, 2:], axis = 1)
+    assert len(np.unique(pairs, axis = 0)) == len(pairs)
+
+def test_molecular_intermolecular_bonds():
+    handler = MOLECULAR(make_args(bond=[["1-2", "200"], ["1-1", "10"]], intermol=[0, 10]))
+    atoms = handler.get_atom_data()
+    bonds = handler.get_bond_data()
+
+    carbon_bonds = bonds[bonds[:, 1] == 2]
+    assert len(carbon_bonds) == 10
+    assert np.all(atoms["molecule-id"][carbon_bonds[:, 2] - 1] != atoms["molecule-id"][carbon_bonds[:, 3] - 1])
+
+def test_molecular_rejects_impossible_bonds():
+    handler = MOLECULAR(make_args(bond=[["1-2", "201"]]))
+    with pytest.raises(StructgenError):
+        handler.get_bond_data()
+
+def test_molecular_bonds_keep_valences():
+    #Atoms outside molecules bond across them, no atom above the valence of its type
+    handler = MOLECULAR(make_args(molecule=[], bond=[["1-2", "120"]], intermol=[120]))
+    atoms = handler.get_atom_data()
+    bonds = handler.get_bond_data()
+
+    degrees = np.bincount(bonds[:, 2:].ravel() - 1, minlength=len(atoms["type"]))
+    assert len(bonds) == 120
+    assert degrees[atoms["type"] == 1].max() <= 3
+    assert degrees[atoms["type"] == 2].max() <= 1
+
+def test_generated_molecules_have_short_bonds():
+    handler = MOLECULAR(make_args(atom=[["12.011", "2000"], ["1.008", "8000"]], molecule=[["1(1)-2(4)", "2000"]], bond=[["1-2", "8000"]]))
+    positions = handler.get_atom_positions()
+    bonds = handler.get_bond_data()
+
+    box = handler.get_box_matrix()
+    fractional = (positions[bonds[:, 3] - 1] - positions[bonds[:, 2] - 1]) @ np.linalg.inv(box)
+    lengths = np.linalg.norm((fractional - np.round(fractional)) @ box, axis=1)
+    assert len(bonds) == 8000
+    assert lengths.max() < constants.MAX_BOND_LENGTH
+
+def test_far_bonds_raise():
+    positions = np.array([[1.0, 1.0, 1.0], [9.0, 1.0, 1.0]])
+    with pytest.raises(StructgenError, match="within 5 Angstrom"):
+        topology.assign_bonds(positions, np.array([1, 2]), np.array([1, 2]), 30*np.eye(3), [[1, 2]], [0], [1], 2.0)
+
+def test_bonds_without_free_valence_raise():
+    #Every methane holds a single carbon, so no carbon pair shares a molecule
+    handler = MOLECULAR(make_args(bond=[["1-2", "200"], ["1-1", "1"]]))
+    handler.get_atom_data()
+    with pytest.raises(StructgenError, match="no free valence"):
+        handler.get_bond_data()
+
+METHANE = """methane
+
+5 atoms
+4 bonds
+
+Coords
+
+1 0.000 0.000 0.000
+2 0.629 0.629 0.629
+3 -0.629 -0.629 0.629
+4 -0.629 0.629 -0.629
+5 0.629 -0.629 -0.629
+
+Types
+
+1 1
+2 2
+3 2
+4 2
+5 2
+
+Bonds
+
+1 1 1 2
+2 1 1 3
+3 1 1 4
+4 1 1 5
+"""
+
+@pytest.mark.parametrize("placement", ["lattice", "random"])
+def test_templates_keep_their_shape(tmp_path, placement):
+    template = tmp_path / "methane.mol"
+    template.write_text(METHANE)
+
+    handler = MOLECULAR(make_args(molecule=None, template=[[str(template), "50"]], placement=placement))
+    atoms = handler.get_atom_data()
+    positions = handler.get_atom_positions()
+    bonds = handler.get_bond_data()
+    box = handler.get_sim_region_sides()
+
+    deltas = positions[bonds[:, 2] - 1] - positions[bonds[:, 3] - 1]
+    deltas -= box*np.round(deltas/box)
+    assert np.allclose(np.linalg.norm(deltas, axis = 1), np.sqrt(3)*0.629)
+
+    #Atoms sticking out of a face are wrapped back into the box
+    assert ((positions >= 0) & (positions < box)).all()
+
+    #Atoms of different molecules keep the default clearance
+    deltas = positions[:, None] - positions[None]
+    deltas -= box*np.round(deltas/box)
+    distances = np.linalg.norm(deltas, axis = 2)
+    other_molecule = atoms["molecule-id"][:, None] != atoms["molecule-id"][None]
+    assert distances[other_molecule].min() >= 1.0
+
+def test_templates_stay_inside_walls(tmp_path):
+    template = tmp_path / "methane.mol"
+    template.write_text(METHANE)
+
+    handler = MOLECULAR(make_args(molecule=None, template=[[str(template), "50"]], placement="random", boundary=["p", "p", "f"], buffer=5.0))
+    positions = handler.get_atom_positions()
+    box = np.array(handler.get_sim_region_sides())
+
+    assert ((positions >= 0) & (positions < box)).all()
+    assert positions[:, 2].min() >= 0.05*box[2] and positions[:, 2].max() <= 0.95*box[2]
+
+    handler = MOLECULAR(make_args(molecule=None, template=[[str(template), "50"]], boundary=["f", "f", "f"], buffer=0.0))
+    positions = handler.get_atom_positions()
+    assert ((positions >= 0) & (positions <= np.array(handler.get_sim_region_sides()))).all()
+
+def test_xyz_template_types_must_be_numbers(tmp_path):
+    template = tmp_path / "methane.xyz"
+    template.write_text("1\nmethane\nC 0 0 0\n")
+
+    with pytest.raises(StructgenError):
+        MOLECULAR(make_args(template=[[str(template)]]))
@@ -0,0 +1,143 @@
+import numpy as np
+import pytest
+
+import structgen
+from structgen import StructgenError
+
+ODD_DATA = """LAMMPS data file via write_data
+
+4 atoms
+2 atom types
+0 angles
+1 angle types
+2 dihedral types
+1 improper types
+2 extra bond per atom
+6 extra special per atom
+
+-1.0 9.0 xlo xhi
+0.0 10.0 ylo yhi
+2.0 12.0 zlo zhi
+
+Masses
+
+2 16.0
+1 28.0  # Si
+
+Pair Coeffs # lj/cut
+
+1 1.0 1.0
+2 1.0 1.0
+
+Atoms # atomic
+
+7 1 8.5 5.0 3.0 0 0 0
+1 1 0.0 5.0 3.0 1 0 0
+3 2 -1.5 5.0 3.0 0 0 0
+4 1 1.0 5.0 13.0 0 0 -1
+"""
+
+METHANE = """methane
+
+5 atoms
+4 bonds
+
+Coords
+
+1 0.000 0.000 0.000
+2 0.629 0.629 0.629
+3 -0.629 -0.629 0.629
+4 -0.629 0.629 -0.629
+5 0.629 -0.629 -0.629
+
+Types
+
+1 1
+2 2
+3 2
+4 2
+5 2
+
+Bonds
+
+1 1 1 2
+2 1 1 3
+3 1 1 4
+4 1 1 5
+"""
+
+def write_structure(path, **kwargs):
+    handler = structgen.generate(**kwargs)
+    structgen.save(handler, str(path))
+    return handler
+
+def test_read_round_trips_written_structure(tmp_path):
+    handler = write_structure(tmp_path / "a.data", masses=[28.085, 16.00], counts=[100, 200], charges=[2.4, -1.2], density=2.2, tilt=[0.1, 0, 0.05], seed=1)
+    structure = structgen.read(str(tmp_path / "a.data"))
+
+    assert structure.get_atom_style() == "charge"
+    assert structure.get_masses() == handler.get_masses()
+    assert np.allclose(structure.get_tilt_factors(), handler.get_tilt_factors())
+    assert np.allclose(structure.get_atom_positions(), handler.get_atom_positions())
+    assert np.array_equal(structure.get_atom_data()["q"], handler.get_atom_data()["q"])
+
+def test_boundary_is_noted_in_header_and_read_back(tmp_path):
+    write_structure(tmp_path / "a.data", masses=[28.085], counts=[50], density=2.2, boundary=["p", "f", "s"])
+    assert "#Boundary: p f s" in (tmp_path / "a.data").read_text()
+    assert structgen.read(str(tmp_path / "a.data")).get_boundary() == ["p", "f", "s"]
+
+def test_read_moves_box_to_origin_and_renumbers(tmp_path):
+    path = tmp_path / "odd.data"
+    path.write_text(ODD_DATA)
+    with pytest.warns(UserWarning, match="Pair Coeffs"):
+        structure = structgen.read(str(path))
+
+    data = structure.get_atom_data()
+    assert structure.get_masses() == [28.0, 16.0]
+    assert data["id"].tolist() == [1, 2, 3, 4]
+    assert np.allclose(structure.get_atom_positions()[:, 0], [1.0, 9.5, 2.0, 9.5])
+    assert np.allclose(data["z"], 1.0)
+
+def test_replicate_keeps_molecules_and_bonds_apart(tmp_path):
+    template = tmp_path / "methane.mol"
+    template.write_text(METHANE)
+    handler = write_structure(tmp_path / "methane.data", masses=[12.011, 1.008], counts=[200, 800], density=0.4, style="molecular",
+                              templates=[(str(template), 200)], bonds=[("1-2", 800)], placement="random", seed=1)
+    big = structgen.replicate(structgen.read(str(tmp_path / "methane.data")), [2, 1, 3])
+
+    atoms, bonds = big.get_atom_data(), big.get_bond_data()
+    assert big.get_natoms() == 6000 and big.get_nbonds() == 4800
+    assert np.allclose(big.get_sim_region_sides(), np.array(handler.get_sim_region_sides())*[2, 1, 3])
+    assert atoms["molecule-id"].max() == 1200
+    assert np.all(atoms["molecule-id"][bonds[:, 2] - 1] == atoms["molecule-id"][bonds[:, 3] - 1])
+
+    #Bonds across periodic faces join the neighboring copy instead of spanning the box
+    box = big.get_box_matrix()
+    fractional = big.get_atom_positions() @ np.linalg.inv(box)
+    deltas = fractional[bonds[:, 2] - 1] - fractional[bonds[:, 3] - 1]
+    lengths = np.linalg.norm((deltas - np.round(deltas)) @ box, axis=1)
+    assert np.allclose(lengths, np.sqrt(3)*0.629, atol=1e-6)
+
+def test_merge_carves_out_overlapping_atoms(tmp_path):
+    matrix = structgen.replicate(structgen.generate([28.085, 16.00], [100, 200], density=2.2, seed=1), [2, 2, 2])
+    phase = structgen.generate([22.99], [50], density=1.0, seed=2)
+    merged = structgen.merge(matrix, phase, min_dist=2.0)
+
+    report = structgen.report(merged)
+    pairs = {tuple(pair["types"]): pair["min_distance"] for pair in report["pairs"]}
+    assert merged.get_natom_types() == 3
+    assert np.bincount(merged.get_atom_data()["type"])[3] == 50
+    assert pairs[1, 3] >= 2.0 and pairs[2, 3] >= 2.0
+    assert merged.get_natoms() < 2400 + 50
+
+def test_insert_keeps_clear_of_existing_atoms():
+    structure = structgen.generate([28.085, 16.00], [100, 200], [2.4, -1.2], density=2.2, seed=1)
+    extended = structgen.insert(structure, [1.008], [100], [0.4], min_dist={(3, 3): 1.0}, seed=3)
+
+    report = structgen.report(extended)
+    pairs = {tuple(pair["types"]): pair["min_distance"] for pair in report["pairs"]}
+    assert pairs[1, 3] >= 1.0 and pairs[2, 3] >= 1.0 and pairs[3, 3] >= 1.0
+    assert np.allclose(extended.get_atom_data()["q"][-100:], 0.4)
+
+    with pytest.raises(StructgenError):
+        structgen.insert(structgen.generate([28.085], [10], density=2.2), [1.008], [5], [0.4])
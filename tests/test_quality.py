@@ -0,0 +1,53 @@
+import json
+
+import numpy as np
+
+import structgen
+from structgen.neighbors import iter_neighbor_pairs
+
+def brute_force_pairs(positions, box, cutoff):
+    fractional = positions @ np.linalg.inv(box)
+    deltas = fractional[:, None] - fractional[None]
+    deltas -= np.round(deltas)
+    distances = np.linalg.norm(deltas @ box, axis=-1)
+    first, second = np.nonzero(np.triu(distances < cutoff, k=1))
+    return dict(zip(zip(first.tolist(), second.tolist()), distances[first, second]))
+
+def test_neighbor_pairs_are_found_once():
+    rng = np.random.default_rng(0)
+    for box in (np.diag([20.0, 22.0, 25.0]), np.array([[20.0, 0, 0], [4.0, 22.0, 0], [-3.0, 5.0, 25.0]]), np.diag([7.0, 20.0, 20.0])):
+        positions = rng.random((800, 3)) @ box
+        expected = brute_force_pairs(positions, box, 3.0)
+
+        found = dict()
+        for first, second, distances in iter_neighbor_pairs(positions, box, 3.0, chunk_size=100):
+            for i, j, distance in zip(first.tolist(), second.tolist(), distances):
+                found[min(i, j), max(i, j)] = distance
+
+        assert found.keys() == expected.keys()
+        assert np.allclose([found[key] for key in expected], list(expected.values()))
+
+def test_report_matches_placement():
+    handler = structgen.generate([28.085, 16.00], [1000, 2000], [2.4, -1.2], density=2.2, placement="random", min_dist={(1, 2): 1.4, (2, 2): 2.0}, seed=4)
+    report = structgen.report(handler)
+
+    pairs = {tuple(pair["types"]): pair for pair in report["pairs"]}
+    assert pairs[1, 2]["min_distance"] >= 1.4
+    assert pairs[2, 2]["min_distance"] >= 2.0
+    assert report["min_distance"] == min(pair["min_distance"] for pair in pairs.values())
+
+    #Random points approach an ideal gas at long range
+    assert abs(np.mean(pairs[1, 1]["rdf"][-20:]) - 1) < 0.2
+    assert len(report["rdf_radii"]) == len(pairs[1, 1]["rdf"])
+
+    histogram = report["coordination"]["2"]["histogram"]
+    assert sum(histogram) == 2000
+    assert np.isclose(np.dot(np.arange(len(histogram)), histogram)/2000, report["coordination"]["2"]["mean"])
+
+def test_report_is_written_as_json(tmp_path):
+    handler = structgen.generate([28.085], [500], density=2.2, seed=1)
+    structgen.report(handler, str(tmp_path / "out.report.json"), cutoff=4.0)
+
+    report = json.loads((tmp_path / "out.report.json").read_text())
+    assert report["natoms"] == 500 and report["cutoff"] == 4.0
+    assert report["nearest_neighbor"]["isolated"] == 0
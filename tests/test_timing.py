@@ -0,0 +1,19 @@
+import time
+
+from structgen.timing import Timings
+
+def test_nested_phases_are_not_counted_twice():
+    timings = Timings()
+    timings.set_natoms(1000)
+    with timings.phase("write"):
+        for _ in range(3):
+            with timings.phase("format"):
+                time.sleep(0.01)
+
+    report = timings.get_report()
+    phases = {phase["name"]: phase for phase in report["phases"]}
+    assert phases["format"]["calls"] == 3
+    assert phases["format"]["seconds"] >= 0.03
+    assert phases["write"]["seconds"] < 0.01
+    assert phases["format"]["atoms_per_second"] == 1000/phases["format"]["seconds"]
+    assert sum(phase["seconds"] for phase in report["phases"]) <= report["total_seconds"]
@@ -0,0 +1,75 @@
+import re
+import gzip
+
+import numpy as np
+
+import structgen
+from structgen import writers
+
+def test_format_column_matches_per_value_formatting():
+    repeated = np.array([2, 1, 2, 2, 1, 1])
+    distinct = np.linspace(0, 1, 6)
+    assert writers.format_column(repeated, "%d") == ["%d" % value for value in repeated]
+    assert writers.format_column(distinct, "%.6f") == ["%.6f" % value for value in distinct]
+
+def archive_metadata(outfile):
+    with np.load(outfile) as archive:
+        return {key: archive[key] for key in archive.files if key != "atom_data"}
+
+def test_npz_keeps_field_names(tmp_path):
+    handler = structgen.generate([28.085, 16.00], [10, 20], [2.4, -1.2], density=2.2, seed=1)
+    outfile = tmp_path / "out.npz"
+    structgen.save(handler, str(outfile), "npz")
+
+    with np.load(outfile) as archive:
+        atom_data = archive["atom_data"]
+    assert atom_data.dtype.names == ("id", "type", "q", "x", "y", "z")
+    assert np.array_equal(atom_data, handler.get_atom_data())
+
+def test_npz_keeps_box_and_boundary(tmp_path):
+    handler = structgen.generate([28.085, 16.00], [10, 20], [2.4, -1.2], density=2.2, seed=1, boundary=["p", "p", "f"])
+    outfile = tmp_path / "out.npz"
+    structgen.save(handler, str(outfile), "npz")
+
+    metadata = archive_metadata(outfile)
+    assert np.allclose(metadata["box"], handler.get_sim_region_sides())
+    assert np.allclose(metadata["masses"], [28.085, 16.00])
+    assert list(metadata["boundary"]) == ["p", "p", "f"]
+    assert str(metadata["atom_style"]) == "charge"
+    assert list(metadata["atom_attrs"]) == ["id", "type", "q", "x", "y", "z"]
+
+def test_lammps_gz_round_trip(tmp_path):
+    handler = structgen.generate([28.085, 16.00], [10, 20], [2.4, -1.2], density=2.2, seed=1)
+    plain, packed = tmp_path / "out.lammps", tmp_path / "out.lammps.gz"
+    structgen.save(handler, str(plain), "lammps")
+    structgen.save(handler, str(packed), "lammps.gz")
+
+    with gzip.open(packed, "rt") as file:
+        text = file.read()
+    assert text == plain.read_text()
+    assert "30 atoms\n" in text and "2 atom types\n" in text
+
+    rows = text.split("Atoms # charge\n\n")[1].strip().splitlines()
+    assert len(rows) == 30
+    assert np.allclose(np.loadtxt(rows)[:, 3:], handler.get_atom_positions())
+
+def test_extxyz_header_and_species(tmp_path):
+    handler = structgen.generate([28.085, 16.00, 4.0026], [10, 20, 1], [2.4, -1.2, 0.0], density=2.2, seed=1, boundary=["p", "p", "f"])
+    outfile = tmp_path / "out.xyz"
+    structgen.save(handler, str(outfile), "extxyz")
+
+    lines = outfile.read_text().splitlines()
+    assert int(lines[0]) == 31 and len(lines) == 33
+
+    fields = dict(re.findall(r'(\w+)=("[^"]*"|\S+)', lines[1]))
+    lattice = np.array(fields["Lattice"].strip('"').split(), dtype=float).reshape(3, 3)
+    assert np.allclose(lattice, handler.get_box_matrix())
+    assert fields["pbc"] == '"T T F"'
+    assert fields["Properties"] == "species:S:1:id:I:1:type:I:1:q:R:1:pos:R:3"
+
+    #Types named after the element of their mass, unknown masses become dummy atoms
+    rows = [line.split() for line in lines[2:]]
+    species = {int(row[2]): row[0] for row in rows}
+    assert species == {1: "Si", 2: "O", 3: "X"}
+    positions = np.array([row[4:] for row in rows], dtype=float)
+    assert np.allclose(positions, handler.get_atom_positions())